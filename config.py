@@ -7,3 +7,47 @@ DEBUG = False
 username = os.environ.get("MYSQL_USERNAME", 'root')
 password = os.environ.get("MYSQL_PASSWORD", 'root')
 db_address = os.environ.get("MYSQL_ADDRESS", '127.0.0.1:3306')
+
+
+# 大模型接口(ai_ana、kyys)在每个 worker 进程内允许同时占用的线程数
+# 其余线程保留给择校评分、城市查询等接口，避免慢速的模型调用拖住整个服务
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", 2))
+# 大模型接口排队等待空闲名额的最长秒数，超时直接返回繁忙
+LLM_ACQUIRE_TIMEOUT = float(os.environ.get("LLM_ACQUIRE_TIMEOUT", 5))
+
+# 择校结果缓存的最大条目数和有效期(秒)，条目数为 0 时关闭缓存
+RESULT_CACHE_SIZE = int(os.environ.get("RESULT_CACHE_SIZE", 2048))
+RESULT_CACHE_TTL = float(os.environ.get("RESULT_CACHE_TTL", 3600))
+
+# 择校评分明细日志的采样比例(0~1)，默认关闭；请求带 debug 时总是输出
+SCORE_TRACE_SAMPLE_RATE = float(os.environ.get("SCORE_TRACE_SAMPLE_RATE", 0))
+
+# 命令行批量择校(python -m wxcloudrun.apis.choose_school_batch)使用的进程数，默认取 CPU 核数；
+# 为 1 时在当前进程内顺序计算。批量择校接口总是在请求线程内顺序计算
+BATCH_WORKERS = int(os.environ.get("BATCH_WORKERS", os.cpu_count() or 1))
+# 同一筛选条件的请求按此大小切分后分发给各进程，每块只构建一次候选集
+BATCH_CHUNK_SIZE = int(os.environ.get("BATCH_CHUNK_SIZE", 200))
+# 批量择校接口(需管理令牌)单次允许提交的最大请求数
+BATCH_MAX_REQUESTS = int(os.environ.get("BATCH_MAX_REQUESTS", 10000))
+
+# 为 1 时在 gunicorn master 进程中加载全部数据集后再 fork worker，各 worker 共享同一份数据，内存占用最小，
+# 但加载完成前所有接口都不可用；gunicorn 下默认开启(见 gunicorn.conf.py)。
+# 为 0 时(本地调试服务和命令行的默认值)数据集在第一次使用时加载，并由后台线程预加载
+DATASET_PRELOAD = os.environ.get("DATASET_PRELOAD", "0").lower() in ("1", "true", "yes")
+# 搜索类接口(学校、城市、专业方向)默认和最多返回的结果数
+SEARCH_RESULT_LIMIT = int(os.environ.get("SEARCH_RESULT_LIMIT", 20))
+SEARCH_MAX_LIMIT = int(os.environ.get("SEARCH_MAX_LIMIT", 100))
+# 专业方向查询按查询词缓存排序结果的条目数，为 0 时不缓存
+QUERY_CACHE_SIZE = int(os.environ.get("QUERY_CACHE_SIZE", 1024))
+# 学校结构、学校详情、城市和学校搜索接口缓存的响应体条目数，为 0 时不缓存(仍支持 ETag)
+RESPONSE_CACHE_SIZE = int(os.environ.get("RESPONSE_CACHE_SIZE", 4096))
+# 检查 resources 目录变化并自动重新加载数据集的间隔(秒)，为 0 时不检查
+DATASET_WATCH_INTERVAL = float(os.environ.get("DATASET_WATCH_INTERVAL", 0))
+# 管理接口(如重新加载数据集)的访问令牌，通过请求头 X-Admin-Token 传入，为空时关闭管理接口
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+
+# 启动时是否从云存储下载缺失的 resources 数据文件(见 wxcloudrun/utils/data_manager.py)
+DATA_DOWNLOAD_ON_START = os.environ.get("DATA_DOWNLOAD_ON_START", "0").lower() in ("1", "true", "yes")
+# 并发下载数据文件的线程数，以及单个文件失败后的重试次数(含首次)
+DATA_DOWNLOAD_WORKERS = int(os.environ.get("DATA_DOWNLOAD_WORKERS", 4))
+DATA_DOWNLOAD_RETRIES = int(os.environ.get("DATA_DOWNLOAD_RETRIES", 3))
@@ -0,0 +1,45 @@
+# gunicorn 配置
+# 启动: gunicorn -c gunicorn.conf.py wsgi:application
+import gc
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '80')}"
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count()))
+# 每个 worker 内的线程数，大模型接口最多占用其中 LLM_MAX_CONCURRENCY 个(见 config.py)
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+# 长连接保持秒数
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+# 单个请求超时秒数，需大于大模型接口自身的超时(60 秒)
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+
+# 在 master 进程中加载应用和全部数据集，再 fork 出 worker，各 worker 通过写时复制共享同一份数据。
+# gunicorn 下默认开启 DATASET_PRELOAD(本配置先于应用导入)，显式设为 0 时改为各 worker 启动后按需加载
+os.environ.setdefault('DATASET_PRELOAD', '1')
+preload_app = True
+
+# 加载数据期间关闭自动 GC，避免 fork 前 GC 改写大量数据对象的对象头，使内存页无法在进程间共享。
+# 本配置在 preload_app 加载应用之前导入，fork worker 前(pre_fork)冻结已加载的对象后重新开启
+gc.disable()
+
+
+def when_ready(server):
+    server.log.info(f"应用已在 master 进程中加载完成, 共 {len(gc.get_objects())} 个对象, 开始启动 {workers} 个 worker, 每个 {threads} 个线程")
+
+
+def pre_fork(server, worker):
+    # 把 master 中已有的对象移入永久代，worker 中的 GC 不再扫描它们，写时复制的页面得以保持共享；
+    # 冻结后 master 和之后 fork 出的 worker 都恢复自动 GC
+    gc.freeze()
+    gc.enable()
+
+
+def post_fork(server, worker):
+    # 线程不会随 fork 复制，数据集预加载和 resources 目录检查线程在每个 worker 中各自启动
+    import config
+    from wxcloudrun.utils.datasets import start_warmup, start_watcher
+    if not config.DATASET_PRELOAD:
+        start_warmup()
+    start_watcher(config.DATASET_WATCH_INTERVAL)
@@ -10,10 +10,15 @@ from wxcloudrun.utils.data_manager import data_manager
 # 启动Flask Web服务
 if __name__ == '__main__':
     # 启动服务
-    # data_manager.initialize()
+    import config
+    if config.DATA_DOWNLOAD_ON_START:
+        data_manager.initialize()
     from wxcloudrun import app
     # 导入views注册路由
     import wxcloudrun.views
+    from wxcloudrun.utils.datasets import start_warmup, start_watcher
+    start_warmup()
+    start_watcher(config.DATASET_WATCH_INTERVAL)
 
     # 导出应用实例供gunicorn使用
     application = app
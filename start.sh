@@ -1,2 +1,5 @@
 #!/bin/sh
-python3 run.py 0.0.0.0 80 
\ No newline at end of file
+# 生产环境使用 gunicorn 多进程启动，数据集在 master 进程加载后由各 worker 共享
+# 本地调试可使用: python3 run.py 0.0.0.0 80
+# 依赖以 pip install --user 安装，gunicorn 脚本所在的 ~/.local/bin 不在 PATH 中，以模块方式启动
+exec python3 -m gunicorn -c gunicorn.conf.py wsgi:application
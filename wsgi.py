@@ -0,0 +1,20 @@
+# 生产环境 WSGI 入口，供 gunicorn 使用(见 gunicorn.conf.py)
+# gunicorn 以 preload_app 方式在 master 进程中导入本模块，各数据模块在导入时只注册数据集；
+# 开启 DATASET_PRELOAD(gunicorn 下的默认值)时在这里加载全部数据集，fork 出的 worker 通过写时复制共享同一份数据，
+# 显式关闭时各 worker 启动后在后台线程中预加载(见 gunicorn.conf.py)
+import config
+from wxcloudrun.utils.data_manager import data_manager
+
+# 导入数据模块前先下载它们要读取的文件，其余文件在后台下载
+if config.DATA_DOWNLOAD_ON_START:
+    data_manager.initialize()
+
+from wxcloudrun import app
+# 导入views注册路由，同时注册 rich_fx_flat_v2、aggregated_employment_data、major_details、city_scores 等数据集
+import wxcloudrun.views
+from wxcloudrun.utils import datasets
+
+if config.DATASET_PRELOAD:
+    datasets.warm_up()
+
+application = app
@@ -0,0 +1,159 @@
+import argparse
+import json
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from loguru import logger
+from flask import Response, request, jsonify, stream_with_context
+from wxcloudrun.beans.input_models import UserInfo, TargetInfo
+from wxcloudrun.apis.choose_school_v2 import TargetContext, analyze_schools, _filter_key
+from wxcloudrun.utils import datasets
+from wxcloudrun.utils.result_cache import make_cache_key
+import config
+
+# (输入行号, 请求内容)
+BatchItem = Tuple[int, Dict[str, Any]]
+
+
+def _error_line(index: int, message: str) -> Dict[str, Any]:
+    return {"index": index, "code": -1, "data": None, "message": message}
+
+
+def _parse_request(request_data: Dict[str, Any]) -> Tuple[UserInfo, TargetInfo, bool]:
+    user_info = UserInfo(**request_data['user_info'])
+    target_info = TargetInfo(**request_data['target_info'])
+    return user_info, target_info, bool(request_data.get('debug', False))
+
+
+def _score_chunk(items: List[BatchItem]) -> List[Dict[str, Any]]:
+    """
+    计算一组筛选条件相同的请求，在工作进程中执行
+    候选学校和只依赖候选集的评分卡只构建一次，各请求只计算依赖用户的部分
+    """
+    target_context = None
+    results = []
+    for index, request_data in items:
+        try:
+            user_info, target_info, debug = _parse_request(request_data)
+            if target_context is None:
+                target_context = TargetContext(target_info)
+            result = analyze_schools(user_info, target_info, debug, target_context)
+        except Exception as e:
+            logger.error(f"批量择校第 {index} 条请求出错: {str(e)}")
+            result = _error_line(index, str(e))
+        results.append({"index": index, **result})
+    return results
+
+
+def _group_requests(lines: Iterable[str], chunk_size: int) -> Tuple[List[List[BatchItem]], List[Dict[str, Any]]]:
+    """
+    解析 JSONL 请求并按规范化的筛选条件分组，每组再按 chunk_size 切块
+    :return: (请求块列表, 无法解析的请求对应的错误结果)
+    """
+    groups: Dict[str, List[BatchItem]] = {}
+    errors = []
+    index = -1
+    for line in lines:
+        if not line.strip():
+            continue
+        index += 1
+        try:
+            request_data = json.loads(line)
+            _, target_info, _ = _parse_request(request_data)
+        except Exception as e:
+            errors.append(_error_line(index, f"请求格式错误: {str(e)}"))
+            continue
+        groups.setdefault(make_cache_key(_filter_key(target_info)), []).append((index, request_data))
+
+    chunk_size = max(chunk_size, 1)
+    chunks = [items[start:start + chunk_size] for items in groups.values()
+              for start in range(0, len(items), chunk_size)]
+    logger.info(f"批量择校: {index + 1} 条请求, {len(groups)} 组筛选条件, {len(chunks)} 个计算块")
+    return chunks, errors
+
+
+def _process_pool(workers: int) -> ProcessPoolExecutor:
+    # fork 启动的子进程直接共享父进程已加载的数据集，不需要重新加载(调用前需先加载，见 iter_batch_results)
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork'))
+    return ProcessPoolExecutor(max_workers=workers)
+
+
+def iter_batch_results(lines: Iterable[str], workers: Optional[int] = None,
+                       chunk_size: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    批量择校，按计算完成的顺序逐条产出结果
+    :param lines: JSONL 请求，每行格式与 choose_schools_v2 的请求体相同({user_info, target_info, debug})
+    :param workers: 进程数，默认 config.BATCH_WORKERS
+    :param chunk_size: 每个计算块的请求数，默认 config.BATCH_CHUNK_SIZE
+    :return: 每条结果为 choose_schools_v2 的返回内容加上输入中的序号 index(从 0 开始，不计空行)
+    """
+    workers = config.BATCH_WORKERS if workers is None else workers
+    chunk_size = config.BATCH_CHUNK_SIZE if chunk_size is None else chunk_size
+    chunks, errors = _group_requests(lines, chunk_size)
+    yield from errors
+
+    workers = min(workers, len(chunks))
+    if workers <= 1:
+        for chunk in chunks:
+            yield from _score_chunk(chunk)
+        return
+
+    # 数据集默认在第一次使用时才加载，fork 前先在父进程加载全部数据集，子进程通过写时复制共享，不再各自加载
+    datasets.warm_up()
+    with _process_pool(workers) as executor:
+        futures = {executor.submit(_score_chunk, chunk): chunk for chunk in chunks}
+        for future in as_completed(futures):
+            try:
+                yield from future.result()
+            except Exception as e:
+                logger.error(f"批量择校计算块出错: {str(e)}")
+                for index, _ in futures[future]:
+                    yield _error_line(index, str(e))
+
+
+def _to_jsonl(result: Dict[str, Any]) -> str:
+    return json.dumps(result, ensure_ascii=False) + '\n'
+
+
+def choose_schools_v2_batch():
+    """
+    批量择校接口，请求体为 JSONL，结果以 JSONL 流式返回
+    在当前请求线程内顺序计算，不在多线程的 worker 进程中 fork 进程池；大批量离线计算使用命令行(main)
+    """
+    lines = request.get_data(as_text=True).splitlines()
+    if len(lines) > config.BATCH_MAX_REQUESTS:
+        return jsonify({
+            'code': -1,
+            'data': None,
+            'message': f'单次最多提交 {config.BATCH_MAX_REQUESTS} 条请求'
+        })
+    results = iter_batch_results(lines, workers=1)
+    return Response(stream_with_context(_to_jsonl(result) for result in results),
+                    mimetype='application/x-ndjson')
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description='批量择校: 读取 JSONL 请求，输出 JSONL 结果')
+    parser.add_argument('input', nargs='?', default='-', help='请求文件，默认读取标准输入')
+    parser.add_argument('-o', '--output', default='-', help='结果文件，默认写到标准输出')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='进程数，默认 BATCH_WORKERS')
+    parser.add_argument('--chunk-size', type=int, default=None, help='每个计算块的请求数，默认 BATCH_CHUNK_SIZE')
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8')
+    target = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    try:
+        for result in iter_batch_results(source, args.workers, args.chunk_size):
+            target.write(_to_jsonl(result))
+            target.flush()
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,7 @@
+import heapq
 import json
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Iterator, Tuple, Optional
+import numpy as np
 from loguru import logger
 from flask import request, jsonify, current_app
 from wxcloudrun.beans.input_models import UserInfo, TargetInfo, SchoolInfo, Area
@@ -9,31 +11,33 @@ from wxcloudrun.score_card.major_score_calculator import MajorScoreCalculator
 from wxcloudrun.score_card.system_employment_score_calculator import SystemEmploymentScoreCalculator
 from wxcloudrun.score_card.non_system_employment_score_calculator import NonSystemEmploymentScoreCalculator
 from wxcloudrun.score_card.constants import PROBABILITY_LEVELS, SCORE_CARD_WEIGHTS, TOTAL_SCORE_WEIGHTS, ADMISSION_SCORE_WEIGHTS, ADMISSION_SCORE_DEFAULTS, ADMISSION_SCORE_LEVELS
-from wxcloudrun.utils.file_util import SCHOOL_DATAS, EMPLOYMENT_DATA, CITY_LEVEL_MAP
+from wxcloudrun.utils.file_util import C9_SCHOOLS
+from wxcloudrun.utils.school_index import SchoolIndex
+from wxcloudrun.utils.result_cache import ResultCache, make_cache_key
+from wxcloudrun.utils.datasets import register_dataset, get_dataset, current_generation
+from wxcloudrun.utils.tracing import start_trace, end_trace, trace, trace_enabled
+from wxcloudrun.utils.school_fields import build_levels, build_blb_score, build_fsx_score, count_enrollment
 from wxcloudrun.score_card.advanced_study_score_calculator import AdvancedStudyScoreCalculator
 import os
 import pickle
+import config
+from datetime import date
 from fastapi import APIRouter, Body, HTTPException
 from pydantic import BaseModel
 
 from wxcloudrun.score_card.score_data_loader import (
     get_school_data,
-    get_major_data,
-    SCHOOL_DATA,
-    MAJOR_DATA
+    get_major_data
 )
 
-# 定义本地缓存文件路径
-city_level_map = CITY_LEVEL_MAP
+# 择校结果缓存
+result_cache = ResultCache(maxsize=config.RESULT_CACHE_SIZE, ttl=config.RESULT_CACHE_TTL)
 
+def _build_school_index() -> SchoolIndex:
+    """构建候选学校倒排索引"""
+    return SchoolIndex(get_dataset('rich_fx_flat_v2'), ranked_schools=set(get_dataset('school_ranks')))
 
-# 打印学校层级数据
-try:
-    for level, schools in city_level_map.items():
-        logger.info(f"{level} 层级的学校数量: {len(schools)}")
-except Exception as e:
-    logger.error(f"打印学校层级数据时出错: {str(e)}")
-    logger.exception(e)
+register_dataset('school_index', _build_school_index)
 
 def _convert_to_school_info(school_data: Dict) -> SchoolInfo:
     """
@@ -53,80 +57,96 @@ def _convert_to_school_info(school_data: Dict) -> SchoolInfo:
         fsx=school_data.get('fsx', []),
         directions=school_data.get('directions', []),
         province=school_data['province'],
-        city=school_data['city']
+        city=school_data['city'],
+        levels=school_data.get('levels'),
+        blb_score=school_data.get('blb_score'),
+        fsx_score=school_data.get('fsx_score'),
+        nlqrs=school_data.get('nlqrs')
     )
 
+def _resolve_weights(target_info: TargetInfo) -> Dict[str, float]:
+    """合并默认权重和用户自定义权重"""
+    weights = {
+        '地理位置': 0.15,
+        '专业实力': 0.15,
+        '升学': 0.2,
+        '体制内就业': 0.3,  # 添加体制内就业权重
+        '非体制就业': 0.2   # 添加非体制就业权重
+    }
+    
+    # 如果有用户自定义权重，则使用用户定义的
+    if target_info.weights:
+        for weight in target_info.weights:
+            if weight.name in weights:
+                weights[weight.name] = weight.val
+                
+    return weights
+
+def _filter_key(target_info: TargetInfo) -> Dict[str, Any]:
+    """规范化的筛选条件，筛选条件相同的请求得到相同的候选学校"""
+    return {
+        'school_cities': sorted({(area.province, area.city) for area in target_info.school_cities}),
+        'majors_and_directions': sorted(set(target_info.majors + target_info.directions)),
+        'levels': sorted({level.lower() for level in target_info.levels})
+    }
+
+def _result_cache_key(user_info: UserInfo, target_info: TargetInfo, debug: bool) -> str:
+    """
+    生成择校结果缓存键
+    只取影响结果的字段并规范化: 筛选条件和工作城市与顺序无关，按集合排序；权重按生效值合并；
+    备考时间维度依赖当天日期，数据集版本变化后旧结果自动失效
+    """
+    hometown = user_info.hometown
+    return make_cache_key({
+        'dataset_version': current_generation().version,
+        'date': date.today().isoformat(),
+        'debug': bool(debug),
+        'user': {
+            'school': user_info.school,
+            'major': user_info.major,
+            'rank': user_info.rank,
+            'cet': user_info.cet,
+            'hometown': [hometown.province, hometown.city] if hometown else None
+        },
+        'target': {
+            **_filter_key(target_info),
+            'work_cities': sorted({(area.province, area.city) for area in target_info.work_cities}),
+            'weights': _resolve_weights(target_info)
+        }
+    })
+
 def _filter_schools(target_info: TargetInfo) -> List[SchoolInfo]:
     """
     根据用户目标筛选学校
     :param target_info: 目标信息
     :return: 符合条件的学校列表
     """
-    filtered_schools = []
-    
+    return _filter_candidates(target_info)[1]
+
+def _filter_candidates(target_info: TargetInfo) -> Tuple[List[int], List[SchoolInfo]]:
+    """
+    根据用户目标筛选学校，同时返回候选在 rich_fx_flat_v2 中的行号
+    :param target_info: 目标信息
+    :return: (候选行号列表, 符合条件的学校列表)，两者顺序一致
+    """
     # 合并专业和方向为一个集合
     target_majors_and_directions = set(target_info.majors + target_info.directions)
-    
-    for school_data in SCHOOL_DATAS:
-        # 获取学校数据，检查软科排名
-        school_name = school_data['school_name']
-        school_info_data = get_school_data(school_name)
-        
-        # 如果学校没有软科排名数据，跳过这个学校
-        if not school_info_data or school_info_data.rank is None:
-            logger.warning(f"学校 {school_name} 没有软科排名数据，将被过滤掉")
-            continue
-            
-        # 检查学校是否在目标城市列表中
-        if target_info.school_cities:
-            school_in_target_cities = any(
-                city.province == school_data['province'] and 
-                city.city == school_data['city']
-                for city in target_info.school_cities
-            )
-            if not school_in_target_cities:
-                continue
-        
-        # 检查专业或研究方向是否匹配
-        if target_majors_and_directions:
-            # 获取学校的专业名称和所有研究方向名称
-            school_major = school_data['major']
-            school_directions = [d['yjfxmc'] for d in school_data.get('directions', [])]
-            
-            # 检查是否有任何一个匹配
-            major_direction_match = (
-                school_major in target_majors_and_directions or
-                any(direction in target_majors_and_directions for direction in school_directions)
-            )
-            
-            if not major_direction_match:
-                continue
-        
-        # 检查学校层次是否符合要求
-        if target_info.levels:
-            school_level_match = False
-            
-            if 'c9' in [level.lower() for level in target_info.levels] and school_name in city_level_map['c9']:
-                school_level_match = True
-            elif '985' in target_info.levels and school_data['is_985'] == "1":
-                school_level_match = True
-            elif '211' in target_info.levels and school_data['is_211'] == "1":
-                school_level_match = True
-            # TODO: 添加双一流判断，需要数据支持
-            if not school_level_match:
-                continue
-        
-        # 转换为SchoolInfo对象
-        school_info = _convert_to_school_info(school_data)
-        filtered_schools.append(school_info)
+    target_areas = [(city.province, city.city) for city in target_info.school_cities]
+
+    # 通过倒排索引求交集得到候选行，没有软科排名的学校已在建索引时过滤
+    generation = current_generation()
+    school_datas = generation.get('rich_fx_flat_v2')
+    row_ids = generation.get('school_index').candidate_ids(
+        target_areas, target_majors_and_directions, target_info.levels)
+    filtered_schools = [_convert_to_school_info(school_datas[row_id]) for row_id in row_ids]
     
     logger.info(f"筛选出 {len(filtered_schools)} 所符合条件的学校")
-    return filtered_schools
+    return row_ids, filtered_schools
 
 def _convert_school_info_to_dict(school_info: SchoolInfo) -> Dict:
     """将SchoolInfo对象转换为可JSON序列化的字典"""
     # 获取就业数据
-    employment_info = EMPLOYMENT_DATA.get(school_info.school_name, [])
+    employment_info = get_dataset('aggregated_employment_data').get(school_info.school_name, [])
     
     return {
         "school_name": school_info.school_name,
@@ -144,108 +164,151 @@ def _convert_school_info_to_dict(school_info: SchoolInfo) -> Dict:
         "jy": employment_info  # 添加就业数据
     }
 
-def analyze_schools(user_info: UserInfo, target_info: TargetInfo, debug: bool = False) -> Dict:
-    """分析学校列表"""
+def _build_target_school(school_chooser: 'SchoolChooser', school: SchoolInfo, debug: bool = False) -> Optional[Dict]:
+    """计算单所学校的完整评分卡并转换为返回格式，出错时返回None"""
+    try:
+        # 计算学校评分
+        score_info = school_chooser._calculate_school_score(school)
+        
+        # 获取各评分卡得分
+        location_score = score_info['location_score']
+        major_score = score_info['major_score']
+        advanced_study_score = score_info['advanced_study_score']
+        admission_score = score_info['admission_score']
+        system_employment_score = score_info['system_employment_score']
+        non_system_employment_score = score_info['non_system_employment_score']
+        
+        # 转换为目标格式
+        target_school = _convert_to_target_school(school, {
+            'score_info': {
+                'score_card': {
+                    'location_card': location_score,
+                    'major_card': major_score,
+                    'advanced_study_card': advanced_study_score,
+                    'admission_score': admission_score,
+                    'system_employment_card': system_employment_score,
+                    'non_system_employment_card': non_system_employment_score
+                },
+                'probability': score_info['probability'],
+                'total_score': score_info['total_score']
+            }
+        })
+        
+        # 在debug模式下添加学校详情
+        if debug:
+            target_school['score_info_summary'] = {
+                'total_score': score_info['total_score'],
+                'location_score': score_info['location_score']['total_score'],
+                'major_score': score_info['major_score']['total_score'],
+                'advanced_study_score': score_info['advanced_study_score']['total_score'],
+                'system_employment_score': score_info['system_employment_score']['total_score'],
+                'non_system_employment_score': score_info['non_system_employment_score']['total_score'],
+                'weights': school_chooser.weights
+            }
+            # target_school['school_detail'] = _convert_school_info_to_dict(school)
+            # target_school['score_info'] = score_info
+        
+        return target_school
+    except Exception as e:
+        logger.error(
+            f"计算学校 {school.school_name} 评分时出错:\n"
+            f"错误类型: {type(e).__name__}\n"
+            f"错误信息: {str(e)}\n"
+            f"错误位置: {e.__traceback__.tb_frame.f_code.co_filename}:{e.__traceback__.tb_lineno}\n"
+            f"学校信息: {vars(school)}\n"
+            f"目标信息: {vars(school_chooser.target_info)}\n"
+            f"用户信息: {vars(school_chooser.user_info)}\n"
+            f"当前评分卡状态:\n"
+            f"- location_calculator: {vars(school_chooser.location_calculator)}\n"
+            f"- major_calculator: {vars(school_chooser.major_calculator)}\n"
+            f"- admission_calculator: {vars(school_chooser.admission_calculator)}\n"
+            f"- system_employment_calculator: {vars(school_chooser.system_employment_calculator)}\n"
+            f"- non_system_employment_calculator: {vars(school_chooser.non_system_employment_calculator)}\n"
+            f"- advanced_calculator: {vars(school_chooser.advanced_calculator)}"
+        )
+        logger.exception("完整错误栈:")
+        return None
+
+def _get_probability_group(probability: float) -> Optional[str]:
+    """根据录取概率获取所属分组，不在任何分组时返回None"""
+    if PROBABILITY_LEVELS['IMPOSSIBLE'] <= probability < PROBABILITY_LEVELS['DIFFICULT']:
+        return '冲刺'
+    elif PROBABILITY_LEVELS['DIFFICULT'] <= probability < PROBABILITY_LEVELS['MODERATE']:
+        return '稳妥'
+    elif PROBABILITY_LEVELS['MODERATE'] <= probability < PROBABILITY_LEVELS['EASY']:
+        return '保底'
+    return None
+
+def _rank_by_level(probabilities: List[Optional[float]], card_scores: List[float]) -> Dict[str, Iterator[int]]:
+    """
+    将候选学校按录取概率分组，组内按总分从高到低依次产出候选下标
+    每组建堆只需 O(n)，构造评分卡时只弹出实际用到的候选；某个候选构造失败时可继续取下一名
+    :param probabilities: 录取概率列表，None表示评分出错
+    :param card_scores: 用于组内排序的总分列表
+    :return: 各组候选下标的迭代器，总分相同时靠前的候选优先
+    """
+    groups = {
+        '冲刺': [],  # 25-45%
+        '稳妥': [],  # 45-75%
+        '保底': []   # 75-95%
+    }
+    
+    for index, probability in enumerate(probabilities):
+        if probability is None:  # 评分出错的学校不参与推荐
+            continue
+        level = _get_probability_group(probability)
+        if not level:
+            continue
+        groups[level].append((-card_scores[index], index))
+    
+    return {level: _pop_in_order(entries) for level, entries in groups.items()}
+
+def _pop_in_order(entries: List[Tuple[float, int]]) -> Iterator[int]:
+    heapq.heapify(entries)
+    while entries:
+        yield heapq.heappop(entries)[1]
+
+def _build_top_k(school_chooser: 'SchoolChooser', schools: List, indexes: Iterator[int], k: int,
+                 debug: bool) -> List[Dict]:
+    """按排名依次构造评分卡，跳过构造失败的候选，凑满 k 所或候选用尽为止"""
+    target_schools = []
+    for index in indexes:
+        target_school = _build_target_school(school_chooser, schools[index], debug)
+        if target_school is not None:
+            target_schools.append(target_school)
+            if len(target_schools) >= k:
+                break
+    return target_schools
+
+def analyze_schools(user_info: UserInfo, target_info: TargetInfo, debug: bool = False,
+                    target_context: Optional['TargetContext'] = None) -> Dict:
+    """
+    分析学校列表
+    :param target_context: 筛选条件相同的请求共享的候选集，批量择校时传入，为空时按 target_info 筛选
+    """
     try:
         # 获取所有符合条件的学校
-        schools = _filter_schools(target_info)
-        target_schools = [(school.school_name, school.major_code) for school in schools]
+        if target_context is None:
+            target_context = TargetContext(target_info)
+        schools = target_context.schools
         # 初始化评分计算器
-        school_chooser = SchoolChooser(user_info, target_info, target_schools)
+        school_chooser = SchoolChooser(user_info, target_info, target_context)
         
 
         logger.info(f"找到 {len(schools)} 所候选学校")
         
-        # 计算每所学校的得分
-        school_scores = []
-        for school in schools:
-            try:
-                # 计算学校评分
-                score_info = school_chooser._calculate_school_score(school)
-                
-                # 获取各评分卡得分
-                location_score = score_info['location_score']
-                major_score = score_info['major_score']
-                advanced_study_score = score_info['advanced_study_score']
-                admission_score = score_info['admission_score']
-                system_employment_score = score_info['system_employment_score']
-                non_system_employment_score = score_info['non_system_employment_score']
-                
-                # 转换为目标格式
-                target_school = _convert_to_target_school(school, {
-                    'score_info': {
-                        'score_card': {
-                            'location_card': location_score,
-                            'major_card': major_score,
-                            'advanced_study_card': advanced_study_score,
-                            'admission_score': admission_score,
-                            'system_employment_card': system_employment_score,
-                            'non_system_employment_card': non_system_employment_score
-                        },
-                        'probability': score_info['probability'],
-                        'total_score': score_info['total_score']
-                    }
-                })
-                
-                # 在debug模式下添加学校详情
-                if debug:
-                    target_school['score_info_summary'] = {
-                        'total_score': score_info['total_score'],
-                        'location_score': score_info['location_score']['total_score'],
-                        'major_score': score_info['major_score']['total_score'],
-                        'advanced_study_score': score_info['advanced_study_score']['total_score'],
-                        'system_employment_score': score_info['system_employment_score']['total_score'],
-                        'non_system_employment_score': score_info['non_system_employment_score']['total_score'],
-                        'weights': school_chooser.weights
-                    }
-                    # target_school['school_detail'] = _convert_school_info_to_dict(school)
-                    # target_school['score_info'] = score_info
-                    
-                
-                school_scores.append(target_school)
-            except Exception as e:
-                # 在182行添加更详细的错误日志
-                logger.error(
-                    f"计算学校 {school.school_name} 评分时出错:\n"
-                    f"错误类型: {type(e).__name__}\n"
-                    f"错误信息: {str(e)}\n"
-                    f"错误位置: {e.__traceback__.tb_frame.f_code.co_filename}:{e.__traceback__.tb_lineno}\n"
-                    f"学校信息: {vars(school)}\n"
-                    f"目标信息: {vars(target_info)}\n"
-                    f"用户信息: {vars(user_info)}\n"
-                    f"当前评分卡状态:\n"
-                    f"- location_calculator: {vars(school_chooser.location_calculator)}\n"
-                    f"- major_calculator: {vars(school_chooser.major_calculator)}\n"
-                    f"- admission_calculator: {vars(school_chooser.admission_calculator)}\n"
-                    f"- system_employment_calculator: {vars(school_chooser.system_employment_calculator)}\n"
-                    f"- non_system_employment_calculator: {vars(school_chooser.non_system_employment_calculator)}\n"
-                    f"- advanced_calculator: {vars(school_chooser.advanced_calculator)}"
-                )
-                logger.exception("完整错误栈:")
-                continue
+        # 按列批量计算所有候选学校的数值得分
+        batch_scores = school_chooser.score_batch(schools)
+        probabilities = batch_scores['probability']
+        card_scores = batch_scores['card_score']
         
-        # 按录取概率等级分组
+        # 按录取概率等级分组，组内按总分排序，只为每组总分最高、评分卡构造成功的前三名构造完整评分卡
+        ranked_indexes = _rank_by_level(probabilities, card_scores)
         probability_groups = {
-            '冲刺': [],  # 25-45%
-            '稳妥': [],  # 45-75%
-            '保底': []   # 75-95%
+            level: _build_top_k(school_chooser, schools, indexes, 3, debug)
+            for level, indexes in ranked_indexes.items()
         }
-        
-        # 将学校分到不同概率组
-        for score in school_scores:
-            probability = float(score['admission_probability'].rstrip('%'))  # 移除百分号并转换为浮点数
-            if PROBABILITY_LEVELS['IMPOSSIBLE'] <= probability < PROBABILITY_LEVELS['DIFFICULT']:
-                probability_groups['冲刺'].append(score)
-            elif PROBABILITY_LEVELS['DIFFICULT'] <= probability < PROBABILITY_LEVELS['MODERATE']:
-                probability_groups['稳妥'].append(score)
-            elif PROBABILITY_LEVELS['MODERATE'] <= probability < PROBABILITY_LEVELS['EASY']:
-                probability_groups['保底'].append(score)
-        
-        # 在每个组内按总分排序并选择前三名
-        for level in probability_groups:
-            probability_groups[level].sort(key=lambda x: float(x['total_score']), reverse=True)
-            probability_groups[level] = probability_groups[level][:3]  # 只保留前三名
-        logger.info(f"最终学校列表: {probability_groups}")
+        trace("最终学校列表: {}", probability_groups)
         return {
             "code": 0,
             "data": probability_groups,
@@ -261,43 +324,64 @@ def analyze_schools(user_info: UserInfo, target_info: TargetInfo, debug: bool =
             "message": str(e)
         }
 
+class TargetContext:
+    """筛选条件相同的请求共享的候选学校和评分计算器
+
+    专业、升学、体制内就业、非体制就业四张评分卡的比较候选集和得分只取决于候选学校，
+    与用户信息、意向工作城市和权重无关；批量择校时同一筛选条件的请求只构建一次。
+    """
+
+    def __init__(self, target_info: TargetInfo):
+        self.row_ids, self.schools = _filter_candidates(target_info)
+        self.target_schools = [(school.school_name, school.major_code) for school in self.schools]
+        
+        # 这四个评分计算器不读取用户信息
+        self.major_calculator = MajorScoreCalculator(None, target_info, self.target_schools)
+        self.advanced_calculator = AdvancedStudyScoreCalculator(None, target_info, self.target_schools)
+        self.system_employment_calculator = SystemEmploymentScoreCalculator(None, target_info, self.target_schools)
+        self.non_system_employment_calculator = NonSystemEmploymentScoreCalculator(None, target_info, self.target_schools)
+        self._card_totals: Optional[Dict[str, np.ndarray]] = None
+
+    def card_totals(self, schools: List[SchoolInfo]) -> Dict[str, np.ndarray]:
+        """四张只依赖候选学校的评分卡总分，对本候选集只计算一次"""
+        if schools is not self.schools:
+            return self._calculate_card_totals(schools)
+        if self._card_totals is None:
+            self._card_totals = self._calculate_card_totals(schools)
+        return self._card_totals
+
+    def _calculate_card_totals(self, schools: List[SchoolInfo]) -> Dict[str, np.ndarray]:
+        return {
+            'major_card': self.major_calculator.calculate_total_scores(schools),
+            'advanced_study_card': self.advanced_calculator.calculate_total_scores(schools),
+            'system_employment_card': self.system_employment_calculator.calculate_total_scores(schools),
+            'non_system_employment_card': self.non_system_employment_calculator.calculate_total_scores(schools)
+        }
+
 class SchoolChooser:
     """学校选择器"""
     
-    def __init__(self, user_info: UserInfo, target_info: TargetInfo, target_schools: List[Tuple[str, str]]):
+    def __init__(self, user_info: UserInfo, target_info: TargetInfo, target_context: TargetContext):
         self.user_info = user_info
         self.target_info = target_info
-        self.target_schools = target_schools
+        self.target_context = target_context
+        self.target_schools = target_context.target_schools
         
-        # 初始化所有评分计算器      
+        # 初始化依赖用户信息的评分计算器，其余评分计算器在同一候选集的请求间共享
         self.location_calculator = LocationScoreCalculator(user_info, target_info)
-        self.major_calculator = MajorScoreCalculator(user_info, target_info, target_schools)
-        self.advanced_calculator = AdvancedStudyScoreCalculator(user_info, target_info, target_schools)
+        self.major_calculator = target_context.major_calculator
+        self.advanced_calculator = target_context.advanced_calculator
         self.admission_calculator = AdmissionScoreCalculator(user_info, target_info)
         # 添加新的评分计算器
-        self.system_employment_calculator = SystemEmploymentScoreCalculator(user_info, target_info, target_schools)
-        self.non_system_employment_calculator = NonSystemEmploymentScoreCalculator(user_info, target_info, target_schools)
+        self.system_employment_calculator = target_context.system_employment_calculator
+        self.non_system_employment_calculator = target_context.non_system_employment_calculator
         
         # 初始化权重
         self.weights = self._init_weights()
         
     def _init_weights(self) -> Dict[str, float]:
         """初始化权重"""
-        weights = {
-            '地理位置': 0.15,
-            '专业实力': 0.15,
-            '升学': 0.2,
-            '体制内就业': 0.3,  # 添加体制内就业权重
-            '非体制就业': 0.2   # 添加非体制就业权重
-        }
-        
-        # 如果有用户自定义权重，则使用用户定义的
-        if self.target_info.weights:
-            for weight in self.target_info.weights:
-                if weight.name in weights:
-                    weights[weight.name] = weight.val
-                    
-        return weights
+        return _resolve_weights(self.target_info)
         
     def _calculate_school_score(self, school: SchoolInfo) -> Dict:
         """计算学校的综合得分"""
@@ -339,6 +423,40 @@ class SchoolChooser:
             'non_system_employment_score': non_system_employment_score
         }
         
+    def score_batch(self, schools: List[SchoolInfo]) -> Dict[str, Any]:
+        """
+        按列批量计算所有候选学校的得分，不构造逐校的评分卡字典
+        :param schools: 候选学校列表
+        :return: 各评分卡总分数组、加权总分、录取概率以及用于组内排序的评分卡总分，顺序与schools一致
+        """
+        # 候选集来自本请求的筛选结果时按行号读取各代缓存的静态维度得分
+        row_ids = self.target_context.row_ids if schools is self.target_context.schools else None
+        admission_total, probabilities = self.admission_calculator.calculate_batch(schools, row_ids)
+        card_totals = {
+            'location_card': self.location_calculator.calculate_total_scores(schools),
+            **self.target_context.card_totals(schools)
+        }
+        
+        # 计算加权总分
+        total_score = (
+            card_totals['location_card'] * self.weights['地理位置'] +
+            card_totals['major_card'] * self.weights['专业实力'] +
+            card_totals['advanced_study_card'] * self.weights['升学'] +
+            card_totals['system_employment_card'] * self.weights['体制内就业'] +
+            card_totals['non_system_employment_card'] * self.weights['非体制就业']
+        )
+        
+        # 与 _convert_to_target_school 中展示的 total_score 一致，保留一位小数
+        card_scores = [round(score, 1) for score in _calculate_card_scores(card_totals, len(schools)).tolist()]
+        
+        return {
+            **card_totals,
+            'admission_total': admission_total,
+            'total_score': total_score,
+            'probability': probabilities,
+            'card_score': card_scores
+        }
+        
     def _group_schools_by_probability(self, schools: List[SchoolInfo]) -> Dict[str, List[Dict]]:
         """将学校按照录取概率分组"""
         grouped_schools = {
@@ -376,8 +494,6 @@ class SchoolChooser:
 def choose_schools_v2():
     """处理学校选择请求的接口函数"""
     try:
-        # 确保学校数据已加载
-        global SCHOOL_DATAS
         request_data = request.get_json()
 
 
@@ -385,10 +501,21 @@ def choose_schools_v2():
         target_info = TargetInfo(**request_data['target_info'])
         debug_mode = request_data.get('debug', False)
         
-        result = analyze_schools(user_info, target_info, debug_mode)
-        logger.info(f"choose_schools_v2 result: {result}")
-        temp = json.dumps(request_data, ensure_ascii=False)
-        logger.info(f"choose_schools_v2 request_data    : {temp}")
+        # debug 请求或被采样到的请求输出评分明细日志
+        trace_token = start_trace(debug_mode)
+        try:
+            # 相同的规范化请求直接返回缓存结果
+            cache_key = _result_cache_key(user_info, target_info, debug_mode)
+            result = result_cache.get(cache_key)
+            if result is None:
+                result = analyze_schools(user_info, target_info, debug_mode)
+                if result.get('code') == 0:
+                    result_cache.put(cache_key, result)
+            trace("choose_schools_v2 result: {}", result)
+            if trace_enabled():
+                trace("choose_schools_v2 request_data    : {}", json.dumps(request_data, ensure_ascii=False))
+        finally:
+            end_trace(trace_token)
         return jsonify(result)
         
     except Exception as e:
@@ -411,81 +538,36 @@ def _calculate_school_score(score_card: Dict, admission_info: Dict) -> float:
     
     return card_total_score
 
+def _calculate_card_scores(card_totals: Dict[str, np.ndarray], size: int) -> np.ndarray:
+    """批量计算学校总评分，与 _calculate_school_score 的累加顺序一致"""
+    card_total_scores = np.zeros(size)
+    for card_name, weight in SCORE_CARD_WEIGHTS.items():
+        scores = card_totals.get(card_name)
+        if scores is None:
+            scores = np.zeros(size)
+        card_total_scores = card_total_scores + scores * weight
+    
+    return card_total_scores
+
 def _convert_to_target_school(school_info: SchoolInfo, score_info: Dict) -> Dict:
     """将学校信息转换为目标格式"""
     score_card = score_info['score_info']['score_card']
     admission_info = score_info['score_info']
     
-    # 获取学校层级
-    levels = []
-    if school_info.is_985 == "1":
-        levels.append("985")
-    if school_info.is_211 == "1":
-        levels.append("211")
-    if school_info.school_name in city_level_map.get('c9', set()):
-        levels.append("C9")
-        
-    # 处理报录比数据
-    blb_score = {}
-    for blb in school_info.blb:
-        try:
-            year = blb.get('year')
-            if year:
-                blb_score[str(year)] = blb.get('blb', '0%')
-        except:
-            continue
-            
-    # 处理分数线数据
-    fsx_score = []
-    for fsx in school_info.fsx:
-        try:
-            year_data = {
-                'year': fsx.get('year'),
-                '总分': 0,
-                '科目1': 0,
-                '科目2': 0,
-                '科目3': 0,
-                '科目4': 0
-            }
-            for subject in fsx.get('data', []):
-                if subject.get('subject') == '总分':
-                    year_data['总分'] = subject.get('score', 0)
-                elif '科一' in subject.get('subject', ''):
-                    year_data['科目1'] = subject.get('score', 0)
-                elif '科二' in subject.get('subject', ''):
-                    year_data['科目2'] = subject.get('score', 0)
-                elif '科三' in subject.get('subject', ''):
-                    year_data['科目3'] = subject.get('score', 0)
-                elif '科四' in subject.get('subject', ''):
-                    year_data['科目4'] = subject.get('score', 0)
-            
-            # 检查是否包含null或NaN
-            has_invalid_score = False
-            for score in year_data.values():
-                if score is None or (isinstance(score, float) and str(score).lower() == 'nan'):
-                    has_invalid_score = True
-                    break
-            
-            # 只有当所有分数都有效时才添加数据
-            if not has_invalid_score:
-                fsx_score.append(year_data)
-        except Exception as e:
-            logger.error(f"处理分数线数据时出错: {str(e)}")
-            continue
-            
-    # 计算nlqrs - 简化后的逻辑
-    nlqrs = 0
-    for direction in school_info.directions:
-        try:
-            zsrs = direction.get('zsrs', '')
-            # 提取数字字符
-            num_str = ''.join(c for c in zsrs if c.isdigit())
-            if num_str:
-                nlqrs += int(num_str)
-        except Exception as e:
-            logger.error(f"处理招生人数时出错: {str(e)}, zsrs={direction.get('zsrs')}")
-            continue
-    
+    # 层级、报录比、分数线、招生人数已在加载时预计算，缺失时才现场计算
+    levels = school_info.levels
+    if levels is None:
+        levels = build_levels(school_info.is_985, school_info.is_211, school_info.school_name, C9_SCHOOLS)
+    blb_score = school_info.blb_score
+    if blb_score is None:
+        blb_score = build_blb_score(school_info.blb)
+    fsx_score = school_info.fsx_score
+    if fsx_score is None:
+        fsx_score = build_fsx_score(school_info.fsx)
+    nlqrs = school_info.nlqrs
+    if nlqrs is None:
+        nlqrs = count_enrollment(school_info.directions)
+
     # 转换评分卡格式
     def convert_score_card(card_data: Dict) -> Dict:
         if not card_data:
@@ -1,28 +1,13 @@
-from typing import Dict, Optional
 from loguru import logger
 from flask import request, jsonify, current_app
-from utils.file_util import SCHOOL_DATAS
-from wxcloudrun.utils.file_util import EMPLOYMENT_DATA
+from wxcloudrun.utils.datasets import register_dataset, get_dataset
+import wxcloudrun.utils.file_util  # 导入时注册 rich_fx_flat_v2、aggregated_employment_data 数据集
+from wxcloudrun.utils.school_detail_index import SchoolDetailIndex
+from wxcloudrun.utils.response_cache import cached_json_response
 from wxcloudrun.beans.input_models import SchoolInfo
 
-def _find_school_major(school_name: str, major_name: str) -> Optional[Dict]:
-    """
-    根据学校名称和专业名称查找对应的学校数据
-    """
-    try:
-        # 遍历所有学校数据
-        for school in SCHOOL_DATAS:
-            if school.get('school_name') == school_name and school.get('major') == major_name:
-                # 获取就业数据
-                employment_info = EMPLOYMENT_DATA.get(school_name, [])
-                # 将就业数据添加到学校信息中
-                school_data = dict(school)  # 创建副本避免修改原始数据
-                school_data['jy'] = employment_info
-                return school_data
-        return None
-    except Exception as e:
-        logger.error(f"查找学校专业时出错: {str(e)}")
-        return None
+register_dataset('school_detail_index', lambda: SchoolDetailIndex(get_dataset('rich_fx_flat_v2'),
+                                                                  get_dataset('aggregated_employment_data')))
 
 def get_school_detail():
     """获取学校详情"""
@@ -31,22 +16,20 @@ def get_school_detail():
         data = request.get_json()
         school_name = data.get('school_name')
         major_name = data.get('major_name')
+        major_code = data.get('major_code')
         
-        if not school_name or not major_name:
+        if not school_name or not (major_name or major_code):
             return jsonify({
                 'code': 400,    
                 'message': '缺少学校名称参数'
             })
         
-        # 获取学校就业数据
-        school_info = _find_school_major(school_name, major_name)
-        # employment_info = EMPLOYMENT_DATA.get(school_name, [])
-        
-        # 返回结果
-        return jsonify({
-            'code': 0,
-            'data': school_info
-        })
+        def build():
+            # 按 (学校, 专业) 或 (学校, 专业代码) 从索引中取详情，直接使用序列化好的响应体
+            detail = get_dataset('school_detail_index').find(school_name, major_name, major_code)
+            return SchoolDetailIndex.NOT_FOUND_BODY if detail is None else detail.body
+
+        return cached_json_response('school_detail', [school_name, major_name, major_code], build)
     except Exception as e:
         logger.error(f"获取学校详情时出错: {str(e)}")
         return jsonify({
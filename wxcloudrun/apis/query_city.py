@@ -5,24 +5,13 @@ from werkzeug.utils import secure_filename
 from flask import request, jsonify
 from typing import List, Dict
 from collections import defaultdict
+from wxcloudrun.utils.datasets import register_dataset, get_dataset
+from wxcloudrun.utils.city_index import CityIndex
+from wxcloudrun.utils.text_index import parse_limit
+from wxcloudrun.utils.response_cache import cached_json_response
+import wxcloudrun.utils.file_util  # 导入时注册 city_2_province 数据集
 
-# 加载城市数据
-cur_dir = os.path.dirname(os.path.abspath(__file__))
-cur_dir = os.path.dirname(cur_dir)
-
-CITY_DATA_PATH = os.path.join(cur_dir, 'resources/city_2_province.txt')
-
-# 读取并解析城市数据
-city_data = {}
-try:
-    with open(CITY_DATA_PATH, 'r', encoding='utf-8') as f:
-        for line in f:
-            city, province = line.strip().split('\t')
-            city_data[city] = province
-
-except Exception as e:
-    print(f"Error loading city data: {e}")
-    city_data = {}
+register_dataset('city_index', lambda: CityIndex(get_dataset('city_2_province')))
 
 def query_city():
     """
@@ -39,17 +28,16 @@ def query_city():
             'message': '搜索关键词不能为空'
         })
         
-    # 模糊匹配实现
-    results = []
-    for city, province in city_data.items():
-        if query.lower() in city.lower() or query.lower() in province.lower():
-            results.append({'province': province, 'city': city})
+    limit = parse_limit(request_data.get('limit'))
 
+    def build():
+        # 通过城市索引匹配: 城市名完全匹配、前缀匹配、子串匹配，再到省份名匹配的省内城市
+        results = get_dataset('city_index').search(query, limit)
+        if not results:
+            return {
+                'code': 404,
+                'message': '未找到匹配的城市'
+            }
+        return results
 
-    if not results:
-        return jsonify({
-            'code': 404,
-            'message': '未找到匹配的城市'
-        })
-    
-    return jsonify(results)
+    return cached_json_response('query_city', [query, limit], build)
@@ -2,40 +2,22 @@ import os
 import sys
 sys.path.append(os.getcwd())
 from werkzeug.utils import secure_filename
-from wxcloudrun.utils.file_util import loads_json
+from wxcloudrun.utils.fx_dataset import get_fx_dataset
+from wxcloudrun.utils.text_index import NgramIndex, parse_limit
+from wxcloudrun.utils.datasets import register_dataset, get_dataset
+from wxcloudrun.utils.response_cache import cached_json_response
+import wxcloudrun.score_card.score_data_loader  # 导入时注册 school_ranks 数据集
 from flask import request, jsonify
 from typing import List, Dict
 
 
-# 加载学校基础数据
-cur_dir = os.path.dirname(os.path.abspath(__file__))
-cur_dir = os.path.dirname(cur_dir)
+def _build_school_name_index() -> NgramIndex:
+    """学校名称搜索索引，匹配位置相同时软科排名靠前的学校优先"""
+    ranks = get_dataset('school_ranks')
+    popularity = {name: 1.0 / rank for name, rank in ranks.items() if rank}
+    return NgramIndex(sorted(get_fx_dataset().schools), popularity)
 
-SCHOOL_DATA_PATH = os.path.join(cur_dir, 'resources/fx_flat.json')
-# 加载专业详细数据
-MAJOR_DATA_PATH = os.path.join(cur_dir, 'resources/fx_flat.json')
-
-schools = loads_json(SCHOOL_DATA_PATH)
-schools = set([school['学校名称'] for school in schools])
-
-# 加载并预处理专业数据
-major_data = loads_json(MAJOR_DATA_PATH)
-school_structure = {}
-
-# 构建学校-学院-专业的层级结构
-for item in major_data:
-    school = item['学校名称']
-    college = item['院系名称']
-    major = item['专业名称']
-    
-    if school not in school_structure:
-        school_structure[school] = {}
-    
-    if college not in school_structure[school]:
-        school_structure[school][college] = []
-        
-    if major not in school_structure[school][college]:
-        school_structure[school][college].append(major)
+register_dataset('school_name_index', _build_school_name_index)
 
 
 def search_schools():
@@ -53,14 +35,14 @@ def search_schools():
             'message': '搜索关键词不能为空'
         })
         
-    # 简单的模糊匹配实现
-    results = []
-    for school in schools:
-        if query.lower() in str(school).lower():
-            results.append(school)
-    results = [{'name': i} for i in results]
-    
-    return jsonify(results)
+    limit = parse_limit(request_data.get('limit'))
+
+    def build():
+        # 通过学校名称索引匹配，支持前缀、子串和拼音首字母，按匹配位置和学校排名排序
+        schools = get_dataset('school_name_index').search(query, limit)
+        return [{'name': i} for i in schools]
+
+    return cached_json_response('school_search', [query, limit], build)
 
 
 def get_school_structure():
@@ -76,22 +58,25 @@ def get_school_structure():
             'code': 400,
             'message': '学校名称不能为空'
         })
-        
-    if school_name not in school_structure:
-        return jsonify({
-            'code': 404,
-            'message': '未找到该学校信息'
-        })
     
-    result = {
-        "school": school_name,
-        "colleges": [
-            {
-                "name": college,
-                "majors": majors
+    def build():
+        # 学校-学院-专业的层级结构来自共享的 fx_flat 数据集
+        school_structure = get_fx_dataset().school_structure
+        if school_name not in school_structure:
+            return {
+                'code': 404,
+                'message': '未找到该学校信息'
             }
-            for college, majors in school_structure[school_name].items()
-        ]
-    }
-    
-    return jsonify(result)
\ No newline at end of file
+
+        return {
+            "school": school_name,
+            "colleges": [
+                {
+                    "name": college,
+                    "majors": majors
+                }
+                for college, majors in school_structure[school_name].items()
+            ]
+        }
+
+    return cached_json_response('school_structure', school_name, build)
\ No newline at end of file
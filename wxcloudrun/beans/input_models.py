@@ -165,6 +165,10 @@ class SchoolInfo(BaseModel):
     directions: List[Any] = Field(default_factory=list, description="研究方向")
     province: str = Field(..., description="省份")
     city: str = Field(..., description="城市")
+    levels: Optional[List[str]] = Field(None, description="学校层级(加载时预计算)")
+    blb_score: Optional[Dict[str, Any]] = Field(None, description="按年份整理的报录比(加载时预计算)")
+    fsx_score: Optional[List[Any]] = Field(None, description="按年份整理的分数线(加载时预计算)")
+    nlqrs: Optional[int] = Field(None, description="招生人数合计(加载时预计算)")
 
     class Config:
         json_schema_extra = {
@@ -16,3 +16,8 @@ def make_succ_response(data):
 def make_err_response(err_msg):
     data = json.dumps({'code': -1, 'errorMsg': err_msg})
     return Response(data, mimetype='application/json')
+
+
+def dump_json(payload) -> bytes:
+    """序列化为与 jsonify 输出一致的 JSON 字节串(键排序、紧凑格式、ASCII 转义、末尾换行)"""
+    return (json.dumps(payload, ensure_ascii=True, sort_keys=True, separators=(',', ':')) + '\n').encode('utf-8')
@@ -1,6 +1,7 @@
 import json
 import os
-from typing import Dict, List, Any
+import threading
+from typing import Dict, List, Any, Tuple, Optional, Callable
 from enum import Enum
 from ..beans.input_models import UserInfo, TargetInfo, SchoolInfo, Area
 from .constants import (
@@ -18,36 +19,49 @@ from .constants import (
 )
 from wxcloudrun.score_card.score_data_loader import (
     get_school_data,
-    get_major_data,
-    SCHOOL_DATA,
-    MAJOR_DATA
+    get_school_rank,
+    get_major_data
 )
+from wxcloudrun.utils.school_fields import count_enrollment
+from wxcloudrun.utils.snapshot import load_dataset
+from wxcloudrun.utils.datasets import register_dataset, get_dataset, current_generation
+from wxcloudrun.utils.tracing import trace
+from wxcloudrun.score_card.score_bins import ScoreBins
 import math
+import numpy as np
 from datetime import datetime, date
 import calendar
 from loguru import logger
 
 # 在模块级别加载专业数据
+def _read_major_details(file_path: str) -> Dict:
+    """解析专业详细信息文件"""
+    major_details = {}
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                major_info = json.loads(line.strip())
+                if '专业名称' in major_info:
+                    major_details[major_info['专业名称']] = major_info
+            except json.JSONDecodeError:
+                continue
+    return major_details
+
+MAJOR_DETAIL_PATH = os.path.join(os.path.dirname(__file__), '..', MAJOR_DETAIL_FILE)
+
+def build_major_details() -> Dict:
+    return load_dataset('major_details', [MAJOR_DETAIL_PATH], lambda: _read_major_details(MAJOR_DETAIL_PATH))
+
 def load_major_details() -> Dict:
     """加载专业详细信息"""
-    major_details = {}
     try:
-        file_path = os.path.join(os.path.dirname(__file__), '..', MAJOR_DETAIL_FILE)
-        with open(file_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                try:
-                    major_info = json.loads(line.strip())
-                    if '专业名称' in major_info:
-                        major_details[major_info['专业名称']] = major_info
-                except json.JSONDecodeError:
-                    continue
-        return major_details
+        return build_major_details()
     except Exception as e:
         print(f"Warning: Failed to load major details: {e}")
         return {}
 
-# 全局变量存储专业数据
-MAJOR_DETAILS = load_major_details()
+# 专业数据在第一次使用时加载
+register_dataset('major_details', build_major_details, loader=load_major_details)
 
 # 学校知名度评分 - 增加区分度
 SCHOOL_REPUTATION_SCORES = {
@@ -62,6 +76,14 @@ SCHOOL_REPUTATION_SCORES = {
     (501, 1000): {'score': 95, 'desc': '普通院校，竞争很低'}
 }
 
+# 区间评分配置预先整理为有序分箱
+COMPETITION_RATIO_BINS = ScoreBins(COMPETITION_RATIO_SCORES)
+ENROLLMENT_SIZE_BINS = ScoreBins(ENROLLMENT_SIZE_SCORES)
+SCHOOL_REPUTATION_BINS = ScoreBins(SCHOOL_REPUTATION_SCORES, closed=True)
+
+# 学校没有软科排名数据时使用的默认排名
+DEFAULT_SCHOOL_RANK = 500
+
 # 专业知名度评分 - 调整为实际存在的学科评估等级
 MAJOR_REPUTATION_SCORES = {
     'A+': {'score': 40, 'desc': '顶尖学科，竞争极其激烈'},
@@ -73,6 +95,68 @@ MAJOR_REPUTATION_SCORES = {
     '未评级': {'score': 95, 'desc': '新兴学科，竞争很低'}
 }
 
+# 只依赖目标学校/专业静态数据的维度得分(学校知名度、专业知名度、竞争强度、录取规模、
+# 基于排名的默认分)按数据集代缓存，各请求复用；数据重新加载后随旧代一起失效
+_STATIC_SCORE_CACHE = 'static_scores'
+
+
+def _memoized(key: Optional[Tuple], compute: Callable[[], Any]) -> Any:
+    """按静态数据键把计算结果缓存在当前代数据中，重新加载数据后重新计算；键无法构造或不可哈希时直接计算"""
+    if key is None:
+        return compute()
+    cache = current_generation().cache(_STATIC_SCORE_CACHE)
+    try:
+        return cache[key]
+    except KeyError:
+        value = cache[key] = compute()
+        return value
+    except TypeError:
+        return compute()
+
+
+def _school_rank_or_default(school_name: str) -> int:
+    rank = get_school_rank(school_name)
+    return DEFAULT_SCHOOL_RANK if rank is None else rank
+
+
+def _school_gap_score(rank_gap):
+    """按排名差距计算学校跨度得分，rank_gap 可以是单个数值或 NumPy 数组"""
+    # 目标学校排名更好（差距为负）时分数随差距降低，最低40分；否则随差距升高，最高95分
+    if isinstance(rank_gap, np.ndarray):
+        return np.where(rank_gap < 0, np.maximum(40, 80 + rank_gap / 10), np.minimum(95, 80 + rank_gap / 20))
+    if rank_gap < 0:
+        return max(40, 80 + rank_gap / 10)
+    return min(95, 80 + rank_gap / 20)
+
+
+class StaticScoreColumns:
+    """只依赖候选行静态数据的维度得分，按 rich_fx_flat_v2 行号存成列
+
+    竞争强度、录取规模、学校知名度、专业知名度的加权得分和目标学校排名各占一列，
+    另记录每行目标专业的编号，专业匹配度按编号查表。某行首次参与评分时填入，
+    之后各请求按候选行号取列做向量运算。
+    """
+
+    DIMENSIONS = ('competition', 'enrollment', 'school_reputation', 'major_reputation')
+
+    def __init__(self, size: int):
+        self.weighted_scores = {name: np.full(size, np.nan) for name in self.DIMENSIONS}
+        self.target_ranks = np.full(size, np.nan)
+        self.major_ids = np.zeros(size, dtype=np.intp)
+        self.filled = np.zeros(size, dtype=bool)
+        self.lock = threading.Lock()
+        self._major_ids: Dict[str, int] = {}
+
+    def major_id(self, major: str) -> int:
+        """目标专业编号，调用方需持有 lock"""
+        return self._major_ids.setdefault(major, len(self._major_ids))
+
+
+def _build_static_score_columns() -> StaticScoreColumns:
+    return StaticScoreColumns(len(get_dataset('rich_fx_flat_v2')))
+
+register_dataset('admission_static_columns', _build_static_score_columns)
+
 class ScoreLevel(Enum):
     """评分等级"""
     IMPOSSIBLE = "不可能"  # <25%
@@ -111,10 +195,28 @@ class AdmissionScoreCalculator:
     def __init__(self, user_info: UserInfo, target_info: TargetInfo):
         self.user_info = user_info
         self.target_info = target_info
+        # 只依赖用户信息的维度得分(备考时间、英语基础、专业排名)，每个请求只计算一次
+        self._user_dimension_scores: Dict[str, DimensionScore] = {}
+        # 专业匹配度只取决于目标专业，按目标专业缓存
+        self._major_match_scores: Dict[str, DimensionScore] = {}
+        self._user_advance_majors: Optional[set] = None
+
+    def _user_dimension(self, name: str, compute: Callable[[], DimensionScore]) -> DimensionScore:
+        """获取只依赖用户信息的维度得分，首次计算后缓存"""
+        score = self._user_dimension_scores.get(name)
+        if score is None:
+            score = self._user_dimension_scores[name] = compute()
+        return score
+
+    def _get_user_advance_majors(self) -> set:
+        """用户本科专业的考研方向集合，每个请求只构建一次"""
+        if self._user_advance_majors is None:
+            self._user_advance_majors = set(self._get_advance_majors(self.user_info.major))
+        return self._user_advance_majors
 
     def _get_advance_majors(self, major_name: str) -> List[str]:
         """获取专业的考研方向"""
-        major_info = MAJOR_DETAILS.get(major_name, {})
+        major_info = get_dataset('major_details').get(major_name, {})
         if not major_info or '考研方向' not in major_info:
             return []
         
@@ -179,6 +281,13 @@ class AdmissionScoreCalculator:
         )
 
     def calculate_major_match_score(self, school_info: SchoolInfo) -> DimensionScore:
+        """计算专业匹配度得分，同一目标专业只计算一次"""
+        score = self._major_match_scores.get(school_info.major)
+        if score is None:
+            score = self._major_match_scores[school_info.major] = self._calculate_major_match_score(school_info)
+        return score
+
+    def _calculate_major_match_score(self, school_info: SchoolInfo) -> DimensionScore:
         """计算专业匹配度得分"""
         try:
             user_major = self.user_info.major
@@ -194,7 +303,7 @@ class AdmissionScoreCalculator:
                 )
             
             # 获取两个专业的考研方向
-            user_advance_majors = set(self._get_advance_majors(user_major))  # 转换为set
+            user_advance_majors = self._get_user_advance_majors()
             target_advance_majors = set(self._get_advance_majors(target_major))  # 转换为set
             
             # 如果两个专业都在对方的考研方向中
@@ -232,6 +341,19 @@ class AdmissionScoreCalculator:
             )
 
     def calculate_competition_score(self, school_info: SchoolInfo) -> DimensionScore:
+        """计算竞争强度得分，只依赖学校和报录比数据，按数据集代缓存"""
+        key = None
+        try:
+            if school_info.blb:
+                latest_blb = school_info.blb[-1]
+                key = ('competition', school_info.school_name, latest_blb.get('bk', 0), latest_blb.get('lq', 1))
+            else:
+                key = ('competition', school_info.school_name)
+        except Exception:
+            pass
+        return _memoized(key, lambda: self._calculate_competition_score(school_info))
+
+    def _calculate_competition_score(self, school_info: SchoolInfo) -> DimensionScore:
         """计算竞争强度得分"""
         try:
             # 获取基于排名的默认分数
@@ -253,19 +375,19 @@ class AdmissionScoreCalculator:
             
             ratio = bk / lq if lq > 0 else 10
             
-            for (min_ratio, max_ratio), score_info in COMPETITION_RATIO_SCORES.items():
-                if min_ratio <= ratio < max_ratio:
-                    description = f"{score_info['desc']}(报录比 {ratio:.1f}:1)"
-                    # 添加排名信息到描述中
-                    if rank_defaults["description_prefix"]:
-                        description = f"{rank_defaults['description_prefix']}{description}"
-                    
-                    return DimensionScore(
-                        "竞争强度",
-                        score_info['score'],
-                        self.WEIGHTS["competition"],
-                        description
-                    )
+            score_info = COMPETITION_RATIO_BINS.lookup(ratio)
+            if score_info is not None:
+                description = f"{score_info['desc']}(报录比 {ratio:.1f}:1)"
+                # 添加排名信息到描述中
+                if rank_defaults["description_prefix"]:
+                    description = f"{rank_defaults['description_prefix']}{description}"
+                
+                return DimensionScore(
+                    "竞争强度",
+                    score_info['score'],
+                    self.WEIGHTS["competition"],
+                    description
+                )
             
             # 如果没有匹配的区间，使用基于排名的默认值
             return DimensionScore(
@@ -293,53 +415,32 @@ class AdmissionScoreCalculator:
             user_school = self.user_info.school
             target_school = school_info.school_name
             
-            logger.info(f"计算学校跨度: 用户学校={user_school}, 目标学校={target_school}")
-            
-            # 获取学校数据
-            user_school_data = get_school_data(user_school)
-            target_school_data = get_school_data(target_school)
-            
-            # 记录获取到的学校数据情况
-            logger.info(f"用户学校数据: {user_school_data}")
-            logger.info(f"目标学校数据: {target_school_data}")
-            
-            # 设置默认排名
-            DEFAULT_RANK = 500
-            
-            # 获取用户学校排名，如果没有则使用默认值
-            user_rank = DEFAULT_RANK
-            if user_school_data and user_school_data.rank is not None:
-                user_rank = user_school_data.rank
-            else:
-                logger.warning(f"用户学校 {user_school} 没有排名数据，使用默认排名 {DEFAULT_RANK}")
+            trace("计算学校跨度: 用户学校={}, 目标学校={}", user_school, target_school)
             
-            # 获取目标学校排名，如果没有则使用默认值
-            target_rank = DEFAULT_RANK
-            if target_school_data and target_school_data.rank is not None:
-                target_rank = target_school_data.rank
-            else:
-                logger.warning(f"目标学校 {target_school} 没有排名数据，使用默认排名 {DEFAULT_RANK}")
+            # 获取用户学校和目标学校排名，如果没有则使用默认值
+            user_rank = self._get_user_school_rank()
+            target_rank = get_school_rank(target_school)
+            if target_rank is None:
+                target_rank = DEFAULT_SCHOOL_RANK
+                trace("目标学校 {} 没有排名数据，使用默认排名 {}", target_school, DEFAULT_SCHOOL_RANK)
             
-            logger.info(f"使用排名计算跨度: 用户学校排名={user_rank}, 目标学校排名={target_rank}")
+            trace("使用排名计算跨度: 用户学校排名={}, 目标学校排名={}", user_rank, target_rank)
             
             # 计算排名差距
             rank_gap = target_rank - user_rank
+            gap_score = _school_gap_score(rank_gap)
             
             # 如果目标学校排名更好（数值更小），则跨度为负，难度更大
             if rank_gap < 0:
-                # 跨度越大（负值越大），分数越低（难度越大）
-                gap_score = max(40, 80 + rank_gap / 10)  # 限制最低分为40
                 description = f"目标学校排名高于本科学校{abs(rank_gap)}位，难度较大"
             else:
-                # 跨度为正（目标学校排名更差），分数越高（难度越小）
-                gap_score = min(95, 80 + rank_gap / 20)  # 限制最高分为95
                 description = f"目标学校排名低于本科学校{rank_gap}位，难度较小"
             
             # 添加排名信息到描述中
             if rank_defaults["description_prefix"]:
                 description = f"{rank_defaults['description_prefix']}{description}"
             
-            logger.info(f"排名跨度计算结果: gap_score={gap_score}, description={description}")
+            trace("排名跨度计算结果: gap_score={}, description={}", gap_score, description)
             
             return DimensionScore(
                 "学校跨度",
@@ -359,6 +460,14 @@ class AdmissionScoreCalculator:
                 f"{rank_defaults['description_prefix']}学校跨度适中"
             )
 
+    def _get_user_school_rank(self) -> int:
+        """用户本科学校排名，没有排名数据时使用默认排名"""
+        user_rank = get_school_rank(self.user_info.school)
+        if user_rank is None:
+            trace("用户学校 {} 没有排名数据，使用默认排名 {}", self.user_info.school, DEFAULT_SCHOOL_RANK)
+            return DEFAULT_SCHOOL_RANK
+        return user_rank
+
     def calculate_ranking_score(self) -> DimensionScore:
         """计算专业排名得分"""
         rank = self.user_info.rank
@@ -379,26 +488,22 @@ class AdmissionScoreCalculator:
         )
 
     def calculate_enrollment_score(self, school_info: SchoolInfo) -> DimensionScore:
+        """计算录取规模得分，只依赖学校和招生人数，按数据集代缓存"""
+        key = None
+        if school_info.nlqrs is not None:
+            key = ('enrollment', school_info.school_name, school_info.nlqrs)
+        return _memoized(key, lambda: self._calculate_enrollment_score(school_info))
+
+    def _calculate_enrollment_score(self, school_info: SchoolInfo) -> DimensionScore:
         """计算录取规模得分"""
         try:
             # 获取基于排名的默认分数
             rank_defaults = self._get_rank_based_default_scores(school_info.school_name)
             
-            total_enrollment = 0
-            # 计算nlqrs
-            nlqrs = 0
-            for direction in school_info.directions:
-                try:
-                    zsrs = direction.get('zsrs', '')
-                    # 提取数字字符
-                    num_str = ''.join(c for c in zsrs if c.isdigit())
-                    if num_str:
-                        nlqrs += int(num_str)
-                except Exception as e:
-                    logger.error(f"处理招生人数时出错: {str(e)}, zsrs={direction.get('zsrs')}")
-                    continue
-            
-            total_enrollment = nlqrs
+            # 招生人数在加载时已预计算
+            total_enrollment = school_info.nlqrs
+            if total_enrollment is None:
+                total_enrollment = count_enrollment(school_info.directions)
             
             # 如果没有招生人数数据，使用基于排名的默认值
             if total_enrollment == 0:
@@ -409,20 +514,20 @@ class AdmissionScoreCalculator:
                     f"{rank_defaults['description_prefix']}录取规模未知"
                 )
             
-            # 遍历所有规模区间
-            for (min_size, max_size), score_info in ENROLLMENT_SIZE_SCORES.items():
-                if min_size <= total_enrollment < max_size:
-                    description = f"{score_info['desc']}({total_enrollment}人)"
-                    # 添加排名信息到描述中
-                    if rank_defaults["description_prefix"]:
-                        description = f"{rank_defaults['description_prefix']}{description}"
-                    
-                    return DimensionScore(
-                        "录取规模",
-                        score_info['score'],
-                        self.WEIGHTS["enrollment"],
-                        description
-                    )
+            # 查找所在的规模区间
+            score_info = ENROLLMENT_SIZE_BINS.lookup(total_enrollment)
+            if score_info is not None:
+                description = f"{score_info['desc']}({total_enrollment}人)"
+                # 添加排名信息到描述中
+                if rank_defaults["description_prefix"]:
+                    description = f"{rank_defaults['description_prefix']}{description}"
+                
+                return DimensionScore(
+                    "录取规模",
+                    score_info['score'],
+                    self.WEIGHTS["enrollment"],
+                    description
+                )
             
             # 如果没有匹配的区间，使用基于排名的默认值
             return DimensionScore(
@@ -442,29 +547,32 @@ class AdmissionScoreCalculator:
             )
             
     def calculate_school_reputation_score(self, school_info: SchoolInfo) -> DimensionScore:
+        """计算学校知名度得分，只依赖学校，按数据集代缓存"""
+        return _memoized(('school_reputation', school_info.school_name),
+                         lambda: self._calculate_school_reputation_score(school_info))
+
+    def _calculate_school_reputation_score(self, school_info: SchoolInfo) -> DimensionScore:
         """计算学校知名度得分"""
         try:
-            school_data = get_school_data(school_info.school_name)
+            rank = get_school_rank(school_info.school_name)
             
-            if not school_data or school_data.rank is None:
+            if rank is None:
                 return DimensionScore(
                     "学校知名度",
                     80,  # 默认中等分数
                     self.WEIGHTS["school_reputation"],
                     "学校知名度数据缺失"
                 )
-                
-            rank = school_data.rank
-            
-            # 遍历所有排名区间
-            for (min_rank, max_rank), score_info in SCHOOL_REPUTATION_SCORES.items():
-                if min_rank <= rank <= max_rank:
-                    return DimensionScore(
-                        "学校知名度",
-                        score_info['score'],
-                        self.WEIGHTS["school_reputation"],
-                        f"{score_info['desc']}(排名第{rank})"
-                    )
+            
+            # 查找所在的排名区间
+            score_info = SCHOOL_REPUTATION_BINS.lookup(rank)
+            if score_info is not None:
+                return DimensionScore(
+                    "学校知名度",
+                    score_info['score'],
+                    self.WEIGHTS["school_reputation"],
+                    f"{score_info['desc']}(排名第{rank})"
+                )
             
             # 如果排名超出定义的区间，使用最低区间的分数
             return DimensionScore(
@@ -483,6 +591,11 @@ class AdmissionScoreCalculator:
             )
             
     def calculate_major_reputation_score(self, school_info: SchoolInfo) -> DimensionScore:
+        """计算专业知名度得分，只依赖学校和专业代码，按数据集代缓存"""
+        return _memoized(('major_reputation', school_info.school_name, school_info.major_code),
+                         lambda: self._calculate_major_reputation_score(school_info))
+
+    def _calculate_major_reputation_score(self, school_info: SchoolInfo) -> DimensionScore:
         """计算专业知名度得分"""
         try:
             major_data = get_major_data(school_info.school_name, school_info.major_code)
@@ -523,14 +636,16 @@ class AdmissionScoreCalculator:
                 "专业知名度数据缺失"
             )
 
-    def calculate_probability(self, total_score: float) -> float:
-        """将总分转换为概率，增加差异性"""
+    def calculate_probability(self, total_score):
+        """将总分转换为概率，增加差异性，total_score 可以是单个数值或 NumPy 数组"""
         # 使用更陡峭的S曲线，增加分数差异对概率的影响
         # 原公式: 1 / (1 + math.exp(-0.02 * (total_score - 60))) * 100
         # 新公式: 1 / (1 + math.exp(-0.05 * (total_score - 65))) * 100
         
         # 增加斜率参数从0.02到0.05，使曲线更陡峭
         # 将中点从60调整到65，使得中等难度的分数对应的概率更低
+        if isinstance(total_score, np.ndarray):
+            return 1 / (1 + np.exp(-0.1 * (total_score - 65))) * 100
         return 1 / (1 + math.exp(-0.1 * (total_score - 65))) * 100
 
     def get_score_level(self, probability: float) -> ScoreLevel:
@@ -544,20 +659,113 @@ class AdmissionScoreCalculator:
         else:
             return ScoreLevel.EASY
 
-    def calculate(self, school_info: SchoolInfo) -> Dict:
-        """计算总评分和录取概率"""
-        # 计算各维度得分
-        dimension_scores = [
-            self.calculate_prep_time_score(),
-            self.calculate_english_score(),
+    def calculate_dimension_scores(self, school_info: SchoolInfo,
+                                   school_gap_score: Optional[DimensionScore] = None) -> List[DimensionScore]:
+        """计算各维度得分，只依赖用户信息的维度在本请求内复用
+
+        Args:
+            school_info: 学校信息
+            school_gap_score: 已批量计算好的学校跨度得分，为空时单独计算
+        """
+        return [
+            self._user_dimension('prep_time', self.calculate_prep_time_score),
+            self._user_dimension('english', self.calculate_english_score),
             self.calculate_major_match_score(school_info),
             self.calculate_competition_score(school_info),
-            self.calculate_school_gap_score(school_info),
-            self.calculate_ranking_score(),
+            school_gap_score or self.calculate_school_gap_score(school_info),
+            self._user_dimension('ranking', self.calculate_ranking_score),
             self.calculate_enrollment_score(school_info),
             self.calculate_school_reputation_score(school_info),  # 新增学校知名度
             self.calculate_major_reputation_score(school_info)    # 新增专业知名度
         ]
+
+    def calculate_batch(self, school_infos: List[SchoolInfo],
+                        row_ids: Optional[List[int]] = None) -> Tuple[np.ndarray, List[Optional[float]]]:
+        """批量计算总分和录取概率，只保留数值结果，不构造返回字典
+        
+        只依赖候选行的维度得分从当代缓存的 StaticScoreColumns 按行号取列，与本请求的用户维度得分
+        按 calculate_dimension_scores 的顺序逐列相加，总分和概率都是向量运算。
+        
+        Args:
+            school_infos: 候选学校列表
+            row_ids: 候选在 rich_fx_flat_v2 中的行号，与 school_infos 顺序一致；为空时只为本次调用计算静态列
+            
+        Returns:
+            (总分数组, 录取概率列表)，概率保留两位小数，与 calculate 的结果一致；
+            计算出错的学校总分为 NaN、概率为 None
+        """
+        if row_ids is None:
+            columns = StaticScoreColumns(len(school_infos))
+            rows = np.arange(len(school_infos))
+        else:
+            columns = get_dataset('admission_static_columns')
+            rows = np.asarray(row_ids, dtype=np.intp)
+        self._fill_static_columns(columns, rows, school_infos)
+        
+        try:
+            prep_time = self._user_dimension('prep_time', self.calculate_prep_time_score).weighted_score
+            english = self._user_dimension('english', self.calculate_english_score).weighted_score
+            ranking = self._user_dimension('ranking', self.calculate_ranking_score).weighted_score
+            major_match = self._major_match_column(columns.major_ids[rows], school_infos)
+            school_gap = _school_gap_score(columns.target_ranks[rows] - self._get_user_school_rank()) * self.WEIGHTS["school_gap"]
+        except Exception as e:
+            logger.error(f"计算录取评分时出错: {str(e)}")
+            return np.full(len(school_infos), np.nan), [None] * len(school_infos)
+        
+        weighted_scores = columns.weighted_scores
+        # 相加顺序与 calculate_dimension_scores 一致，保证与逐校计算的总分逐位相同
+        total_scores = (
+            prep_time + english + major_match + weighted_scores['competition'][rows] + school_gap + ranking +
+            weighted_scores['enrollment'][rows] + weighted_scores['school_reputation'][rows] +
+            weighted_scores['major_reputation'][rows]
+        )
+        probabilities = np.round(self.calculate_probability(total_scores), 2)
+        return total_scores, np.where(np.isnan(probabilities), None, probabilities).tolist()
+
+    def _fill_static_columns(self, columns: StaticScoreColumns, rows: np.ndarray, school_infos: List[SchoolInfo]):
+        """为尚未填入的候选行计算只依赖静态数据的维度得分，计算出错的行保持 NaN，下次评分时重试"""
+        missing = np.flatnonzero(~columns.filled[rows])
+        if not len(missing):
+            return
+        with columns.lock:
+            for position in missing.tolist():
+                row = rows[position]
+                school_info = school_infos[position]
+                if columns.filled[row]:
+                    continue
+                columns.major_ids[row] = columns.major_id(school_info.major)
+                try:
+                    weighted_scores = {
+                        'competition': self.calculate_competition_score(school_info).weighted_score,
+                        'enrollment': self.calculate_enrollment_score(school_info).weighted_score,
+                        'school_reputation': self.calculate_school_reputation_score(school_info).weighted_score,
+                        'major_reputation': self.calculate_major_reputation_score(school_info).weighted_score
+                    }
+                    target_rank = _school_rank_or_default(school_info.school_name)
+                except Exception as e:
+                    logger.error(f"计算学校 {school_info.school_name} 录取评分时出错: {str(e)}")
+                    continue
+                for name, score in weighted_scores.items():
+                    columns.weighted_scores[name][row] = score
+                columns.target_ranks[row] = target_rank
+                columns.filled[row] = True
+
+    def _major_match_column(self, major_ids: np.ndarray, school_infos: List[SchoolInfo]) -> np.ndarray:
+        """专业匹配度加权得分列，每个目标专业只计算一次"""
+        if not len(major_ids):
+            return np.zeros(0)
+        unique_ids, first_positions = np.unique(major_ids, return_index=True)
+        scores = np.zeros(unique_ids[-1] + 1)
+        scores[unique_ids] = [
+            self.calculate_major_match_score(school_infos[position]).weighted_score
+            for position in first_positions.tolist()
+        ]
+        return scores[major_ids]
+
+    def calculate(self, school_info: SchoolInfo) -> Dict:
+        """计算总评分和录取概率"""
+        # 计算各维度得分
+        dimension_scores = self.calculate_dimension_scores(school_info)
         
         # 计算总分
         total_score = sum(score.weighted_score for score in dimension_scores)
@@ -586,6 +794,11 @@ class AdmissionScoreCalculator:
         }
 
     def _get_rank_based_default_scores(self, school_name: str) -> dict:
+        """根据学校排名获取各维度的默认分数，只依赖学校，按数据集代缓存"""
+        return _memoized(('rank_defaults', school_name),
+                         lambda: self._compute_rank_based_default_scores(school_name))
+
+    def _compute_rank_based_default_scores(self, school_name: str) -> dict:
         """
         根据学校排名获取各维度的默认分数
         排名越高的学校，默认分数越低（表示竞争越激烈）
@@ -598,10 +811,9 @@ class AdmissionScoreCalculator:
         """
         try:
             # 获取学校排名数据
-            school_data = get_school_data(school_name)
-            school_rank = 500  # 默认排名
-            if school_data and school_data.rank is not None:
-                school_rank = school_data.rank
+            school_rank = get_school_rank(school_name)
+            if school_rank is None:
+                school_rank = DEFAULT_SCHOOL_RANK
             
             # 根据排名设置默认分数
             if school_rank <= 2:
@@ -6,7 +6,6 @@ from wxcloudrun.score_card.constants import (
     SCHOOL_LEVELS,
     SCORE_LEVELS
 )
-from wxcloudrun.utils.file_util import CITY_LEVEL_MAP
 from wxcloudrun.beans.input_models import UserInfo, TargetInfo, SchoolInfo
 import numpy as np
 from typing import Dict, List, Any, Tuple
@@ -14,11 +13,10 @@ from statistics import median
 from collections import defaultdict
 import scipy.stats as stats
 import json
+from wxcloudrun.score_card.percentile import PercentileColumn, percentile_of, attribute_values, percentile_scores
 from wxcloudrun.score_card.score_data_loader import (
     get_school_data,
-    get_major_data,
-    SCHOOL_DATA,
-    MAJOR_DATA
+    get_major_data
 )
 
 
@@ -86,6 +84,14 @@ class AdvancedStudyScoreCalculator:
 - 出国留学占比数据: {len(self.abroad_study_ratio_data)} 条
 - 美国留学占比数据: {len(self.us_study_ratio_data)} 条
         """)
+        
+        # 每个指标只排序一次，后续分位点计算均为二分查找
+        self.columns = {
+            'further_study_rate': PercentileColumn(v for _, v in self.further_study_rate_data),
+            'further_study_number': PercentileColumn(v for _, v in self.further_study_number_data),
+            'abroad_study_ratio': PercentileColumn(v for _, v in self.abroad_study_ratio_data),
+            'us_study_ratio': PercentileColumn(v for _, v in self.us_study_ratio_data),
+        }
     
     def calculate_percentile(self, value: float, data_list: List[float], reverse: bool = False) -> float:
         """计算分位点
@@ -98,21 +104,7 @@ class AdvancedStudyScoreCalculator:
         Returns:
             分位点(0-100)
         """
-        if not data_list:
-            return 50.0  # 默认中位数
-        
-        # 排序数据
-        sorted_data = sorted(data_list)
-        
-        # 计算分位点
-        if reverse:
-            # 值越小越好
-            percentile = 100 - (sum(1 for x in sorted_data if x <= value) / len(sorted_data) * 100)
-        else:
-            # 值越大越好
-            percentile = sum(1 for x in sorted_data if x <= value) / len(sorted_data) * 100
-        
-        return percentile
+        return percentile_of(value, data_list, reverse)
     
     def calculate_further_study_rate_score(self, school_name: str) -> Dict[str, Any]:
         """计算升学率得分
@@ -133,14 +125,8 @@ class AdvancedStudyScoreCalculator:
                 "value": None
             }
         
-        # 提取所有升学率值
-        rate_values = [r[1] for r in self.further_study_rate_data]
-        
         # 计算分位点
-        percentile = self.calculate_percentile(
-            school_data.further_study_rate, 
-            rate_values
-        )
+        percentile = self.columns['further_study_rate'].percentile(school_data.further_study_rate)
         
         # 映射到0-100分
         score = percentile
@@ -179,14 +165,8 @@ class AdvancedStudyScoreCalculator:
                 "value": None
             }
         
-        # 提取所有升学人数值
-        number_values = [n[1] for n in self.further_study_number_data]
-        
         # 计算分位点
-        percentile = self.calculate_percentile(
-            school_data.further_study_number, 
-            number_values
-        )
+        percentile = self.columns['further_study_number'].percentile(school_data.further_study_number)
         
         # 映射到0-100分
         score = percentile
@@ -225,14 +205,8 @@ class AdvancedStudyScoreCalculator:
                 "value": None
             }
         
-        # 提取所有出国留学占比值
-        abroad_values = [a[1] for a in self.abroad_study_ratio_data]
-        
         # 计算分位点
-        percentile = self.calculate_percentile(
-            school_data.abroad_study_ratio, 
-            abroad_values
-        )
+        percentile = self.columns['abroad_study_ratio'].percentile(school_data.abroad_study_ratio)
         
         # 映射到0-100分
         score = percentile
@@ -271,14 +245,8 @@ class AdvancedStudyScoreCalculator:
                 "value": None
             }
         
-        # 提取所有美国留学占比值
-        us_values = [u[1] for u in self.us_study_ratio_data]
-        
         # 计算分位点
-        percentile = self.calculate_percentile(
-            school_data.us_study_ratio, 
-            us_values
-        )
+        percentile = self.columns['us_study_ratio'].percentile(school_data.us_study_ratio)
         
         # 映射到0-100分
         score = percentile
@@ -367,6 +335,28 @@ class AdvancedStudyScoreCalculator:
             "major_name": major_data.major_name if major_data else None
         }
     
+    def calculate_total_scores(self, school_infos: List[SchoolInfo]) -> np.ndarray:
+        """批量计算升学评分总分，一次调用得到所有候选的总分
+        
+        Args:
+            school_infos: 候选学校列表
+            
+        Returns:
+            与 school_infos 顺序一致的总分数组
+        """
+        school_datas = [get_school_data(school.school_name) for school in school_infos]
+        
+        total_scores = np.zeros(len(school_infos))
+        for metric in ('further_study_rate', 'further_study_number', 'abroad_study_ratio', 'us_study_ratio'):
+            scores = percentile_scores(
+                self.columns[metric],
+                attribute_values(school_datas, metric),
+                ADVANCED_STUDY_SCORE_DEFAULTS[metric]
+            )
+            total_scores = total_scores + scores * ADVANCED_STUDY_SCORE_WEIGHTS[metric]
+        
+        return total_scores
+    
     def calculate_all_scores(self) -> List[Dict[str, Any]]:
         """计算所有目标学校专业的评分
         
@@ -2,6 +2,26 @@ import json
 import os
 from typing import Dict, Any
 from loguru import logger
+from wxcloudrun.utils.snapshot import load_dataset
+from wxcloudrun.utils.datasets import register_dataset
+
+def _read_city_scores(file_path: str) -> Dict[str, Dict[str, Any]]:
+    """解析城市评分数据文件"""
+    city_scores = {}
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            data = json.loads(line)
+            city_scores[data['城市']] = {
+                '原始数据': data['原始数据'],
+                '分位点得分': data['分位点得分'],
+                '总分': data['总分']
+            }
+    return city_scores
+
+CITY_SCORES_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'resources', 'city_scores.json')
+
+def build_city_scores() -> Dict[str, Dict[str, Any]]:
+    return load_dataset('city_scores', [CITY_SCORES_FILE], lambda: _read_city_scores(CITY_SCORES_FILE))
 
 def load_city_scores() -> Dict[str, Dict[str, Any]]:
     """
@@ -9,22 +29,9 @@ def load_city_scores() -> Dict[str, Dict[str, Any]]:
     :return: 城市评分数据字典，格式为 {城市名: 城市数据}
     """
     try:
-        file_path = os.path.join(
-            os.path.dirname(os.path.dirname(__file__)), 
-            'resources', 
-            'city_scores.json'
-        )
-        logger.info(f"开始加载城市评分数据: {file_path}")
+        logger.info(f"开始加载城市评分数据: {CITY_SCORES_FILE}")
         
-        city_scores = {}
-        with open(file_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                data = json.loads(line)
-                city_scores[data['城市']] = {
-                    '原始数据': data['原始数据'],
-                    '分位点得分': data['分位点得分'],
-                    '总分': data['总分']
-                }
+        city_scores = build_city_scores()
         
         logger.info(f"成功加载 {len(city_scores)} 个城市的评分数据")
         return city_scores
@@ -33,5 +40,5 @@ def load_city_scores() -> Dict[str, Dict[str, Any]]:
         logger.exception(e)
         return {}
 
-# 全局变量存储城市数据
-CITY_SCORES = load_city_scores() 
\ No newline at end of file
+# 城市数据在第一次使用时加载，启动时文件缺失或格式有误则为空
+register_dataset('city_scores', build_city_scores, loader=load_city_scores)
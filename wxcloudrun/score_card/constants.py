@@ -1,5 +1,4 @@
 """评分卡相关常量"""
-from wxcloudrun.score_card.city_data_loader import CITY_SCORES
 from datetime import date
 
 # 学校层次
@@ -1,16 +1,22 @@
 import json
 import os
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
+import numpy as np
 from loguru import logger
+from wxcloudrun.utils.tracing import trace
+from wxcloudrun.utils.datasets import get_dataset, current_generation
 from wxcloudrun.beans.input_models import UserInfo, TargetInfo, SchoolInfo, Area
 from wxcloudrun.score_card.constants import (
     LOCATION_SCORE_WEIGHTS, 
     LOCATION_SCORE_DEFAULTS,
-    CITY_SCORES,
     HOMETOWN_MATCH_SCORES,
     WORK_CITY_MATCH_SCORES
 )
-# from wxcloudrun.score_card.city_data_loader import CITY_SCORES  # 修改导入
+import wxcloudrun.score_card.city_data_loader  # 导入时注册 city_scores 数据集
+
+# 生活成本、教育资源、医疗资源只依赖静态的城市数据，按数据集代和城市缓存，各请求复用
+_CITY_RESOURCE_SCORES = 'city_resource_scores'
+
 
 class LocationScoreCalculator:
     """地理位置评分计算器"""
@@ -22,14 +28,14 @@ class LocationScoreCalculator:
     def calculate_living_cost_score(self, city: str) -> Dict:
         """计算生活成本得分"""
         try:
-            city_data = CITY_SCORES.get(city)
+            city_data = get_dataset('city_scores').get(city)
             if city_data:
                 score = city_data['分位点得分']['性价比得分']
                 source = 'real'
             else:
                 score = LOCATION_SCORE_DEFAULTS['生活成本']
                 source = 'default'
-                logger.warning(f"未找到城市 {city} 的生活成本数据，使用默认值")
+                trace("未找到城市 {} 的生活成本数据，使用默认值", city)
             
             return {
                 'score': score,
@@ -45,7 +51,7 @@ class LocationScoreCalculator:
     def calculate_hometown_match_score(self, school_info: SchoolInfo) -> Dict:
         """计算家乡匹配度得分"""
         if not self.user_info.hometown:
-            logger.warning("未填写家乡信息，使用默认分数")
+            trace("未填写家乡信息，使用默认分数")
             return {
                 'score': LOCATION_SCORE_DEFAULTS['家乡匹配度'],
                 'source': 'default'
@@ -83,14 +89,14 @@ class LocationScoreCalculator:
     def calculate_education_resource_score(self, city: str) -> Dict:
         """计算教育资源得分"""
         try:
-            city_data = CITY_SCORES.get(city)
+            city_data = get_dataset('city_scores').get(city)
             if city_data:
                 score = city_data['分位点得分']['本科院校得分']
                 source = 'real'
             else:
                 score = LOCATION_SCORE_DEFAULTS['教育资源']
                 source = 'default'
-                logger.warning(f"未找到城市 {city} 的教育资源数据，使用默认值")
+                trace("未找到城市 {} 的教育资源数据，使用默认值", city)
             
             return {
                 'score': score,
@@ -106,14 +112,14 @@ class LocationScoreCalculator:
     def calculate_medical_resource_score(self, city: str) -> Dict:
         """计算医疗资源得分"""
         try:
-            city_data = CITY_SCORES.get(city)
+            city_data = get_dataset('city_scores').get(city)
             if city_data:
                 score = city_data['分位点得分']['三甲医院得分']
                 source = 'real'
             else:
                 score = LOCATION_SCORE_DEFAULTS['医疗资源']
                 source = 'default'
-                logger.warning(f"未找到城市 {city} 的医疗资源数据，使用默认值")
+                trace("未找到城市 {} 的医疗资源数据，使用默认值", city)
             
             return {
                 'score': score,
@@ -129,7 +135,7 @@ class LocationScoreCalculator:
     def calculate_work_city_match_score(self, school_info: SchoolInfo) -> Dict:
         """计算意向工作城市匹配度得分"""
         if not self.target_info.work_cities:
-            logger.warning("未设置意向工作城市，使用默认分数")
+            trace("未设置意向工作城市，使用默认分数")
             return {
                 'score': LOCATION_SCORE_DEFAULTS['工作城市匹配度'],
                 'source': 'default'
@@ -165,6 +171,18 @@ class LocationScoreCalculator:
                 'source': 'default'
             }
         
+    def get_city_resource_scores(self, city: str) -> Tuple[Dict, Dict, Dict]:
+        """获取城市的生活成本、教育资源、医疗资源得分(按数据集代缓存)"""
+        cache = current_generation().cache(_CITY_RESOURCE_SCORES)
+        scores = cache.get(city)
+        if scores is None:
+            scores = cache[city] = (
+                self.calculate_living_cost_score(city),
+                self.calculate_education_resource_score(city),
+                self.calculate_medical_resource_score(city)
+            )
+        return scores
+
     def calculate_total_score(self, school_info: SchoolInfo) -> Dict[str, Any]:
         """计算地理位置评分
         
@@ -175,13 +193,11 @@ class LocationScoreCalculator:
             评分结果
         """
         # 检查CITY_SCORES是否有数据
-        logger.debug(f"计算 {school_info.school_name} 的地理位置得分")
-        logger.debug(f"城市评分数据: {CITY_SCORES.get(school_info.city)}")
+        trace("计算 {} 的地理位置得分", school_info.school_name)
+        trace("城市评分数据: {}", get_dataset('city_scores').get(school_info.city))
         
         # 计算各维度得分
-        living_cost = self.calculate_living_cost_score(school_info.city)
-        education = self.calculate_education_resource_score(school_info.city)
-        medical = self.calculate_medical_resource_score(school_info.city)
+        living_cost, education, medical = self.get_city_resource_scores(school_info.city)
         hometown = self.calculate_hometown_match_score(school_info)
         work_city = self.calculate_work_city_match_score(school_info)
         
@@ -237,6 +253,33 @@ class LocationScoreCalculator:
             "school_name": school_info.school_name
         }
 
+    def calculate_total_scores(self, school_infos: List[SchoolInfo]) -> np.ndarray:
+        """批量计算地理位置评分总分，城市相关得分取自当前代数据的城市缓存
+        
+        Args:
+            school_infos: 候选学校列表
+            
+        Returns:
+            与 school_infos 顺序一致的总分数组
+        """
+        living_cost, education, medical, hometown, work_city = [], [], [], [], []
+        for school_info in school_infos:
+            city_living_cost, city_education, city_medical = self.get_city_resource_scores(school_info.city)
+            living_cost.append(city_living_cost['score'])
+            education.append(city_education['score'])
+            medical.append(city_medical['score'])
+            hometown.append(self.calculate_hometown_match_score(school_info)['score'])
+            work_city.append(self.calculate_work_city_match_score(school_info)['score'])
+        
+        # 按维度顺序累加，与 calculate_total_score 的求和顺序一致
+        return (
+            np.asarray(living_cost, dtype=float) * LOCATION_SCORE_WEIGHTS["生活成本"] +
+            np.asarray(hometown, dtype=float) * LOCATION_SCORE_WEIGHTS["家乡匹配度"] +
+            np.asarray(education, dtype=float) * LOCATION_SCORE_WEIGHTS["教育资源"] +
+            np.asarray(medical, dtype=float) * LOCATION_SCORE_WEIGHTS["医疗资源"] +
+            np.asarray(work_city, dtype=float) * LOCATION_SCORE_WEIGHTS["工作城市匹配度"]
+        )
+
     def _get_living_cost_description(self, score: float) -> str:
         """获取生活成本描述"""
         if score >= 80:
@@ -11,11 +11,10 @@ from wxcloudrun.score_card.constants import (
     SATISFACTION_SCORE_DEFAULTS,
     LEVEL_SCORES
 )
+from wxcloudrun.score_card.percentile import PercentileColumn, percentile_of, attribute_values, percentile_scores
 from wxcloudrun.score_card.score_data_loader import (
     get_school_data,
-    get_major_data,
-    SCHOOL_DATA,
-    MAJOR_DATA
+    get_major_data
 )
 
 class MajorScoreCalculator:
@@ -81,6 +80,13 @@ class MajorScoreCalculator:
 - 专业综合满意度数据: {len(self.major_satisfaction_data)} 条
 - 专业等级数据: {len(self.major_level_data)} 条
         """)
+        
+        # 每个指标只排序一次，后续分位点计算均为二分查找
+        self.columns = {
+            'school_satisfaction': PercentileColumn(v for _, v in self.school_satisfaction_data),
+            'major_satisfaction': PercentileColumn(v for _, v in self.major_satisfaction_data),
+            'school_rank': PercentileColumn(v for _, v in self.school_rank_data),
+        }
     
     def calculate_percentile(self, value: float, data_list: List[float], reverse: bool = False) -> float:
         """计算分位点
@@ -93,21 +99,7 @@ class MajorScoreCalculator:
         Returns:
             分位点(0-100)
         """
-        if not data_list:
-            return 50.0  # 默认中位数
-        
-        # 排序数据
-        sorted_data = sorted(data_list)
-        
-        # 计算分位点
-        if reverse:
-            # 值越小越好
-            percentile = 100 - (sum(1 for x in sorted_data if x <= value) / len(sorted_data) * 100)
-        else:
-            # 值越大越好
-            percentile = sum(1 for x in sorted_data if x <= value) / len(sorted_data) * 100
-        
-        return percentile
+        return percentile_of(value, data_list, reverse)
     
     def calculate_school_satisfaction_score(self, school_name: str) -> Dict[str, Any]:
         """计算学校综合满意度得分
@@ -128,14 +120,8 @@ class MajorScoreCalculator:
                 "value": None
             }
         
-        # 提取所有满意度值
-        satisfaction_values = [s[1] for s in self.school_satisfaction_data]
-        
         # 计算分位点
-        percentile = self.calculate_percentile(
-            school_data.overall_satisfaction, 
-            satisfaction_values
-        )
+        percentile = self.columns['school_satisfaction'].percentile(school_data.overall_satisfaction)
         
         # 映射到0-100分
         score = percentile
@@ -179,14 +165,8 @@ class MajorScoreCalculator:
                 "value": None
             }
         
-        # 提取所有满意度值
-        satisfaction_values = [m[1] for m in self.major_satisfaction_data]
-        
         # 计算分位点
-        percentile = self.calculate_percentile(
-            major_data.overall_satisfaction, 
-            satisfaction_values
-        )
+        percentile = self.columns['major_satisfaction'].percentile(major_data.overall_satisfaction)
         
         # 映射到0-100分
         score = percentile
@@ -229,15 +209,8 @@ class MajorScoreCalculator:
                 "value": None
             }
         
-        # 提取所有排名值
-        rank_values = [r[1] for r in self.school_rank_data]
-        
         # 计算分位点（排名越小越好，所以使用reverse=True）
-        percentile = self.calculate_percentile(
-            school_data.rank, 
-            rank_values,
-            reverse=True
-        )
+        percentile = self.columns['school_rank'].percentile(school_data.rank, reverse=True)
         
         # 映射到0-100分
         score = percentile
@@ -371,6 +344,47 @@ class MajorScoreCalculator:
             "major_name": major_data.major_name if major_data else None
         }
     
+    def calculate_total_scores(self, school_infos: List[SchoolInfo]) -> np.ndarray:
+        """批量计算专业评分总分，一次调用得到所有候选的总分
+        
+        Args:
+            school_infos: 候选学校列表
+            
+        Returns:
+            与 school_infos 顺序一致的总分数组
+        """
+        school_datas = [get_school_data(school.school_name) for school in school_infos]
+        major_datas = [get_major_data(school.school_name, school.major_code) for school in school_infos]
+        
+        school_satisfaction = percentile_scores(
+            self.columns['school_satisfaction'],
+            attribute_values(school_datas, 'overall_satisfaction'),
+            SATISFACTION_SCORE_DEFAULTS["school_satisfaction"]
+        )
+        major_satisfaction = percentile_scores(
+            self.columns['major_satisfaction'],
+            attribute_values(major_datas, 'overall_satisfaction'),
+            SATISFACTION_SCORE_DEFAULTS["major_satisfaction"]
+        )
+        school_reputation = percentile_scores(
+            self.columns['school_rank'],
+            attribute_values(school_datas, 'rank'),
+            SATISFACTION_SCORE_DEFAULTS["school_reputation"],
+            reverse=True
+        )
+        major_ranking = np.array([
+            LEVEL_SCORES.get(major_data.level, SATISFACTION_SCORE_DEFAULTS["major_ranking"])
+            if major_data and major_data.level is not None else SATISFACTION_SCORE_DEFAULTS["major_ranking"]
+            for major_data in major_datas
+        ], dtype=float)
+        
+        return (
+            school_satisfaction * SATISFACTION_SCORE_WEIGHTS["school_satisfaction"] +
+            major_satisfaction * SATISFACTION_SCORE_WEIGHTS["major_satisfaction"] +
+            school_reputation * SATISFACTION_SCORE_WEIGHTS["school_reputation"] +
+            major_ranking * SATISFACTION_SCORE_WEIGHTS["major_ranking"]
+        )
+    
     def calculate_all_scores(self) -> List[Dict[str, Any]]:
         """计算所有目标学校专业的评分
         
@@ -6,17 +6,15 @@ import numpy as np
 from scipy import stats
 from collections import defaultdict
 from wxcloudrun.beans.input_models import UserInfo, TargetInfo, SchoolInfo
-from wxcloudrun.utils.file_util import CITY_LEVEL_MAP
 from wxcloudrun.score_card.constants import (
     NON_SYSTEM_EMPLOYMENT_SCORE_WEIGHTS,
     NON_SYSTEM_EMPLOYMENT_SCORE_DEFAULTS,
     NON_SYSTEM_EMPLOYMENT_LEVELS
 )
+from wxcloudrun.score_card.percentile import PercentileColumn, percentile_of, attribute_values, percentile_scores
 from wxcloudrun.score_card.score_data_loader import (
     get_school_data,
-    get_major_data,
-    SCHOOL_DATA,
-    MAJOR_DATA
+    get_major_data
 )
 
 # 修改默认值定义
@@ -92,6 +90,13 @@ class NonSystemEmploymentScoreCalculator:
 - 学校环境满意度数据: {len(self.school_satisfaction_data)} 条
 - 专业就业满意度数据: {len(self.major_satisfaction_data)} 条
         """)
+        
+        # 每个指标只排序一次，后续分位点计算均为二分查找
+        self.columns = {
+            'employment_rate': PercentileColumn(v for _, v in self.school_employment_data),
+            'school_satisfaction': PercentileColumn(v for _, v in self.school_satisfaction_data),
+            'major_satisfaction': PercentileColumn(v for _, v in self.major_satisfaction_data),
+        }
     
     def calculate_percentile(self, value: float, data_list: List[float], reverse: bool = False) -> float:
         """计算分位点
@@ -104,21 +109,7 @@ class NonSystemEmploymentScoreCalculator:
         Returns:
             分位点(0-100)
         """
-        if not data_list:
-            return 50.0  # 默认中位数
-        
-        # 排序数据
-        sorted_data = sorted(data_list)
-        
-        # 计算分位点
-        if reverse:
-            # 值越小越好
-            percentile = 100 - (sum(1 for x in sorted_data if x <= value) / len(sorted_data) * 100)
-        else:
-            # 值越大越好
-            percentile = sum(1 for x in sorted_data if x <= value) / len(sorted_data) * 100
-        
-        return percentile
+        return percentile_of(value, data_list, reverse)
     
     def calculate_employment_rate_score(self, school_name: str) -> Dict[str, Any]:
         """计算就业率得分
@@ -139,14 +130,8 @@ class NonSystemEmploymentScoreCalculator:
                 "value": None
             }
         
-        # 提取所有就业率值
-        employment_values = [e[1] for e in self.school_employment_data]
-        
         # 计算分位点
-        percentile = self.calculate_percentile(
-            school_data.employment_ratio, 
-            employment_values
-        )
+        percentile = self.columns['employment_rate'].percentile(school_data.employment_ratio)
         
         # 映射到0-100分
         score = percentile
@@ -185,14 +170,8 @@ class NonSystemEmploymentScoreCalculator:
                 "value": None
             }
         
-        # 提取所有满意度值
-        satisfaction_values = [s[1] for s in self.school_satisfaction_data]
-        
         # 计算分位点
-        percentile = self.calculate_percentile(
-            school_data.environment_satisfaction, 
-            satisfaction_values
-        )
+        percentile = self.columns['school_satisfaction'].percentile(school_data.environment_satisfaction)
         
         # 映射到0-100分
         score = percentile
@@ -232,14 +211,8 @@ class NonSystemEmploymentScoreCalculator:
                 "value": None
             }
         
-        # 提取所有满意度值
-        satisfaction_values = [m[1] for m in self.major_satisfaction_data]
-        
         # 计算分位点
-        percentile = self.calculate_percentile(
-            major_data.employment_satisfaction, 
-            satisfaction_values
-        )
+        percentile = self.columns['major_satisfaction'].percentile(major_data.employment_satisfaction)
         
         # 映射到0-100分
         score = percentile
@@ -318,6 +291,34 @@ class NonSystemEmploymentScoreCalculator:
             "major_name": major_data.major_name if major_data else None
         }
     
+    def calculate_total_scores(self, school_infos: List[SchoolInfo]) -> np.ndarray:
+        """批量计算非体制就业评分总分，一次调用得到所有候选的总分
+        
+        Args:
+            school_infos: 候选学校列表
+            
+        Returns:
+            与 school_infos 顺序一致的总分数组
+        """
+        school_datas = [get_school_data(school.school_name) for school in school_infos]
+        major_datas = [get_major_data(school.school_name, school.major_code) for school in school_infos]
+        
+        employment_rate = percentile_scores(
+            self.columns['employment_rate'],
+            attribute_values(school_datas, 'employment_ratio'),
+            NON_SYSTEM_EMPLOYMENT_SCORE_DEFAULTS["employment_rate"]
+        )
+        major_satisfaction = percentile_scores(
+            self.columns['major_satisfaction'],
+            attribute_values(major_datas, 'employment_satisfaction'),
+            NON_SYSTEM_EMPLOYMENT_SCORE_DEFAULTS["major_satisfaction"]
+        )
+        
+        return (
+            employment_rate * NON_SYSTEM_EMPLOYMENT_SCORE_WEIGHTS["employment_rate"] +
+            major_satisfaction * NON_SYSTEM_EMPLOYMENT_SCORE_WEIGHTS["major_satisfaction"]
+        )
+    
     def calculate_all_scores(self) -> List[Dict[str, Any]]:
         """计算所有目标学校专业的评分
         
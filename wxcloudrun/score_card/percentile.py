@@ -0,0 +1,81 @@
+"""评分卡共用的分位点计算"""
+from typing import Iterable, Sequence
+import numpy as np
+
+# 比较候选集为空时的默认分位点
+DEFAULT_PERCENTILE = 50.0
+
+
+class PercentileColumn:
+    """单个指标的比较列
+
+    每个请求只在初始化时排序一次，之后每个候选值通过二分查找
+    (np.searchsorted) 得到不大于它的数据个数，结果与逐个计数 x <= value 一致。
+    """
+
+    def __init__(self, values: Iterable[float]):
+        self.sorted_values = np.sort(np.asarray(list(values), dtype=float))
+        self.size = len(self.sorted_values)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def percentile(self, value: float, reverse: bool = False) -> float:
+        """计算单个值的分位点
+
+        Args:
+            value: 目标值
+            reverse: 是否反向计算（值越小越好）
+
+        Returns:
+            分位点(0-100)
+        """
+        if not self.size:
+            return DEFAULT_PERCENTILE
+
+        count = int(np.searchsorted(self.sorted_values, value, side='right'))
+        percentile = count / self.size * 100
+        return 100 - percentile if reverse else percentile
+
+    def percentiles(self, values: Sequence[float], reverse: bool = False) -> np.ndarray:
+        """批量计算分位点，一次调用得到所有候选值的分位点
+
+        Args:
+            values: 目标值数组，缺失值用 NaN 表示
+            reverse: 是否反向计算（值越小越好）
+
+        Returns:
+            分位点数组(0-100)，缺失值对应位置为 NaN
+        """
+        values = np.asarray(values, dtype=float)
+        if not self.size:
+            result = np.full(values.shape, DEFAULT_PERCENTILE)
+        else:
+            counts = np.searchsorted(self.sorted_values, values, side='right')
+            result = counts / self.size * 100
+            if reverse:
+                result = 100 - result
+        result[np.isnan(values)] = np.nan
+        return result
+
+
+def percentile_of(value: float, data_list: Iterable[float], reverse: bool = False) -> float:
+    """对一次性的数据列表计算分位点，需要重复计算时应复用 PercentileColumn"""
+    return PercentileColumn(data_list).percentile(value, reverse)
+
+
+def attribute_values(records: Sequence, attr: str) -> np.ndarray:
+    """从数据对象列表中取出指标列，对象或字段缺失时为 NaN"""
+    values = []
+    for record in records:
+        value = getattr(record, attr) if record is not None else None
+        values.append(np.nan if value is None else value)
+    return np.asarray(values, dtype=float)
+
+
+def percentile_scores(column: PercentileColumn, values: np.ndarray, default: float,
+                      reverse: bool = False) -> np.ndarray:
+    """批量计算分位点得分，缺失值使用默认分"""
+    scores = column.percentiles(values, reverse)
+    scores[np.isnan(scores)] = default
+    return scores
@@ -2,6 +2,17 @@ import json
 import os
 from typing import Dict, Any
 from loguru import logger
+from wxcloudrun.utils.snapshot import load_dataset
+
+def _read_school_data(file_path: str) -> Dict[str, Dict[str, Any]]:
+    """解析学校专业数据文件"""
+    school_data = {}
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            data = json.loads(line)
+            key = f"{data['school_name']}-{data['major_name']}"
+            school_data[key] = data
+    return school_data
 
 def load_school_data() -> Dict[str, Dict[str, Any]]:
     """
@@ -16,12 +27,8 @@ def load_school_data() -> Dict[str, Dict[str, Any]]:
         )
         logger.info(f"开始加载学校专业数据: {file_path}")
         
-        school_data = {}
-        with open(file_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                data = json.loads(line)
-                key = f"{data['school_name']}-{data['major_name']}"
-                school_data[key] = data
+        school_data = load_dataset('merged_school_data_by_major', [file_path],
+                                   lambda: _read_school_data(file_path))
         
         logger.info(f"成功加载 {len(school_data)} 条学校专业数据")
         return school_data
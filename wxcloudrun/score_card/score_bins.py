@@ -0,0 +1,43 @@
+from bisect import bisect_right
+from typing import Any, Dict, Optional, Tuple
+import numpy as np
+
+
+class ScoreBins:
+    """区间评分表
+
+    把 {(下限, 上限): 分数信息} 形式的区间配置按下限排序成分箱，单个值用二分查找，
+    一组值用 np.digitize 批量查找，代替逐个区间的线性比较。区间之间不能重叠，
+    允许存在空隙，落在空隙或所有区间之外的值查不到结果。
+    """
+
+    def __init__(self, ranges: Dict[Tuple[float, float], Any], closed: bool = False):
+        """
+        :param ranges: 区间配置
+        :param closed: False 时区间为 [下限, 上限)，True 时为 [下限, 上限]
+        """
+        items = sorted(ranges.items(), key=lambda item: item[0][0])
+        self.closed = closed
+        self.values = [value for _, value in items]
+        self._lows = [low for (low, _), _ in items]
+        self._highs = [high for (_, high), _ in items]
+        self.lows = np.array(self._lows, dtype=float)
+        self.highs = np.array(self._highs, dtype=float)
+
+    def lookup(self, value: float) -> Optional[Any]:
+        """查找单个值所在区间的分数信息，不在任何区间内时返回 None"""
+        index = bisect_right(self._lows, value) - 1
+        if index < 0:
+            return None
+        high = self._highs[index]
+        if value < high or (self.closed and value == high):
+            return self.values[index]
+        return None
+
+    def indexes(self, values: np.ndarray) -> np.ndarray:
+        """批量查找区间下标，不在任何区间内的值为 -1"""
+        values = np.asarray(values, dtype=float)
+        index = np.digitize(values, self.lows) - 1
+        highs = self.highs[np.maximum(index, 0)]
+        inside = values <= highs if self.closed else values < highs
+        return np.where((index >= 0) & inside, index, -1)
@@ -4,6 +4,8 @@ from typing import Dict, List, Tuple, Optional, Any
 from loguru import logger
 from wxcloudrun.beans.input_models import MergeSchoolData, MergeMajorData
 from collections import defaultdict
+from wxcloudrun.utils.snapshot import load_dataset
+from wxcloudrun.utils.datasets import register_dataset, get_dataset
 
 # 数据模型类
 class MergeSchoolData:
@@ -30,74 +32,99 @@ class MergeMajorData:
         self.overall_satisfaction = data.get('overall_satisfaction')
         self.employment_satisfaction = data.get('employment_satisfaction')
 
-# 全局变量存储数据
-SCHOOL_DATA: Dict[str, MergeSchoolData] = {}  # key: school_name
-MAJOR_DATA: Dict[Tuple[str, str], MergeMajorData] = {}  # key: (school_name, major_code)
+# 数据集按需加载，以下模块属性在第一次访问时读取当前一代的数据集(见 __getattr__)
+_DATASET_ATTRS = {
+    'SCHOOL_DATA': 'merged_school_data',  # Dict[str, MergeSchoolData], key: school_name
+    'MAJOR_DATA': 'merged_major_metrics',  # Dict[Tuple[str, str], MergeMajorData], key: (school_name, major_code)
+    'SCHOOL_RANKS': 'school_ranks',  # 学校软科排名 Dict[str, int]，只包含有排名的学校
+}
 
 # 资源文件路径
 RESOURCES_DIR = 'wxcloudrun/resources'
 SCHOOL_DATA_FILE = os.path.join(RESOURCES_DIR, 'merged_school_data.jsonl')
 MAJOR_DATA_FILE = os.path.join(RESOURCES_DIR, 'merged_major_metrics.jsonl')
 
-def load_data():
-    """加载所有需要的数据"""
-    global SCHOOL_DATA, MAJOR_DATA
-    
-    # 检查资源目录是否存在
-    if not os.path.exists(RESOURCES_DIR):
-        logger.warning(f"资源目录不存在: {RESOURCES_DIR}，尝试创建")
-        try:
-            os.makedirs(RESOURCES_DIR, exist_ok=True)
-        except Exception as e:
-            logger.error(f"创建资源目录失败: {str(e)}")
-    
-    # 加载学校数据
+def _read_school_data() -> Dict[str, MergeSchoolData]:
+    """解析学校数据文件"""
+    school_data = {}
+    with open(SCHOOL_DATA_FILE, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            data = json.loads(line)
+            school_name = data.get('school_name')
+            if school_name:
+                school_data[school_name] = MergeSchoolData(data)
+    return school_data
+
+def _read_major_data() -> Dict[Tuple[str, str], MergeMajorData]:
+    """解析专业数据文件"""
+    major_data = {}
+    with open(MAJOR_DATA_FILE, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            data = json.loads(line)
+            school_name = data.get('school_name')
+            major_code = data.get('major_code')
+            if school_name and major_code:
+                major_data[(school_name, major_code)] = MergeMajorData(data)
+    return major_data
+
+def build_school_data() -> Dict[str, MergeSchoolData]:
+    return load_dataset('merged_school_data', [SCHOOL_DATA_FILE], _read_school_data)
+
+def build_major_data() -> Dict[Tuple[str, str], MergeMajorData]:
+    return load_dataset('merged_major_metrics', [MAJOR_DATA_FILE], _read_major_data)
+
+def _reload_school_data() -> Dict[str, MergeSchoolData]:
+    """重新加载时的学校数据，数据文件不存在时与启动时一样为空"""
+    if not os.path.exists(SCHOOL_DATA_FILE):
+        return {}
+    return build_school_data()
+
+def _reload_major_data() -> Dict[Tuple[str, str], MergeMajorData]:
+    """重新加载时的专业数据，数据文件不存在时与启动时一样使用测试数据"""
+    if not os.path.exists(MAJOR_DATA_FILE):
+        return _build_test_major_data(get_dataset('merged_school_data'))
+    return build_major_data()
+
+def build_school_ranks(school_data: Dict[str, MergeSchoolData]) -> Dict[str, int]:
+    """学校名称到软科排名的映射，只包含有排名的学校"""
+    return {name: data.rank for name, data in school_data.items() if data.rank is not None}
+
+def load_school_data() -> Dict[str, MergeSchoolData]:
+    """启动时加载学校数据，文件缺失或加载出错时为空"""
     try:
         if not os.path.exists(SCHOOL_DATA_FILE):
             logger.warning(f"学校数据文件不存在: {SCHOOL_DATA_FILE}")
-            # 创建一个空的学校数据文件
-            with open(SCHOOL_DATA_FILE, 'w', encoding='utf-8') as f:
-                pass
-        else:
-            with open(SCHOOL_DATA_FILE, 'r', encoding='utf-8') as f:
-                for line in f:
-                    if not line.strip():
-                        continue
-                    data = json.loads(line)
-                    school_name = data.get('school_name')
-                    if school_name:
-                        SCHOOL_DATA[school_name] = MergeSchoolData(data)
+            return {}
+        school_data = build_school_data()
+        logger.info(f"加载了 {len(school_data)} 所学校的数据")
+        return school_data
     except Exception as e:
         logger.error(f"加载学校数据失败: {str(e)}")
-    
-    # 加载专业数据
+        return {}
+
+def load_major_data() -> Dict[Tuple[str, str], MergeMajorData]:
+    """启动时加载专业数据，文件缺失或加载出错时使用测试数据"""
     try:
-        if not os.path.exists(MAJOR_DATA_FILE):
-            logger.warning(f"专业数据文件不存在: {MAJOR_DATA_FILE}，将使用测试数据")
-            # 添加一些测试数据
-            _add_test_major_data()
-        else:
-            with open(MAJOR_DATA_FILE, 'r', encoding='utf-8') as f:
-                for line in f:
-                    if not line.strip():
-                        continue
-                    data = json.loads(line)
-                    school_name = data.get('school_name')
-                    major_code = data.get('major_code')
-                    if school_name and major_code:
-                        MAJOR_DATA[(school_name, major_code)] = MergeMajorData(data)
+        if os.path.exists(MAJOR_DATA_FILE):
+            major_data = build_major_data()
+            logger.info(f"加载了 {len(major_data)} 个专业的数据")
+            return major_data
+        logger.warning(f"专业数据文件不存在: {MAJOR_DATA_FILE}，将使用测试数据")
     except Exception as e:
         logger.error(f"加载专业数据失败: {str(e)}")
-        # 添加一些测试数据
-        _add_test_major_data()
-    
-    logger.info(f"数据加载完成: {len(SCHOOL_DATA)}所学校, {len(MAJOR_DATA)}个专业")
+    test_data = _build_test_major_data(get_dataset('merged_school_data'))
+    logger.info(f"添加了 {len(test_data)} 条测试专业数据")
+    return test_data
 
-def _add_test_major_data():
-    """添加测试专业数据"""
+def _build_test_major_data(school_data: Dict[str, MergeSchoolData]) -> Dict[Tuple[str, str], MergeMajorData]:
+    """生成测试专业数据"""
+    major_data = {}
     # 为前100所学校添加测试专业数据
-    count = 0
-    for school_name in list(SCHOOL_DATA.keys())[:100]:
+    for school_name in list(school_data.keys())[:100]:
         # 为每所学校添加3个测试专业
         for i, major_code in enumerate(['0101', '0201', '0301']):
             major_name = f"测试专业{i+1}"
@@ -109,69 +136,56 @@ def _add_test_major_data():
                 'overall_satisfaction': 85 - i * 10,
                 'employment_satisfaction': 80 - i * 10
             }
-            MAJOR_DATA[(school_name, major_code)] = MergeMajorData(data)
-            count += 1
-    
-    logger.info(f"添加了 {count} 条测试专业数据")
+            major_data[(school_name, major_code)] = MergeMajorData(data)
+    return major_data
 
 def get_school_data(school_name: str) -> Optional[MergeSchoolData]:
     """获取学校数据"""
-    # 如果数据尚未加载，先加载数据
-    if not SCHOOL_DATA:
-        logger.info("学校数据尚未加载，正在加载...")
-        load_data()
-    return SCHOOL_DATA.get(school_name)
+    return get_dataset('merged_school_data').get(school_name)
+
+def get_school_rank(school_name: str) -> Optional[int]:
+    """获取学校软科排名，没有排名数据时返回 None"""
+    return get_dataset('school_ranks').get(school_name)
 
 def get_major_data(school_name: str, major_code: str) -> Optional[MergeMajorData]:
     """获取专业数据"""
-    # 如果数据尚未加载，先加载数据
-    if not MAJOR_DATA:
-        logger.info("专业数据尚未加载，正在加载...")
-        load_data()
-    return MAJOR_DATA.get((school_name, major_code))
+    return get_dataset('merged_major_metrics').get((school_name, major_code))
 
 def get_all_school_names() -> List[str]:
     """获取所有学校名称"""
-    return list(SCHOOL_DATA.keys())
+    return list(get_dataset('merged_school_data').keys())
 
 def get_school_majors(school_name: str) -> List[Tuple[str, str]]:
     """获取指定学校的所有专业代码和名称"""
     majors = []
-    for (s_name, major_code), major_data in MAJOR_DATA.items():
+    for (s_name, major_code), major_data in get_dataset('merged_major_metrics').items():
         if s_name == school_name:
             majors.append((major_code, major_data.major_name))
     return majors
 
 def get_major_by_name(school_name: str, major_name: str) -> Optional[MergeMajorData]:
     """通过学校名称和专业名称获取专业数据"""
-    for (s_name, _), major_data in MAJOR_DATA.items():
+    for (s_name, _), major_data in get_dataset('merged_major_metrics').items():
         if s_name == school_name and major_data.major_name == major_name:
             return major_data
     return None
 
-def init_data():
-    """初始化所有数据"""
-    try:
-        load_data()
-        logger.info("成功初始化所有评分卡数据")
-    except Exception as e:
-        logger.error(f"初始化评分卡数据时出错: {str(e)}")
-        # 不抛出异常，让程序继续运行
-
 def validate_data():
     """验证数据完整性"""
     try:
         # 检查学校数据
-        school_count = len(SCHOOL_DATA)
-        schools_with_satisfaction = sum(1 for s in SCHOOL_DATA.values() 
+        school_data = get_dataset('merged_school_data')
+        major_data = get_dataset('merged_major_metrics')
+        school_count = len(school_data)
+        schools_with_satisfaction = sum(1 for s in school_data.values() 
                                      if s.overall_satisfaction is not None)
-        schools_with_employment = sum(1 for s in SCHOOL_DATA.values() 
+        schools_with_employment = sum(1 for s in school_data.values() 
                                    if s.employment_ratio is not None)
         
         # 检查专业数据
-        unique_schools = len({school for school, _ in MAJOR_DATA.keys()})
-        major_count = len(MAJOR_DATA)
-        majors_with_satisfaction = sum(1 for m in MAJOR_DATA.values() 
+        unique_schools = len({school for school, _ in major_data.keys()})
+        major_count = len(major_data)
+        majors_with_satisfaction = sum(1 for m in major_data.values() 
                                     if m.overall_satisfaction is not None)
         
         logger.info(f"""
@@ -186,10 +200,12 @@ def validate_data():
     except Exception as e:
         logger.error(f"验证数据时出错: {str(e)}")
 
-# 初始化数据
-init_data()
-# 验证数据完整性
-validate_data()
+def __getattr__(name):
+    if name in _DATASET_ATTRS:
+        return get_dataset(_DATASET_ATTRS[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# 模块导入时自动加载数据
-load_data() 
\ No newline at end of file
+# 注册为按需加载、可热更新的数据集，运行期间通过 get_dataset 读取当前请求对应的一代
+register_dataset('merged_school_data', _reload_school_data, loader=load_school_data)
+register_dataset('school_ranks', lambda: build_school_ranks(get_dataset('merged_school_data')))
+register_dataset('merged_major_metrics', _reload_major_data, loader=load_major_data)
@@ -10,11 +10,10 @@ from wxcloudrun.score_card.constants import (
     SYSTEM_EMPLOYMENT_SCORE_DEFAULTS,
     SYSTEM_EMPLOYMENT_LEVELS
 )
+from wxcloudrun.score_card.percentile import PercentileColumn, percentile_of, attribute_values, percentile_scores
 from wxcloudrun.score_card.score_data_loader import (
     get_school_data,
-    get_major_data,
-    SCHOOL_DATA,
-    MAJOR_DATA
+    get_major_data
 )
 
 # 全局变量存储数据
@@ -112,6 +111,13 @@ class SystemEmploymentScoreCalculator:
 - 事业单位占比数据: {len(self.institution_data)} 条
 - 国企占比数据: {len(self.state_owned_data)} 条
         """)
+        
+        # 每个指标只排序一次，后续分位点计算均为二分查找
+        self.columns = {
+            'civil_servant': PercentileColumn(v for _, v in self.civil_servant_data),
+            'institution': PercentileColumn(v for _, v in self.institution_data),
+            'state_owned': PercentileColumn(v for _, v in self.state_owned_data),
+        }
     
     def calculate_percentile(self, value: float, data_list: List[float], reverse: bool = False) -> float:
         """计算分位点
@@ -124,21 +130,7 @@ class SystemEmploymentScoreCalculator:
         Returns:
             分位点(0-100)
         """
-        if not data_list:
-            return 50.0  # 默认中位数
-        
-        # 排序数据
-        sorted_data = sorted(data_list)
-        
-        # 计算分位点
-        if reverse:
-            # 值越小越好
-            percentile = 100 - (sum(1 for x in sorted_data if x <= value) / len(sorted_data) * 100)
-        else:
-            # 值越大越好
-            percentile = sum(1 for x in sorted_data if x <= value) / len(sorted_data) * 100
-        
-        return percentile
+        return percentile_of(value, data_list, reverse)
     
     def calculate_civil_servant_score(self, school_name: str) -> Dict[str, Any]:
         """计算公务员占比得分
@@ -159,14 +151,8 @@ class SystemEmploymentScoreCalculator:
                 "value": None
             }
         
-        # 提取所有公务员占比值
-        civil_servant_values = [c[1] for c in self.civil_servant_data]
-        
         # 计算分位点
-        percentile = self.calculate_percentile(
-            school_data.civil_servant_ratio, 
-            civil_servant_values
-        )
+        percentile = self.columns['civil_servant'].percentile(school_data.civil_servant_ratio)
         
         # 映射到0-100分
         score = percentile
@@ -205,14 +191,8 @@ class SystemEmploymentScoreCalculator:
                 "value": None
             }
         
-        # 提取所有事业单位占比值
-        institution_values = [i[1] for i in self.institution_data]
-        
         # 计算分位点
-        percentile = self.calculate_percentile(
-            school_data.institution_ratio, 
-            institution_values
-        )
+        percentile = self.columns['institution'].percentile(school_data.institution_ratio)
         
         # 映射到0-100分
         score = percentile
@@ -251,14 +231,8 @@ class SystemEmploymentScoreCalculator:
                 "value": None
             }
         
-        # 提取所有国企占比值
-        state_owned_values = [s[1] for s in self.state_owned_data]
-        
         # 计算分位点
-        percentile = self.calculate_percentile(
-            school_data.state_owned_ratio, 
-            state_owned_values
-        )
+        percentile = self.columns['state_owned'].percentile(school_data.state_owned_ratio)
         
         # 映射到0-100分
         score = percentile
@@ -336,3 +310,36 @@ class SystemEmploymentScoreCalculator:
             "major_code": major_code,
             "major_name": major_data.major_name if major_data else None
         }
+    
+    def calculate_total_scores(self, school_infos: List[SchoolInfo]) -> np.ndarray:
+        """批量计算体制内就业评分总分，一次调用得到所有候选的总分
+        
+        Args:
+            school_infos: 候选学校列表
+            
+        Returns:
+            与 school_infos 顺序一致的总分数组
+        """
+        school_datas = [get_school_data(school.school_name) for school in school_infos]
+        
+        civil_servant = percentile_scores(
+            self.columns['civil_servant'],
+            attribute_values(school_datas, 'civil_servant_ratio'),
+            SYSTEM_EMPLOYMENT_SCORE_DEFAULTS["civil_servant"]
+        )
+        institution = percentile_scores(
+            self.columns['institution'],
+            attribute_values(school_datas, 'institution_ratio'),
+            SYSTEM_EMPLOYMENT_SCORE_DEFAULTS["institution"]
+        )
+        state_owned = percentile_scores(
+            self.columns['state_owned'],
+            attribute_values(school_datas, 'state_owned_ratio'),
+            SYSTEM_EMPLOYMENT_SCORE_DEFAULTS["state_owned"]
+        )
+        
+        return (
+            civil_servant * SYSTEM_EMPLOYMENT_SCORE_WEIGHTS["civil_servant"] +
+            institution * SYSTEM_EMPLOYMENT_SCORE_WEIGHTS["institution"] +
+            state_owned * SYSTEM_EMPLOYMENT_SCORE_WEIGHTS["state_owned"]
+        )
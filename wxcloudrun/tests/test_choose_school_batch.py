@@ -0,0 +1,109 @@
+import json
+import pytest
+from wxcloudrun.apis import choose_school_batch
+from wxcloudrun.apis.choose_school_v2 import analyze_schools, TargetContext
+from wxcloudrun.beans.input_models import UserInfo, TargetInfo
+from wxcloudrun.score_card.admission_score_calculator import AdmissionScoreCalculator
+from wxcloudrun.utils import datasets
+from wxcloudrun.utils.school_rows import build_school_rows
+
+AREAS = [('北京', '北京'), ('上海', '上海'), ('江苏', '南京'), ('湖北', '武汉')]
+MAJORS = [('计算机科学与技术', '081200'), ('软件工程', '083500'), ('法学', '030100')]
+
+
+def _school_rows(school_names):
+    rows = []
+    for i, school_name in enumerate(school_names):
+        province, city = AREAS[i % len(AREAS)]
+        major, major_code = MAJORS[i % len(MAJORS)]
+        rows.append({'school_name': school_name, 'school_code': str(10000 + i),
+                     'is_985': '1' if i % 5 == 0 else '0', 'is_211': '1' if i % 3 == 0 else '0',
+                     'departments': '信息学院', 'major': major, 'major_code': major_code,
+                     'blb': [{'year': 2023, 'bk': 100 + i * 10, 'lq': 5 + i, 'blb': f'{5 + i}%'}],
+                     'fsx': [{'year': 2023, 'data': [{'subject': '总分', 'score': 300 + i * 5}]}],
+                     'directions': [{'yjfxmc': '人工智能', 'zsrs': str(5 + i), 'bz': '', 'ksfs': '', 'xwlx': '',
+                                     'yjfxdm': '01', 'subjects': []}],
+                     'province': province, 'city': city})
+    return rows
+
+
+@pytest.fixture
+def school_data(monkeypatch):
+    """新的一代数据集，学校专业行使用合成数据，其余数据集从 resources 加载"""
+    generation = datasets.DatasetGeneration(0)
+    generation.loaders.update(datasets._builders)
+    generation.loaders.update(datasets.current_generation().loaders)
+    monkeypatch.setattr(datasets, '_current', generation)
+    # 取排名分布在各段的学校，使三个录取概率分组都有候选
+    school_names = list(datasets.get_dataset('merged_school_data'))[:600:10]
+    generation.datasets['rich_fx_flat_v2'] = build_school_rows(_school_rows(school_names), set())
+
+
+def _request(rank, majors=None, debug=False):
+    return {'user_info': {'school': '郑州大学', 'major': '计算机科学与技术', 'rank': rank, 'cet': '其他',
+                          'hometown': {'province': '江苏', 'city': '南京'}},
+            'target_info': {'majors': majors or []}, 'debug': debug}
+
+
+def test_group_requests_chunks_and_error_lines():
+    lines = [json.dumps(_request('前10%')), '', 'not json', json.dumps(_request('前50%')),
+             json.dumps(_request('前10%', ['软件工程'])), json.dumps({'user_info': {}}),
+             json.dumps(_request('前30%'))]
+    chunks, errors = choose_school_batch._group_requests(lines, chunk_size=2)
+
+    # 空行不计序号；筛选条件相同的请求分到同一组，每块最多 chunk_size 条
+    assert [[index for index, _ in chunk] for chunk in chunks] == [[0, 2], [5], [3]]
+    assert [error['index'] for error in errors] == [1, 4]
+    assert all(error['code'] == -1 and error['message'].startswith('请求格式错误') for error in errors)
+
+
+def test_batch_results_match_single_requests(school_data):
+    requests = [_request('前10%'), _request('前50%', debug=True), _request('前30%', ['软件工程']),
+                {'user_info': {'school': '测试大学1'}, 'target_info': {'levels': 'bad'}}]
+    lines = [json.dumps(request_data) for request_data in requests]
+
+    results = sorted(choose_school_batch.iter_batch_results(lines, workers=1, chunk_size=2),
+                     key=lambda result: result['index'])
+    assert [result['index'] for result in results] == [0, 1, 2, 3]
+    for request_data, result in zip(requests[:3], results):
+        expected = analyze_schools(UserInfo(**request_data['user_info']), TargetInfo(**request_data['target_info']),
+                                   request_data['debug'])
+        assert expected['code'] == 0 and any(expected['data'].values())
+        assert json.dumps({'index': result['index'], **expected}, sort_keys=True) == json.dumps(result, sort_keys=True)
+    assert results[3]['code'] == -1
+
+    # 多进程计算的结果与顺序计算一致
+    parallel = sorted(choose_school_batch.iter_batch_results(lines, workers=2, chunk_size=2),
+                      key=lambda result: result['index'])
+    assert json.dumps(parallel, sort_keys=True) == json.dumps(results, sort_keys=True)
+
+
+def test_admission_columns_match_per_school_scores(school_data):
+    target_info = TargetInfo()
+    context = TargetContext(target_info)
+    # 第二个用户复用第一次评分时填入的静态列
+    for user_school, major in [('郑州大学', '计算机科学与技术'), ('北京大学', '法学')]:
+        calculator = AdmissionScoreCalculator(
+            UserInfo(school=user_school, major=major, rank='前20%', cet='其他',
+                     hometown={'province': '江苏', 'city': '南京'}), target_info)
+        total_scores, probabilities = calculator.calculate_batch(context.schools, context.row_ids)
+        expected = [calculator.calculate(school) for school in context.schools]
+        assert [round(score, 2) for score in total_scores.tolist()] == [score['total_score'] for score in expected]
+        assert probabilities == [score['probability'] for score in expected]
+    assert datasets.get_dataset('admission_static_columns').filled[context.row_ids].all()
+
+
+def test_batch_endpoint_requires_admin_token(monkeypatch):
+    from wxcloudrun import app
+    import wxcloudrun.views
+    import config
+    monkeypatch.setattr(config, 'ADMIN_TOKEN', 'secret')
+    monkeypatch.setattr(choose_school_batch, 'iter_batch_results',
+                        lambda lines, workers=None: iter([{'index': 0, 'workers': workers}]))
+    client = app.test_client()
+    body = json.dumps(_request('前10%'))
+
+    assert client.post('/api/choose_schools_v2_batch', data=body).get_json()['code'] == -1
+    response = client.post('/api/choose_schools_v2_batch', data=body, headers={'X-Admin-Token': 'secret'})
+    # 接口在请求线程内顺序计算，不创建进程池
+    assert [json.loads(line) for line in response.get_data(as_text=True).splitlines()] == [{'index': 0, 'workers': 1}]
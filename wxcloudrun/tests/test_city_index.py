@@ -0,0 +1,21 @@
+from wxcloudrun.utils.city_index import CityIndex
+
+CITY_DATA = {'北京': '北京', '南京': '江苏', '苏州': '江苏', '无锡': '江苏', '南昌': '江西', '九江': '江西',
+             '江门': '广东', '广州': '广东'}
+
+
+def _cities(results):
+    return [item['city'] for item in results]
+
+
+def test_city_then_province_matches():
+    index = CityIndex(CITY_DATA)
+
+    assert index.search('北京', 10) == [{'province': '北京', 'city': '北京'}]
+    assert _cities(index.search('南京市', 10)) == ['南京']
+    # 城市名前缀、子串匹配在前，省份匹配的省内城市在后
+    assert _cities(index.search('江', 10)) == ['江门', '九江', '南京', '苏州', '无锡', '南昌']
+    assert _cities(index.search('江苏省', 10)) == ['南京', '苏州', '无锡']
+    assert _cities(index.search('江', 3)) == ['江门', '九江', '南京']
+    assert index.search('拉萨', 10) == []
+    assert index.province_cities['江西'] == ['南昌', '九江']
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from wxcloudrun.utils.data_manager import DataManager, ResourceFile, CLOUD_FILE_PREFIX
+
+FILES = {
+    'school.json': b'{"school_name": "A"}\n' * 5000,
+    'major.json': b'{"major": "B"}\n' * 3000,
+    'legacy.json': b'{"legacy": 1}\n' * 100,
+}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """模拟 access_token、batchdownloadfile 和文件下载接口，文件下载支持 Range"""
+    calls = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, headers=None):
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.startswith('/cgi-bin/token'):
+            self.calls.append('token')
+            self._send(200, json.dumps({'access_token': 'stub-token', 'expires_in': 7200}).encode())
+            return
+        name = self.path[len('/files/'):]
+        self.calls.append(('file', name, self.headers.get('Range'), self.headers.get('If-Range')))
+        content = FILES[name]
+        etag = f'"{_sha256(content)}"'
+        range_header = self.headers.get('Range')
+        # If-Range 与当前版本不一致时忽略 Range，返回完整内容
+        if range_header and self.headers.get('If-Range') not in (None, etag):
+            range_header = None
+        if range_header:
+            offset = int(range_header[len('bytes='):].rstrip('-'))
+            self._send(206, content[offset:], {
+                'Content-Range': f'bytes {offset}-{len(content) - 1}/{len(content)}', 'ETag': etag})
+        else:
+            self._send(200, content, {'ETag': etag})
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.calls.append('batchdownloadfile')
+        host = f'http://{self.server.server_address[0]}:{self.server.server_address[1]}'
+        file_list = [{'fileid': item['fileid'], 'status': 0,
+                      'download_url': f"{host}/files/{item['fileid'][len(CLOUD_FILE_PREFIX):]}"}
+                     for item in request['file_list']]
+        self._send(200, json.dumps({'errcode': 0, 'errmsg': 'ok', 'file_list': file_list}).encode())
+
+
+@pytest.fixture
+def stub_server():
+    handler = type('Handler', (StubHandler,), {'calls': []})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}', handler.calls
+    server.shutdown()
+    server.server_close()
+
+
+def _sha256(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+def test_initialize_downloads_required_then_background(stub_server, tmp_path):
+    api_base, calls = stub_server
+    manifest = [ResourceFile('school.json', required=True, sha256=_sha256(FILES['school.json'])),
+                ResourceFile('major.json', required=True, size=len(FILES['major.json'])),
+                ResourceFile('legacy.json')]
+    manager = DataManager(str(tmp_path), manifest, api_base=api_base, workers=2)
+
+    assert manager.initialize()
+    assert (tmp_path / 'school.json').read_bytes() == FILES['school.json']
+    assert (tmp_path / 'major.json').read_bytes() == FILES['major.json']
+    assert manager.wait_background(10)
+    assert (tmp_path / 'legacy.json').read_bytes() == FILES['legacy.json']
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.part')]
+    # access_token 在有效期内复用
+    assert calls.count('token') == 1
+
+    # 已就绪的文件不再下载
+    calls.clear()
+    assert manager.download_files(manifest)
+    assert calls == []
+
+
+def test_resume_partial_and_reject_bad_hash(stub_server, tmp_path):
+    api_base, calls = stub_server
+    content = FILES['school.json']
+    (tmp_path / 'school.json.part').write_bytes(content[:1000])
+    manager = DataManager(str(tmp_path), api_base=api_base, workers=2, retries=1)
+
+    assert manager.download_files([ResourceFile('school.json', sha256=_sha256(content))])
+    assert (tmp_path / 'school.json').read_bytes() == content
+    assert ('file', 'school.json', 'bytes=1000-', None) in calls
+
+    assert not manager.download_files([ResourceFile('major.json', sha256='0' * 64)])
+    assert not (tmp_path / 'major.json').exists()
+    assert not (tmp_path / 'major.json.part').exists()
+
+
+def test_stale_partial_is_not_resumed(stub_server, tmp_path, monkeypatch):
+    api_base, calls = stub_server
+    manager = DataManager(str(tmp_path), api_base=api_base, workers=1, retries=2)
+    old, new = FILES['major.json'], b'{"major": "C"}\n' * 4000
+    monkeypatch.setitem(FILES, 'major.json', new)
+
+    # 没有校验标识也没有 sha256 的 .part 不续传
+    (tmp_path / 'major.json.part').write_bytes(old[:1000])
+    assert manager.download_files([ResourceFile('major.json')])
+    assert (tmp_path / 'major.json').read_bytes() == new
+    assert ('file', 'major.json', None, None) in calls
+    assert not (tmp_path / 'major.json.part.meta').exists()
+
+    # 旧版本的 ETag 通过 If-Range 发送，服务端返回完整的新版本
+    calls.clear()
+    (tmp_path / 'major.json').unlink()
+    (tmp_path / 'major.json.part').write_bytes(old[:1000])
+    (tmp_path / 'major.json.part.meta').write_text(
+        json.dumps({'etag': f'"{_sha256(old)}"', 'last_modified': None, 'total': len(old)}))
+    assert manager.download_files([ResourceFile('major.json')])
+    assert (tmp_path / 'major.json').read_bytes() == new
+    assert calls[-1] == ('file', 'major.json', 'bytes=1000-', f'"{_sha256(old)}"')
+
+    # 续传范围的总大小与首次下载记录的不一致时丢弃 .part，重试时从头下载
+    calls.clear()
+    (tmp_path / 'major.json').unlink()
+    (tmp_path / 'major.json.part').write_bytes(new[:1000])
+    (tmp_path / 'major.json.part.meta').write_text(
+        json.dumps({'etag': f'"{_sha256(new)}"', 'last_modified': None, 'total': len(new) + 1}))
+    assert manager.download_files([ResourceFile('major.json')])
+    assert (tmp_path / 'major.json').read_bytes() == new
+    assert [call[2] for call in calls if call != 'batchdownloadfile' and call != 'token'] == ['bytes=1000-', None]
@@ -0,0 +1,81 @@
+import pytest
+from wxcloudrun.utils import datasets
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setattr(datasets, '_builders', {})
+    monkeypatch.setattr(datasets, '_current', datasets.DatasetGeneration(0))
+    return datasets
+
+
+def test_reload_swaps_generation_and_keeps_pinned(registry):
+    source = {'rows': [1, 2]}
+    registry.register_dataset('rows', lambda: list(source['rows']), [1, 2])
+    registry.register_dataset('total', lambda: sum(registry.get_dataset('rows')), 3)
+    registry.current_generation().cache('scores')['a'] = 1
+
+    token = registry.pin_generation()
+    try:
+        source['rows'] = [1, 2, 3]
+        generation = registry.reload_datasets()
+        assert generation.number == 1
+        # 已固定的请求继续使用旧一代数据
+        assert registry.get_dataset('total') == 3
+    finally:
+        registry.release_generation(token)
+
+    # 依赖其他数据集的构建函数读取的是同一代中新构建的数据
+    assert registry.get_dataset('total') == 6
+    assert registry.current_generation().cache('scores') == {}
+
+
+def test_failed_reload_keeps_current(registry):
+    def fail():
+        raise IOError('文件不完整')
+
+    registry.register_dataset('rows', fail, [1])
+    assert registry.reload_datasets() is None
+    assert registry.current_generation().number == 0
+    assert registry.get_dataset('rows') == [1]
+
+
+def test_lazy_dataset_loads_once_on_first_use(registry):
+    calls = []
+
+    def load_rows():
+        calls.append('rows')
+        return [1, 2]
+
+    registry.register_dataset('rows', load_rows)
+    registry.register_dataset('total', lambda: sum(registry.get_dataset('rows')))
+    assert calls == []
+    assert registry.readiness() == {'ready': False, 'generation': 0, 'datasets': {'rows': False, 'total': False}}
+    version = registry.current_generation().version
+
+    # 依赖的数据集随之加载
+    assert registry.get_dataset('total') == 3
+    assert registry.get_dataset('rows') == [1, 2]
+    assert calls == ['rows']
+
+    assert registry.warm_up()
+    assert registry.readiness()['ready']
+    # 数据版本号不随数据集陆续加载而变化，重新加载后变化
+    assert registry.current_generation().version == version
+    assert registry.reload_datasets().version != version
+
+
+def test_reload_rebuilds_school_levels(registry):
+    from wxcloudrun.utils import file_util
+    source = {'rows': [{'school_name': '甲大学', 'is_985': '1', 'is_211': '1'},
+                       {'school_name': '乙大学', 'is_985': '0', 'is_211': '1'}]}
+    registry.register_dataset('rich_fx_flat_v2', lambda: list(source['rows']))
+    registry.register_dataset('school_levels', file_util.build_school_levels)
+    assert file_util.CITY_LEVEL_MAP['985'] == {'甲大学'}
+
+    # 新数据中甲大学不再是 985，替换后的一代不再保留旧标记
+    source['rows'] = [{'school_name': '甲大学', 'is_985': '0', 'is_211': '1'}]
+    registry.reload_datasets()
+    assert registry.get_dataset('school_levels')['985'] == set()
+    assert file_util.CITY_LEVEL_MAP['211'] == {'甲大学'}
+    assert '北京大学' in file_util.CITY_LEVEL_MAP['c9']
@@ -0,0 +1,47 @@
+from wxcloudrun.utils.fx_dataset import MajorDirectionIndex, SchoolMajorIndex
+
+
+def _row(school, college, major, direction):
+    return {'学校名称': school, '院系名称': college, '专业名称': major, '方向名称': direction}
+
+
+ROWS = [
+    _row('甲大学', '计算机学院', '计算机科学与技术', '人工智能'),
+    _row('乙大学', '信息学院', '计算机科学与技术', '人工智能'),
+    _row('乙大学', '信息学院', '计算机科学与技术', '计算机系统结构'),
+    _row('丙大学', '软件学院', '软件工程', '智能计算'),
+    _row('丙大学', '软件学院', '电子信息', '计算机技术'),
+]
+
+
+def _pairs(records):
+    return [(item['major'], item['fx']) for item in records]
+
+
+def test_dedup_rank_and_page():
+    index = MajorDirectionIndex(ROWS, cache_size=8)
+
+    # 同一专业方向只保留第一次出现的院系
+    assert len(index.records) == 4
+    assert index.records[0]['collage_name'] == '计算机学院'
+
+    # 名称开头匹配在前，专业名匹配优先于同位置的方向名匹配，不匹配的不返回
+    assert _pairs(index.page('计算机', 10)) == [
+        ('计算机科学与技术', '人工智能'), ('计算机科学与技术', '计算机系统结构'), ('电子信息', '计算机技术')]
+    assert _pairs(index.page('计算', 10)) == _pairs(index.page('计算机', 10)) + [('软件工程', '智能计算')]
+    assert _pairs(index.page('计算', 2, offset=2)) == [('电子信息', '计算机技术'), ('软件工程', '智能计算')]
+    assert index.page('计算', 2, offset=10) == []
+    assert index.page('医学', 10) == []
+    # 排序结果按查询词缓存
+    assert index.search('计算') is index.search('计算')
+
+
+def test_school_partition_keeps_every_row():
+    index = SchoolMajorIndex(ROWS)
+
+    assert sorted(index.partitions) == ['丙大学', '乙大学', '甲大学']
+    assert _pairs(index.search('乙大学', '计算机')) == [
+        ('计算机科学与技术', '人工智能'), ('计算机科学与技术', '计算机系统结构')]
+    assert _pairs(index.search('丙大学', '计算')) == [('电子信息', '计算机技术'), ('软件工程', '智能计算')]
+    assert index.search('甲大学', '软件') == []
+    assert index.search('丁大学', '计算机') == []
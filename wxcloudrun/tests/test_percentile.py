@@ -0,0 +1,36 @@
+import random
+import numpy as np
+from wxcloudrun.score_card.percentile import PercentileColumn, percentile_of, percentile_scores
+
+
+def naive_percentile(value, data_list, reverse=False):
+    """原各评分卡中逐个计数的分位点实现"""
+    if not data_list:
+        return 50.0
+    sorted_data = sorted(data_list)
+    if reverse:
+        return 100 - (sum(1 for x in sorted_data if x <= value) / len(sorted_data) * 100)
+    return sum(1 for x in sorted_data if x <= value) / len(sorted_data) * 100
+
+
+def test_percentile_matches_naive():
+    random.seed(7)
+    data = [random.choice([round(random.uniform(0, 5), 2), random.randint(1, 500)]) for _ in range(300)]
+    column = PercentileColumn(data)
+    probes = data[:50] + [-1, 0, 2.5, 1000]
+    for reverse in (False, True):
+        for value in probes:
+            assert column.percentile(value, reverse) == naive_percentile(value, data, reverse)
+        batch = column.percentiles(probes, reverse)
+        assert list(batch) == [naive_percentile(v, data, reverse) for v in probes]
+
+
+def test_empty_column_returns_default():
+    assert percentile_of(3, []) == 50.0
+    assert list(PercentileColumn([]).percentiles([1, 2])) == [50.0, 50.0]
+
+
+def test_missing_values_use_default():
+    column = PercentileColumn([1, 2, 3, 4])
+    scores = percentile_scores(column, np.array([np.nan, 2, 4]), default=42)
+    assert list(scores) == [42, 50.0, 100.0]
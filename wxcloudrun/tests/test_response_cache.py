@@ -0,0 +1,44 @@
+from flask import Flask, jsonify, request
+from wxcloudrun.utils.response_cache import cached_json_response, response_cache
+
+
+def test_cached_body_etag_and_304():
+    app = Flask(__name__)
+    builds = []
+
+    @app.route('/lookup', methods=['GET', 'POST'])
+    def lookup():
+        name = request.get_json()['name'] if request.method == 'POST' else request.args['name']
+
+        def build():
+            builds.append(name)
+            return {'name': name, 'cities': ['北京', '南京']}
+
+        return cached_json_response('test_lookup', name, build)
+
+    response_cache.clear()
+    client = app.test_client()
+    first = client.post('/lookup', json={'name': 'a'})
+    etag = first.headers['ETag']
+    with app.app_context():
+        assert first.get_data() == jsonify({'name': 'a', 'cities': ['北京', '南京']}).get_data()
+
+    # 命中缓存时不再构造响应内容
+    assert client.post('/lookup', json={'name': 'a'}).get_data() == first.get_data()
+    assert builds == ['a']
+
+    # POST 不返回 304，仍带 ETag
+    revalidated = client.post('/lookup', json={'name': 'a'}, headers={'If-None-Match': etag})
+    assert revalidated.status_code == 200
+    assert revalidated.get_data() == first.get_data()
+    assert revalidated.headers['ETag'] == etag
+
+    not_modified = client.get('/lookup?name=a', headers={'If-None-Match': etag})
+    assert not_modified.status_code == 304
+    assert not_modified.get_data() == b''
+    assert not_modified.headers['ETag'] == etag
+
+    other = client.get('/lookup?name=b', headers={'If-None-Match': etag})
+    assert other.status_code == 200
+    assert other.headers['ETag'] != etag
+    assert builds == ['a', 'b']
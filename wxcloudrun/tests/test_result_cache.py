@@ -0,0 +1,27 @@
+import time
+from wxcloudrun.utils.result_cache import ResultCache, make_cache_key
+
+
+def test_lru_eviction_and_stats():
+    cache = ResultCache(maxsize=2, ttl=60)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)  # b 最久未使用，被淘汰
+    assert cache.get('b') is None
+    assert cache.get('c') == 3
+    stats = cache.stats()
+    assert (stats['size'], stats['hits'], stats['misses']) == (2, 2, 1)
+
+
+def test_ttl_expiry():
+    cache = ResultCache(maxsize=10, ttl=0.01)
+    cache.put('a', 1)
+    time.sleep(0.02)
+    assert cache.get('a') is None
+    assert cache.stats()['size'] == 0
+
+
+def test_cache_key_ignores_dict_order():
+    assert make_cache_key({'a': 1, 'b': [1, 2]}) == make_cache_key({'b': [1, 2], 'a': 1})
+    assert make_cache_key({'a': 1}) != make_cache_key({'a': 2})
@@ -0,0 +1,31 @@
+from flask import Flask, jsonify
+from wxcloudrun.utils.school_detail_index import SchoolDetailIndex
+from wxcloudrun.utils.school_rows import build_school_rows
+
+
+def _row(school_name, major, major_code, **extra):
+    return dict({'school_name': school_name, 'school_code': '10001', 'is_985': '1', 'is_211': '1',
+                 'departments': '信息学院', 'major': major, 'major_code': major_code,
+                 'directions': [{'name': '人工智能', 'score': None}], 'province': '北京', 'city': '北京'}, **extra)
+
+
+def test_lookup_by_major_and_code():
+    rows = build_school_rows([_row('甲大学', '计算机科学与技术', '081200', blb=[{'year': 2023, 'value': 0.1}]),
+                              _row('甲大学', '计算机科学与技术', '081200', departments='重复行'),
+                              _row('乙大学', '软件工程', '083500')], set())
+    index = SchoolDetailIndex(rows, {'甲大学': [{'year': 2023, 'rate': 0.95}]})
+
+    detail = index.find('甲大学', '计算机科学与技术')
+    # 重复的键保留第一条
+    assert detail.payload()['departments'] == '信息学院'
+    assert detail.payload()['jy'] == [{'year': 2023, 'rate': 0.95}]
+    assert index.find('甲大学', major_code='081200') is detail
+    assert index.find('乙大学', '软件工程').payload()['jy'] == []
+    assert index.find('乙大学', '计算机科学与技术') is None
+    assert index.find('乙大学') is None
+
+    # 预先序列化的响应体与 jsonify 的输出一致，生成后复用
+    with Flask(__name__).app_context():
+        assert detail.body == jsonify({'code': 0, 'data': detail.payload()}).get_data()
+        assert SchoolDetailIndex.NOT_FOUND_BODY == jsonify({'code': 0, 'data': None}).get_data()
+    assert detail.body is detail.body
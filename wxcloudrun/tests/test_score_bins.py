@@ -0,0 +1,25 @@
+import numpy as np
+from wxcloudrun.score_card.constants import COMPETITION_RATIO_SCORES, ENROLLMENT_SIZE_SCORES
+from wxcloudrun.score_card.score_bins import ScoreBins
+
+
+def _linear_lookup(ranges, value, closed=False):
+    for (low, high), info in ranges.items():
+        if low <= value < high or (closed and value == high):
+            return info
+    return None
+
+
+def test_lookup_matches_linear_scan():
+    reputation = {(1, 2): 'a', (3, 5): 'b', (6, 10): 'c'}
+    cases = [
+        (COMPETITION_RATIO_SCORES, False, [0, 2.9, 3, 7.5, 10, 1e9, -1]),
+        (ENROLLMENT_SIZE_SCORES, False, [0, 9, 10, 29, 30, 49, 50, 99, 100, 199, 200, 5000]),
+        (reputation, True, [0, 1, 2, 2.5, 3, 5, 10, 11]),
+    ]
+    for ranges, closed, values in cases:
+        bins = ScoreBins(ranges, closed=closed)
+        expected = [_linear_lookup(ranges, value, closed) for value in values]
+        assert [bins.lookup(value) for value in values] == expected
+        indexes = bins.indexes(np.array(values))
+        assert [None if i < 0 else bins.values[i] for i in indexes] == expected
@@ -0,0 +1,16 @@
+from wxcloudrun.apis import choose_school_v2
+
+
+def test_rank_by_level_falls_back_when_build_fails(monkeypatch):
+    # 下标 0~4 属于冲刺组(概率 30%)，5 属于保底组，6 评分出错
+    probabilities = [30, 30, 30, 30, 30, 80, None]
+    card_scores = [50, 90, 70, 90, 60, 10, 100]
+    ranked = choose_school_v2._rank_by_level(probabilities, card_scores)
+
+    # 构造评分卡失败(返回 None)的候选由下一名补上
+    monkeypatch.setattr(choose_school_v2, '_build_target_school',
+                        lambda chooser, school, debug: None if school == 3 else school)
+    schools = list(range(7))
+    assert choose_school_v2._build_top_k(None, schools, ranked['冲刺'], 3, False) == [1, 2, 4]
+    assert choose_school_v2._build_top_k(None, schools, ranked['保底'], 3, False) == [5]
+    assert list(ranked['稳妥']) == []
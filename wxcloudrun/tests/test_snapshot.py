@@ -0,0 +1,57 @@
+import json
+import os
+import pytest
+from wxcloudrun.utils import snapshot
+
+
+def _write_jsonl(path, rows):
+    with open(path, 'w', encoding='utf-8') as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + '\n')
+
+
+def _read_jsonl(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.fixture
+def source(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot, '_built', {})
+    path = str(tmp_path / 'rows.jsonl')
+    _write_jsonl(path, [{'学校名称': '北京大学'}, {'学校名称': '清华大学'}])
+    return path
+
+
+def _build(monkeypatch, source, snapshot_path):
+    monkeypatch.setattr(snapshot, '_building', True)
+    snapshot.load_dataset('rows', [source], lambda: _read_jsonl(source))
+    monkeypatch.setattr(snapshot, '_building', False)
+    snapshot.build_snapshot(snapshot_path, modules=[])
+
+
+def test_load_from_snapshot(tmp_path, monkeypatch, source):
+    snapshot_path = str(tmp_path / 'datasets.snapshot')
+    _build(monkeypatch, source, snapshot_path)
+    monkeypatch.setattr(snapshot, '_snapshot', snapshot._read_snapshot(snapshot_path))
+
+    def fail():
+        raise AssertionError('快照有效时不应解析 JSONL')
+
+    assert snapshot.load_dataset('rows', [source], fail) == _read_jsonl(source)
+
+
+def test_stale_or_corrupt_snapshot_falls_back(tmp_path, monkeypatch, source):
+    snapshot_path = str(tmp_path / 'datasets.snapshot')
+    _build(monkeypatch, source, snapshot_path)
+
+    # 源文件变化后快照过期
+    _write_jsonl(source, [{'学校名称': '复旦大学'}])
+    monkeypatch.setattr(snapshot, '_snapshot', snapshot._read_snapshot(snapshot_path))
+    assert snapshot.load_dataset('rows', [source], lambda: _read_jsonl(source)) == [{'学校名称': '复旦大学'}]
+
+    # 数据体被篡改时校验失败
+    with open(snapshot_path, 'r+b') as f:
+        f.seek(-2, os.SEEK_END)
+        f.write(b'\x00\x00')
+    assert snapshot._read_snapshot(snapshot_path) == {}
@@ -0,0 +1,28 @@
+from wxcloudrun.utils import text_index
+from wxcloudrun.utils.text_index import NgramIndex
+
+SCHOOLS = ['北京大学', '北京理工大学', '华北电力大学(北京)', '南京大学', '清华大学']
+
+
+def test_substring_prefix_and_popularity_ranking():
+    index = NgramIndex(SCHOOLS, popularity={'北京理工大学': 2.0, '北京大学': 1.0})
+
+    # 前缀匹配排在子串匹配之前，匹配位置相同时热度高的靠前
+    assert index.search('北京') == ['北京理工大学', '北京大学', '华北电力大学(北京)']
+    # 完全匹配排在最前
+    assert index.search('北京大学') == ['北京大学']
+    assert index.search('大学', limit=2) == ['北京大学', '南京大学']
+    assert index.search('京') == ['北京理工大学', '北京大学', '南京大学', '华北电力大学(北京)']
+    assert index.search('复旦') == []
+    assert index.search('  ') == []
+
+
+def test_pinyin_initials(monkeypatch):
+    initials = {'北京大学': 'bjdx', '南京大学': 'njdx', '清华大学': 'qhdx'}
+    monkeypatch.setattr(text_index, 'lazy_pinyin', object())
+    monkeypatch.setattr(text_index, 'pinyin_initials', lambda name: initials[name])
+    index = NgramIndex(['北京大学', '南京大学', '清华大学'])
+
+    assert index.search('bj') == ['北京大学']
+    assert index.search('JDX') == ['北京大学', '南京大学']
+    assert index.search('dx', limit=1) == ['北京大学']
@@ -0,0 +1,44 @@
+from loguru import logger
+import config
+from wxcloudrun.utils import tracing
+
+
+class _Spy:
+    """记录是否被格式化"""
+
+    def __init__(self):
+        self.formatted = False
+
+    def __format__(self, spec):
+        self.formatted = True
+        return 'spy'
+
+
+def test_trace_disabled_does_not_format(monkeypatch):
+    monkeypatch.setattr(config, 'SCORE_TRACE_SAMPLE_RATE', 0)
+    spy = _Spy()
+    token = tracing.start_trace(debug=False)
+    try:
+        assert not tracing.trace_enabled()
+        tracing.trace("学校数据: {}", spy)
+    finally:
+        tracing.end_trace(token)
+    assert not spy.formatted
+
+
+def test_trace_enabled_by_debug_or_sampling(monkeypatch):
+    messages = []
+    handler_id = logger.add(messages.append, format="{message}")
+    try:
+        token = tracing.start_trace(debug=True)
+        tracing.trace("学校数据: {}", '北京大学')
+        tracing.end_trace(token)
+
+        monkeypatch.setattr(config, 'SCORE_TRACE_SAMPLE_RATE', 1)
+        token = tracing.start_trace(debug=False)
+        assert tracing.trace_enabled()
+        tracing.end_trace(token)
+    finally:
+        logger.remove(handler_id)
+    assert not tracing.trace_enabled()
+    assert [m.strip() for m in messages] == ['学校数据: 北京大学']
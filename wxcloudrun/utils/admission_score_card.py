@@ -1,75 +1,59 @@
 from datetime import datetime
 import json
 import os
+from wxcloudrun.utils.snapshot import load_dataset, RESOURCES_DIR
+from wxcloudrun.utils.datasets import register_dataset, get_dataset
 
-# 全局变量存储加载的数据
-SCHOOL_LEVELS = {}
-MAJOR_DETAILS = {}
-BLB_AVERAGES = {}
+def _read_jsonl_dict(file_path: str, key: str) -> dict:
+    """逐行解析 JSONL 文件，按指定字段建立字典"""
+    result = {}
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            item = json.loads(line.strip())
+            result[item[key]] = item
+    return result
+
+SCHOOL_LEVEL_PATH = os.path.join(RESOURCES_DIR, 'school_level.json')
+MAJOR_DETAIL_PATH = os.path.join(RESOURCES_DIR, 'major_detail_flat.json')
+BLB_AVERAGES_PATH = os.path.join(RESOURCES_DIR, 'blb_averages.json')
+
+def build_school_levels() -> dict:
+    return load_dataset('school_level', [SCHOOL_LEVEL_PATH], lambda: _read_jsonl_dict(SCHOOL_LEVEL_PATH, "学校名称"))
+
+def build_major_details() -> dict:
+    return load_dataset('major_detail_flat', [MAJOR_DETAIL_PATH], lambda: _read_jsonl_dict(MAJOR_DETAIL_PATH, "专业名称"))
+
+def build_blb_averages() -> dict:
+    return load_dataset('blb_averages', [BLB_AVERAGES_PATH], lambda: _read_jsonl_dict(BLB_AVERAGES_PATH, "school"))
 
 def load_school_levels() -> dict:
     """加载学校等级数据"""
-    global SCHOOL_LEVELS
-    if SCHOOL_LEVELS:  # 如果已经加载过，直接返回
-        return SCHOOL_LEVELS
-        
     try:
-        cur_dir = os.path.dirname(os.path.abspath(__file__))
-        cur_dir = os.path.dirname(cur_dir)
-        file_path = os.path.join(cur_dir, 'resources/school_level.json')
-        
-        with open(file_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                school = json.loads(line.strip())
-                SCHOOL_LEVELS[school["学校名称"]] = school
-            return SCHOOL_LEVELS
+        return build_school_levels()
     except Exception as e:
         print(f"加载学校数据失败: {e}")
         return {}
 
 def load_major_details() -> dict:
     """加载专业详细信息"""
-    global MAJOR_DETAILS
-    if MAJOR_DETAILS:  # 如果已经加载过，直接返回
-        return MAJOR_DETAILS
-        
     try:
-        file_path = os.path.join(os.path.dirname(__file__), '../resources/major_detail_flat.json')
-        major_dict = {}
-        with open(file_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                major_info = json.loads(line.strip())
-                major_dict[major_info["专业名称"]] = major_info
-        MAJOR_DETAILS = major_dict
-        return MAJOR_DETAILS
+        return build_major_details()
     except Exception as e:
         print(f"加载专业数据失败: {e}")
         return {}
 
 def load_blb_averages() -> dict:
     """加载报录比默认值数据"""
-    global BLB_AVERAGES
-    if BLB_AVERAGES:  # 如果已经加载过，直接返回
-        return BLB_AVERAGES
-        
     try:
-        cur_dir = os.path.dirname(os.path.abspath(__file__))
-        cur_dir = os.path.dirname(cur_dir)
-        file_path = os.path.join(cur_dir, 'resources/blb_averages.json')
-        
-        with open(file_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                school_data = json.loads(line.strip())
-                BLB_AVERAGES[school_data["school"]] = school_data
-        return BLB_AVERAGES
+        return build_blb_averages()
     except Exception as e:
         print(f"加载报录比默认值数据失败: {e}")
         return {}
 
-# 初始化加载数据
-SCHOOL_LEVELS = load_school_levels()
-MAJOR_DETAILS = load_major_details()
-BLB_AVERAGES = load_blb_averages()
+# 数据在第一次使用时加载
+register_dataset('school_level', build_school_levels, loader=load_school_levels)
+register_dataset('major_detail_flat', build_major_details, loader=load_major_details)
+register_dataset('blb_averages', build_blb_averages, loader=load_blb_averages)
 
 class AdmissionScoreCard:
     def __init__(self, user_info: dict, target_info: dict):
@@ -79,7 +63,7 @@ class AdmissionScoreCard:
         
     def _get_school_level(self, school_name: str) -> int:
         """获取学校等级，返回数字等级（越高等级越高）"""
-        school_info = SCHOOL_LEVELS.get(school_name, {})
+        school_info = get_dataset('school_level').get(school_name, {})
         if school_info.get("是否C9") == "是":
             return 4
         elif school_info.get("是否985") == "是":
@@ -133,7 +117,7 @@ class AdmissionScoreCard:
         
     def _get_advance_majors(self, major_name: str) -> set:
         """获取专业的考研方向列表"""
-        major_info = MAJOR_DETAILS.get(major_name, {})
+        major_info = get_dataset('major_detail_flat').get(major_name, {})
         advance_majors = set()
         
         if "考研方向" in major_info:
@@ -217,8 +201,9 @@ class AdmissionScoreCard:
         school_name = school_info.get("school_name", "")
         department = school_info.get("departments", "")  # 院系名称
         
-        if school_name in BLB_AVERAGES:
-            school_data = BLB_AVERAGES[school_name]
+        blb_averages = get_dataset('blb_averages')
+        if school_name in blb_averages:
+            school_data = blb_averages[school_name]
             # 优先使用院系默认值
             if department and department in school_data:
                 ratio = school_data[department]
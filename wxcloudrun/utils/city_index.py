@@ -0,0 +1,53 @@
+from typing import Dict, List
+from loguru import logger
+from wxcloudrun.utils.text_index import NgramIndex
+
+# 查询词末尾可省略的行政区划后缀，数据中的城市和省份名称都不带后缀
+_SUFFIXES = ('市', '省')
+
+
+class CityIndex:
+    """城市搜索索引
+
+    基于 city_2_province.txt 构建城市名称和省份名称的 n-gram 索引，以及省份到城市的映射。
+    查询结果依次为: 城市名完全匹配、前缀匹配、子串和拼音首字母匹配，最后是省份名匹配的省内城市。
+    """
+
+    def __init__(self, city_data: Dict[str, str]):
+        """
+        :param city_data: 城市到省份的映射
+        """
+        self.city_province = dict(city_data)
+        # 省份到城市的映射，城市保持文件中的顺序
+        self.province_cities: Dict[str, List[str]] = {}
+        for city, province in self.city_province.items():
+            self.province_cities.setdefault(province, []).append(city)
+
+        self._cities = NgramIndex(self.city_province)
+        self._provinces = NgramIndex(self.province_cities)
+        logger.info(f"城市索引构建完成: {len(self.city_province)} 个城市, {len(self.province_cities)} 个省份")
+
+    def search(self, query: str, limit: int) -> List[Dict[str, str]]:
+        """返回最多 limit 条匹配的 {'province', 'city'}"""
+        query = query.strip()
+        if len(query) > 1 and query.endswith(_SUFFIXES):
+            query = query[:-1]
+
+        results = []
+        seen = set()
+
+        def add(city: str) -> bool:
+            """加入一条结果，达到 limit 时返回 False"""
+            if city not in seen:
+                seen.add(city)
+                results.append({'province': self.city_province[city], 'city': city})
+            return len(results) < limit
+
+        for city in self._cities.search(query, limit):
+            if not add(city):
+                return results
+        for province in self._provinces.search(query):
+            for city in self.province_cities[province]:
+                if not add(city):
+                    return results
+        return results
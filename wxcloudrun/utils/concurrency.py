@@ -0,0 +1,34 @@
+import threading
+from functools import wraps
+from typing import Callable
+from flask import jsonify
+from loguru import logger
+
+
+class ConcurrencyLimiter:
+    """限制同一 worker 进程内某类接口同时占用的线程数
+
+    gthread worker 中各线程共享同一个进程，大模型类接口一次调用要等待数十秒，
+    不加限制时会占满所有线程，使择校评分、城市查询等快速接口也一起排队。
+    """
+
+    def __init__(self, name: str, max_concurrency: int, acquire_timeout: float):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.acquire_timeout = acquire_timeout
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+
+    def __call__(self, func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not self._semaphore.acquire(timeout=self.acquire_timeout):
+                logger.warning(f"{self.name} 接口并发已达上限 {self.max_concurrency}，拒绝请求")
+                return jsonify({
+                    'code': 503,
+                    'message': '服务繁忙，请稍后重试'
+                })
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._semaphore.release()
+        return wrapper
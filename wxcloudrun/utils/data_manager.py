@@ -1,159 +1,398 @@
+"""
+resources 数据文件下载
+
+RESOURCE_MANIFEST 列出云存储中的全部数据文件。启动时同步等待 required 的文件(datasets 中注册的数据集读取的文件)，
+gunicorn master 预加载数据集前它们已全部就绪。其余文件不属于任何数据集，只由旧版接口在请求时读取
+(读取时等待文件就绪)，在后台线程中下载，下载完成后不需要重新加载数据集。
+
+下载流程:
+1. 用 batchdownloadfile 一次换取全部缺失文件的临时下载地址；
+2. 多个线程共用一个带连接池的 requests.Session 并发下载，响应按块流式写入 <文件名>.part；
+3. 校验大小和 sha256 后用 os.replace 原子替换目标文件，读取方不会看到写了一半的文件；
+4. 下载中断时保留 .part 文件，以及首次响应的 ETag/Last-Modified 和文件总大小(<文件名>.part.meta)，
+   重试时通过 Range + If-Range 请求从已写入的位置继续；服务端文件已变化时返回完整内容，从头写入。
+   Content-Range 中的起始位置或总大小与已下载部分不一致时丢弃 .part 重新下载；
+   没有记录校验标识且 manifest 中没有 sha256 时无法确认版本一致，同样从头下载。
+
+access_token 缓存到过期前，不再每次下载都重新获取。
+"""
+import hashlib
+import json
 import os
+import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Tuple
 import requests
-import threading
+from requests.adapters import HTTPAdapter
 from loguru import logger
-from typing import Optional, Dict, List
-import sys
-import os
-sys.path.append(os.getcwd())
+from wxcloudrun.utils.snapshot import RESOURCES_DIR
+import config
+
+WX_API_BASE = 'https://api.weixin.qq.com'
+WX_APPID = "wx81019c53b1467685"
+WX_SECRET = "c44a45f3c236cb978a0a25e1767a51fc"
+CLOUD_ENV = "prod-4g46sjwd41c4097c"
+CLOUD_FILE_PREFIX = f"cloud://{CLOUD_ENV}.7072-prod-4g46sjwd41c4097c-1330319089/"
+
+# 接口请求和单个文件下载的超时(秒)，下载超时针对的是两次收到数据之间的间隔
+API_TIMEOUT = 30
+DOWNLOAD_TIMEOUT = 30
+# 流式写入的块大小
+CHUNK_SIZE = 1024 * 1024
+# batchdownloadfile 单次最多换取的文件数
+MAX_BATCH_FILES = 50
+# access_token 提前失效的秒数，避免临近过期时使用
+TOKEN_EXPIRE_MARGIN = 300
+# access_token 失效或过期的错误码
+TOKEN_INVALID_ERRCODES = (40001, 42001)
+# Content-Range 响应头: bytes <start>-<end>/<total> 或 bytes */<total>
+CONTENT_RANGE_PATTERN = re.compile(r'bytes\s+(?:(\d+)-\d+|\*)/(\d+|\*)')
+
+
+class ResourceFile(NamedTuple):
+    """manifest 中的一个数据文件"""
+    name: str                       # resources 目录下的文件名，同时是云存储中的路径
+    required: bool = False          # 启动时必须就绪(数据模块导入时读取)的文件
+    size: Optional[int] = None      # 期望的字节数，未知时按响应的 Content-Length 校验
+    sha256: Optional[str] = None    # 期望的 sha256，未知时不校验
+
+
+RESOURCE_MANIFEST: List[ResourceFile] = [
+    ResourceFile('rich_fx_flat_v2_a.json', required=True),
+    ResourceFile('rich_fx_flat_v2_b.json', required=True),
+    ResourceFile('fx_flat.json', required=True),
+    ResourceFile('city_2_province.txt', required=True),
+    ResourceFile('aggregated_employment_data.jsonl', required=True),
+    ResourceFile('merged_school_data.jsonl', required=True),
+    ResourceFile('city_scores.json', required=True),
+    ResourceFile('major_detail_flat.json', required=True),
+    ResourceFile('school_level.json', required=True),
+    ResourceFile('blb_averages.json', required=True),
+    # 缺失时 merged_major_metrics 数据集会回退到测试数据，且只能手动重新加载，因此启动时必须就绪
+    ResourceFile('merged_major_metrics.jsonl', required=True),
+    # 旧版择校接口在首次请求时读取，会等待文件就绪
+    ResourceFile('rich_fx_flat_v2.json'),
+]
+
+
+class DownloadError(Exception):
+    """下载或校验失败"""
 
 
 class DataManager:
-    _instance = None
-    _lock = threading.Lock()
-    _initialized = False
-    
-    def __new__(cls):
-        if cls._instance is None:
-            with cls._lock:
-                if cls._instance is None:
-                    cls._instance = super(DataManager, cls).__new__(cls)
-        return cls._instance
-    
-    def __init__(self):
-        if not self._initialized:
-            with self._lock:
-                if not self._initialized:
-                    self.resources_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'resources')
-                    self.school_data_file = os.path.join(self.resources_dir, 'rich_fx_flat_v2.json')
-    
+
+    def __init__(self, resources_dir: str = RESOURCES_DIR, manifest: Optional[List[ResourceFile]] = None,
+                 api_base: str = WX_API_BASE, workers: Optional[int] = None, retries: Optional[int] = None):
+        """
+        :param resources_dir: 数据文件目录
+        :param manifest: 需要下载的文件列表，默认 RESOURCE_MANIFEST
+        :param api_base: 微信接口地址，测试时指向本地服务
+        :param workers: 并发下载的线程数，默认 config.DATA_DOWNLOAD_WORKERS
+        :param retries: 单个文件的下载次数，默认 config.DATA_DOWNLOAD_RETRIES
+        """
+        self.resources_dir = resources_dir
+        self.manifest = RESOURCE_MANIFEST if manifest is None else manifest
+        self.api_base = api_base.rstrip('/')
+        self.workers = max(config.DATA_DOWNLOAD_WORKERS if workers is None else workers, 1)
+        self.retries = max(config.DATA_DOWNLOAD_RETRIES if retries is None else retries, 1)
+
+        # 各下载线程共用连接池，同一主机的连接可以复用
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._token: Optional[str] = None
+        self._token_expire_at = 0.0
+        self._token_lock = threading.Lock()
+        self._initialized = False
+        self._background: Optional[threading.Thread] = None
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.resources_dir, name)
+
     def get_access_token(self) -> Optional[str]:
-        """获取微信云开发access token"""
-        try:
-            appid = "wx81019c53b1467685"
-            secret = "c44a45f3c236cb978a0a25e1767a51fc"
-            
-            url = f'https://api.weixin.qq.com/cgi-bin/token?grant_type=client_credential&appid={appid}&secret={secret}'
-            response = requests.get(url, timeout=30)
-            
-            if response.status_code != 200:
-                logger.error(f"获取access_token失败: {response.text}")
-                return None
-                
-            result = response.json()
-            if 'access_token' not in result:
-                logger.error(f"获取access_token失败: {result}")
+        """获取微信云开发access token，缓存到过期前"""
+        with self._token_lock:
+            if self._token and time.monotonic() < self._token_expire_at:
+                return self._token
+            try:
+                response = self.session.get(f'{self.api_base}/cgi-bin/token', params={
+                    'grant_type': 'client_credential',
+                    'appid': WX_APPID,
+                    'secret': WX_SECRET
+                }, timeout=API_TIMEOUT)
+
+                if response.status_code != 200:
+                    logger.error(f"获取access_token失败: {response.text}")
+                    return None
+
+                result = response.json()
+                if 'access_token' not in result:
+                    logger.error(f"获取access_token失败: {result}")
+                    return None
+
+                expires_in = int(result.get('expires_in', 7200))
+                self._token = result['access_token']
+                self._token_expire_at = time.monotonic() + max(expires_in - TOKEN_EXPIRE_MARGIN, 0)
+                logger.info(f"成功获取access_token, 有效期 {expires_in}s")
+                return self._token
+
+            except Exception as e:
+                logger.error(f"获取access_token时出错: {str(e)}")
                 return None
-                
-            logger.info("成功获取access_token")
-            return result['access_token']
-            
-        except Exception as e:
-            logger.error(f"获取access_token时出错: {str(e)}")
-            return None
-    
-    def download_file(self) -> bool:
-        """下载学校数据文件"""
-        try:
-            # 确保资源目录存在
-            os.makedirs(self.resources_dir, exist_ok=True)
-            
-            # 如果文件已存在且非空，直接返回成功
-            if os.path.exists(self.school_data_file) and os.path.getsize(self.school_data_file) > 0:
-                logger.info(f"学校数据文件已存在: {self.school_data_file}")
-                return True
-            
-            # 获取access_token
+
+    def invalidate_token(self) -> None:
+        with self._token_lock:
+            self._token = None
+            self._token_expire_at = 0.0
+
+    def _request_download_urls(self, files: List[ResourceFile]) -> Dict[str, str]:
+        """换取一批文件的临时下载地址，access_token 失效时重新获取一次"""
+        for attempt in range(2):
             access_token = self.get_access_token()
             if not access_token:
-                return False
-            
-            # 获取下载URL
-            url = "https://api.weixin.qq.com/tcb/batchdownloadfile"
-            data = {
-                "env": "prod-4g46sjwd41c4097c",
-                "file_list": [
-                    {
-                        "fileid": "cloud://prod-4g46sjwd41c4097c.7072-prod-4g46sjwd41c4097c-1330319089/rich_fx_flat_v2.json",
-                        "max_age": 7200
-                    }
-                ]
-            }
-            
-            headers = {'Content-Type': 'application/json'}
-            response = requests.post(
-                f"{url}?access_token={access_token}",
-                headers=headers,
-                json=data,
-                timeout=30
+                raise DownloadError("获取access_token失败")
+
+            response = self.session.post(
+                f"{self.api_base}/tcb/batchdownloadfile",
+                params={'access_token': access_token},
+                json={
+                    "env": CLOUD_ENV,
+                    "file_list": [{"fileid": CLOUD_FILE_PREFIX + file.name, "max_age": 7200} for file in files]
+                },
+                timeout=API_TIMEOUT
             )
             response.raise_for_status()
-            
+
             result = response.json()
+            if result.get('errcode') in TOKEN_INVALID_ERRCODES and attempt == 0:
+                logger.warning(f"access_token已失效，重新获取: {result.get('errmsg')}")
+                self.invalidate_token()
+                continue
             if result.get('errcode') != 0:
-                logger.error(f"获取下载URL失败: {result.get('errmsg')}")
-                return False
-            
-            # 下载文件
-            file_list = result.get('file_list', [])
-            if not file_list:
-                logger.error("文件列表为空")
-                return False
-            
-            download_url = file_list[0].get('download_url')
-            if not download_url:
-                logger.error("下载URL为空")
-                return False
-            
-            file_response = requests.get(download_url, timeout=30)
-            file_response.raise_for_status()
-            
-            # 保存文件
-            with open(self.school_data_file, 'wb') as f:
-                f.write(file_response.content)
-            
-            # 验证文件
-            if not os.path.exists(self.school_data_file) or os.path.getsize(self.school_data_file) == 0:
-                logger.error("文件下载失败或文件为空")
-                return False
-            
-            logger.info(f"成功下载学校数据文件: {self.school_data_file}")
+                raise DownloadError(f"获取下载URL失败: {result.get('errmsg')}")
+
+            urls = {}
+            for item in result.get('file_list', []):
+                fileid, download_url = item.get('fileid', ''), item.get('download_url')
+                if not download_url or item.get('status', 0) != 0:
+                    logger.error(f"获取下载URL失败: {fileid} {item.get('errmsg')}")
+                    continue
+                urls[fileid[len(CLOUD_FILE_PREFIX):]] = download_url
+            return urls
+        return {}
+
+    def get_download_urls(self, files: List[ResourceFile]) -> Dict[str, str]:
+        """获取文件名到临时下载地址的映射"""
+        urls = {}
+        for start in range(0, len(files), MAX_BATCH_FILES):
+            urls.update(self._request_download_urls(files[start:start + MAX_BATCH_FILES]))
+        return urls
+
+    @staticmethod
+    def _sha256(path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _verify(self, path: str, file: ResourceFile, expected_size: Optional[int] = None) -> None:
+        """校验大小和 sha256，不一致时抛出 DownloadError"""
+        size = os.path.getsize(path)
+        expected_size = file.size if file.size is not None else expected_size
+        if size == 0 or (expected_size is not None and size != expected_size):
+            raise DownloadError(f"{file.name} 大小不一致: {size} != {expected_size}")
+        if file.sha256 and self._sha256(path) != file.sha256.lower():
+            raise DownloadError(f"{file.name} sha256 校验失败")
+
+    def is_ready(self, file: ResourceFile) -> bool:
+        """文件已存在且通过校验"""
+        path = self._path(file.name)
+        if not os.path.exists(path):
+            return False
+        try:
+            self._verify(path, file)
+            return True
+        except DownloadError as e:
+            logger.warning(f"已有文件校验失败，重新下载: {str(e)}")
+            return False
+
+    @staticmethod
+    def _parse_content_range(value: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+        """解析 Content-Range，返回 (起始位置, 总大小)，缺失或无法解析的部分为 None"""
+        match = CONTENT_RANGE_PATTERN.match(value or '')
+        if not match:
+            return None, None
+        start, total = match.groups()
+        return (int(start) if start is not None else None), (int(total) if total != '*' else None)
+
+    @staticmethod
+    def _read_part_meta(meta_path: str) -> Dict:
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _discard_part(part_path: str) -> None:
+        """删除 .part 及其元数据，下次从头下载"""
+        for path in (part_path, part_path + '.meta'):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _fetch(self, url: str, part_path: str, file: ResourceFile) -> Optional[int]:
+        """
+        把文件流式写入 part_path，已有部分内容且能确认是同一版本时从断点继续
+        :return: 完整文件的大小，未知时为 None
+        """
+        meta_path = part_path + '.meta'
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        meta = self._read_part_meta(meta_path) if offset else {}
+        validator = meta.get('etag') or meta.get('last_modified')
+        if offset and not validator and not file.sha256:
+            # 无法确认已写入的部分与服务端当前的文件是同一版本，下载后也无法校验，从头下载
+            logger.warning(f"{file.name} 的未完成下载无法校验版本，从头下载")
+            offset = 0
+
+        headers = {}
+        if offset:
+            headers['Range'] = f'bytes={offset}-'
+            if validator:
+                # 服务端文件已变化时返回 200 和完整内容
+                headers['If-Range'] = validator
+        with self.session.get(url, headers=headers, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+            if offset and response.status_code == 416:
+                # 已写入的部分就是完整文件
+                _, total = self._parse_content_range(response.headers.get('Content-Range'))
+                if total == offset and meta.get('total') in (None, offset):
+                    return offset
+                self._discard_part(part_path)
+                raise DownloadError(f"{file.name} 已下载部分与服务端文件不一致: {offset}/{total}")
+            response.raise_for_status()
+
+            if offset and response.status_code == 206:
+                start, total = self._parse_content_range(response.headers.get('Content-Range'))
+                if start != offset or total is None or meta.get('total') not in (None, total):
+                    self._discard_part(part_path)
+                    raise DownloadError(f"{file.name} 断点续传的范围与已下载部分不一致: "
+                                        f"{response.headers.get('Content-Range')}, 已下载 {offset}/{meta.get('total')}")
+            else:
+                # 从头写入(服务端不支持断点续传，或文件已变化)，记录本次的校验标识和总大小
+                offset = 0
+                content_length = response.headers.get('Content-Length')
+                total = int(content_length) if content_length is not None else None
+                with open(meta_path, 'w', encoding='utf-8') as f:
+                    json.dump({'etag': response.headers.get('ETag'),
+                               'last_modified': response.headers.get('Last-Modified'),
+                               'total': total}, f)
+
+            with open(part_path, 'ab' if offset else 'wb') as f:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    f.write(chunk)
+
+        written = os.path.getsize(part_path)
+        if total is not None and written < total:
+            raise DownloadError(f"下载中断: 已写入 {written}/{total} 字节")
+        return total
+
+    def download_file(self, file: ResourceFile, url: str) -> bool:
+        """下载单个文件，校验通过后原子替换目标文件"""
+        path = self._path(file.name)
+        part_path = path + '.part'
+        for attempt in range(1, self.retries + 1):
+            try:
+                start = time.time()
+                total = self._fetch(url, part_path, file)
+                try:
+                    self._verify(part_path, file, total)
+                except DownloadError:
+                    # 内容有误，不能在此基础上续传
+                    self._discard_part(part_path)
+                    raise
+                os.replace(part_path, path)
+                self._discard_part(part_path)
+                logger.info(f"成功下载数据文件: {file.name}, {os.path.getsize(path)} 字节, 耗时 {time.time() - start:.2f}s")
+                return True
+            except Exception as e:
+                logger.error(f"下载 {file.name} 出错(第 {attempt}/{self.retries} 次): {str(e)}")
+        return False
+
+    def download_files(self, files: List[ResourceFile]) -> bool:
+        """并发下载缺失或校验失败的文件，全部就绪时返回 True"""
+        os.makedirs(self.resources_dir, exist_ok=True)
+        missing = [file for file in files if not self.is_ready(file)]
+        if not missing:
             return True
-            
+
+        logger.info(f"开始下载 {len(missing)} 个数据文件: {[file.name for file in missing]}")
+        try:
+            urls = self.get_download_urls(missing)
         except Exception as e:
-            logger.error(f"下载文件时出错: {str(e)}")
+            logger.error(f"获取下载URL时出错: {str(e)}")
+            return False
+
+        failed = [file.name for file in missing if file.name not in urls]
+        downloadable = [file for file in missing if file.name in urls]
+        if downloadable:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(downloadable)),
+                                    thread_name_prefix='data-download') as executor:
+                results = executor.map(lambda file: self.download_file(file, urls[file.name]), downloadable)
+                failed.extend(file.name for file, ok in zip(downloadable, results) if not ok)
+
+        if failed:
+            logger.error(f"以下数据文件下载失败: {failed}")
             return False
-    
-    
+        return True
+
+    def _download_in_background(self, files: List[ResourceFile]) -> None:
+        if self.download_files(files):
+            logger.info("后台数据文件下载完成")
+
+    def start_background_download(self) -> Optional[threading.Thread]:
+        """在后台线程中下载启动时不需要的文件(只由旧版接口在请求时读取，不需要重新加载数据集)"""
+        files = [file for file in self.manifest if not file.required]
+        if not files or (self._background is not None and self._background.is_alive()):
+            return self._background
+        self._background = threading.Thread(target=self._download_in_background, args=(files,),
+                                            name='data-download', daemon=True)
+        self._background.start()
+        return self._background
+
+    def wait_background(self, timeout: Optional[float] = None) -> bool:
+        """等待后台下载结束，超时返回 False"""
+        if self._background is None:
+            return True
+        self._background.join(timeout)
+        return not self._background.is_alive()
+
     def initialize(self, max_retries: int = 1) -> bool:
-        """初始化数据管理器"""
-        retry_count = 0
+        """初始化数据管理器: 下载启动必需的文件，其余文件转入后台下载"""
         logger.info(f"当前状态: {self._initialized}")
-        if  self._initialized:
+        if self._initialized:
             return True
+        required = [file for file in self.manifest if file.required]
+        retry_count = 0
         while retry_count < max_retries:
-            try:
-                logger.info(f"开始初始化数据 (第 {retry_count + 1} 次尝试)")
-                
-                # 下载文件
-                if not self.download_file():
-                    raise Exception("下载文件失败")
-                
+            logger.info(f"开始初始化数据 (第 {retry_count + 1} 次尝试)")
+            if self.download_files(required):
                 logger.info("下载数据成功")
                 self._initialized = True
+                self.start_background_download()
                 return True
-                
-            except Exception as e:
-                logger.error(f"初始化失败: {str(e)}")
-                retry_count += 1
-                if retry_count < max_retries:
-                    logger.info(f"等待5秒后重试...")
-                    time.sleep(5)
-        
+
+            retry_count += 1
+            if retry_count < max_retries:
+                logger.info(f"等待5秒后重试...")
+                time.sleep(5)
+
         logger.error(f"在 {max_retries} 次尝试后仍然无法初始化数据")
         return False
-    
 
-# 创建全局单例实例
-data_manager = DataManager() 
\ No newline at end of file
+
+# 创建全局实例
+data_manager = DataManager()
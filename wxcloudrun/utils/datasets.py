@@ -0,0 +1,274 @@
+"""
+resources 数据集的分代管理、按需加载与热更新
+
+各数据模块在导入时用 register_dataset 注册数据集的构建函数，组成第 0 代数据集。注册时不加载数据，
+数据集在第一次通过 get_dataset 读取时加载，或由后台预热线程(start_warmup)按注册顺序逐个加载，
+不依赖大数据集的接口在启动后即可响应。就绪情况通过 readiness 查询。
+
+重新加载时在后台线程按注册顺序重新构建全部数据集得到新一代，构建成功后一次性替换当前代，
+任一数据集构建失败则保留当前代。
+
+每个请求开始时固定(pin)当时的当前代，请求期间通过 get_dataset 读取的数据都来自同一代，
+不受中途替换影响。依赖数据集的缓存通过 DatasetGeneration.cache 按代存放，择校结果缓存以代的
+版本号为键，旧代在最后一个使用它的请求结束后释放。
+
+触发重新加载:
+- 配置 DATASET_WATCH_INTERVAL 后，后台线程定期检查 resources 目录下文件的大小和修改时间，
+  连续两次检查到同样的变化后重新加载；
+- 管理接口 POST /api/admin/reload_datasets 立即在当前进程重新加载，并更新 resources/.reload，
+  其他 worker 进程的检查线程据此跟进。
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from contextvars import ContextVar, Token
+from typing import Any, Callable, Dict, Optional, Tuple
+from loguru import logger
+from wxcloudrun.utils import snapshot
+
+# 管理接口触发重新加载时更新的文件，用于通知其他 worker 进程
+RELOAD_TRIGGER_FILE = os.path.join(snapshot.RESOURCES_DIR, '.reload')
+
+
+def resources_fingerprint() -> Tuple:
+    """resources 目录下各文件的 (文件名, 大小, 修改时间)，不含数据快照"""
+    snapshot_name = os.path.basename(snapshot.SNAPSHOT_FILE)
+    entries = []
+    try:
+        with os.scandir(snapshot.RESOURCES_DIR) as it:
+            for entry in it:
+                if entry.is_file() and not entry.name.startswith(snapshot_name):
+                    stat = entry.stat()
+                    entries.append((entry.name, stat.st_size, stat.st_mtime_ns))
+    except OSError:
+        return ()
+    return tuple(sorted(entries))
+
+
+class DatasetGeneration:
+    """一代数据集及其专属缓存"""
+
+    def __init__(self, number: int, fingerprint: Tuple = ()):
+        """
+        :param number: 代号，从 0 开始递增
+        :param fingerprint: 构建时 resources 目录的指纹，检查线程据此判断文件是否变化
+        """
+        self.number = number
+        self.fingerprint = fingerprint
+        self.created_at = time.time()
+        self.datasets: Dict[str, Any] = {}
+        # 尚未加载的数据集及其加载函数
+        self.loaders: Dict[str, Callable[[], Any]] = {}
+        # 数据版本号由代号和构建时的目录指纹确定，创建后不变，读取时不再计算
+        self.version = hashlib.sha256(json.dumps([number, fingerprint]).encode('utf-8')).hexdigest()[:16]
+        self._caches: Dict[str, Dict] = {}
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._cache_lock = threading.Lock()
+
+    def get(self, name: str) -> Any:
+        """读取数据集，未加载时在当前线程加载，同一数据集只加载一次"""
+        try:
+            return self.datasets[name]
+        except KeyError:
+            pass
+        if name not in self.loaders:
+            raise KeyError(f"数据集 {name} 未注册")
+
+        with self._cache_lock:
+            lock = self._load_locks.setdefault(name, threading.Lock())
+        with lock:
+            if name in self.datasets:
+                return self.datasets[name]
+            # 加载函数通过 get_dataset 读取的依赖数据集也来自本代
+            token = _pinned.set(self)
+            start = time.time()
+            try:
+                data = self.loaders[name]()
+            finally:
+                _pinned.reset(token)
+            self.datasets[name] = data
+            del self.loaders[name]
+            logger.info(f"数据集 {name} 加载完成(第 {self.number} 代), 耗时 {time.time() - start:.3f}s")
+            return data
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self.datasets
+
+    def cache(self, name: str) -> Dict:
+        """本代数据专属的缓存字典，数据替换后随旧代一起丢弃"""
+        cache = self._caches.get(name)
+        if cache is None:
+            with self._cache_lock:
+                cache = self._caches.setdefault(name, {})
+        return cache
+
+
+# 数据集构建函数，按注册顺序构建，依赖其他数据集的构建函数通过 get_dataset 读取同一代中已构建好的数据
+_builders: Dict[str, Callable[[], Any]] = {}
+_current = DatasetGeneration(0, resources_fingerprint())
+_pinned: ContextVar[Optional[DatasetGeneration]] = ContextVar('dataset_generation', default=None)
+_reload_lock = threading.Lock()
+_watcher: Optional[threading.Thread] = None
+_warmup: Optional[threading.Thread] = None
+_NOT_LOADED = object()
+
+
+def register_dataset(name: str, builder: Callable[[], Any], data: Any = _NOT_LOADED,
+                     loader: Optional[Callable[[], Any]] = None) -> None:
+    """
+    注册数据集
+    :param name: 数据集名称
+    :param builder: 重新加载时调用的构建函数，出错时应抛出异常而不是返回空数据
+    :param data: 已加载的数据，作为第 0 代的值；不传时第 0 代在第一次读取时加载
+    :param loader: 第 0 代使用的加载函数，默认与 builder 相同；启动时允许缺失文件、回退默认数据的
+                   数据集在这里传入容错的加载函数
+    """
+    _builders[name] = builder
+    if data is _NOT_LOADED:
+        _current.loaders[name] = loader or builder
+    else:
+        _current.datasets[name] = data
+
+
+def current_generation() -> DatasetGeneration:
+    """当前请求固定的一代数据集，不在请求中时为最新一代"""
+    return _pinned.get() or _current
+
+
+def get_dataset(name: str) -> Any:
+    return current_generation().get(name)
+
+
+def pin_generation() -> Token:
+    """请求开始时调用，固定当前代，返回值交给 release_generation"""
+    return _pinned.set(_current)
+
+
+def release_generation(token: Token) -> None:
+    _pinned.reset(token)
+
+
+def reload_datasets() -> Optional[DatasetGeneration]:
+    """重新构建全部数据集并替换当前代，失败时返回 None 并保留当前代"""
+    global _current
+    with _reload_lock:
+        previous = _current
+        fingerprint = resources_fingerprint()
+        # 重新读取快照文件，未变化的数据集仍可从快照加载
+        snapshot.refresh_snapshot()
+
+        generation = DatasetGeneration(previous.number + 1, fingerprint)
+        generation.loaders.update(_builders)
+        start = time.time()
+        try:
+            for name in list(_builders):
+                generation.get(name)
+        except Exception as e:
+            logger.error(f"重新加载数据集 {name} 失败，继续使用第 {previous.number} 代数据: {str(e)}")
+            logger.exception(e)
+            # 同一批文件不再重复尝试，等待下一次变化
+            previous.fingerprint = fingerprint
+            return None
+
+        _current = generation
+        logger.info(f"数据集已切换到第 {generation.number} 代(版本 {generation.version}), "
+                    f"共 {len(generation.datasets)} 个数据集, 耗时 {time.time() - start:.3f}s")
+        return generation
+
+
+def reload_in_background() -> bool:
+    """在后台线程中重新加载，已有重新加载在进行时返回 False"""
+    if _reload_lock.locked():
+        return False
+    threading.Thread(target=reload_datasets, name='dataset-reload', daemon=True).start()
+    return True
+
+
+def request_reload() -> bool:
+    """管理接口触发重新加载: 更新触发文件通知其他进程，并在当前进程后台重新加载"""
+    try:
+        with open(RELOAD_TRIGGER_FILE, 'w', encoding='utf-8') as f:
+            f.write(str(time.time()))
+    except OSError as e:
+        logger.warning(f"更新重新加载触发文件失败: {str(e)}")
+    return reload_in_background()
+
+
+def _watch(interval: float) -> None:
+    pending = None
+    while True:
+        time.sleep(interval)
+        fingerprint = resources_fingerprint()
+        if fingerprint == _current.fingerprint:
+            pending = None
+            continue
+        # 文件可能还在写入，连续两次检查结果相同再重新加载
+        if fingerprint != pending:
+            pending = fingerprint
+            continue
+        pending = None
+        logger.info("检测到 resources 目录变化，重新加载数据集")
+        reload_datasets()
+
+
+def start_watcher(interval: float) -> bool:
+    """启动 resources 目录检查线程，interval 不大于 0 时不启动；每个进程只启动一次"""
+    global _watcher
+    if interval <= 0 or _watcher is not None:
+        return False
+    _watcher = threading.Thread(target=_watch, args=(interval,), name='dataset-watcher', daemon=True)
+    _watcher.start()
+    logger.info(f"已启动数据集检查线程，间隔 {interval}s")
+    return True
+
+
+def warm_up() -> bool:
+    """按注册顺序加载当前代所有尚未加载的数据集，全部成功时返回 True"""
+    generation = _current
+    start = time.time()
+    ok = True
+    for name in list(_builders):
+        try:
+            generation.get(name)
+        except Exception as e:
+            ok = False
+            logger.error(f"预加载数据集 {name} 失败: {str(e)}")
+            logger.exception(e)
+    logger.info(f"数据集预加载完成(第 {generation.number} 代), 耗时 {time.time() - start:.3f}s")
+    return ok
+
+
+def start_warmup() -> bool:
+    """在后台线程中预加载数据集，每个进程只启动一次"""
+    global _warmup
+    if _warmup is not None:
+        return False
+    _warmup = threading.Thread(target=warm_up, name='dataset-warmup', daemon=True)
+    _warmup.start()
+    return True
+
+
+def readiness() -> Dict[str, Any]:
+    """当前代各数据集是否已加载"""
+    generation = _current
+    loaded = {name: generation.is_loaded(name) for name in _builders}
+    return {
+        'ready': all(loaded.values()),
+        'generation': generation.number,
+        'datasets': loaded
+    }
+
+
+def status() -> Dict[str, Any]:
+    """当前代的数据集信息"""
+    generation = _current
+    return {
+        'generation': generation.number,
+        'version': generation.version,
+        'created_at': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(generation.created_at)),
+        'reloading': _reload_lock.locked(),
+        'datasets': list(_builders),
+        'loaded': [name for name in _builders if generation.is_loaded(name)]
+    }
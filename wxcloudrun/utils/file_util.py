@@ -1,20 +1,30 @@
 import json
 import os
 from loguru import logger
+from wxcloudrun.utils.school_fields import precompute_school_fields
+from wxcloudrun.utils.snapshot import load_dataset, RESOURCES_DIR
+from wxcloudrun.utils.datasets import register_dataset, get_dataset
+from wxcloudrun.utils.school_rows import build_school_rows
 
-# 全局变量存储数据
-SCHOOL_DATAS = []  # rich_fx_flat_v2.json
-MAJOR_DATA = []   # fx_flat.json
-CITY_DATA = {}    # city_2_province.txt
-EMPLOYMENT_DATA = {}  # aggregated_employment_data.jsonl
-CITY_LEVEL_MAP = city_level_map = {
-    '211': set(),
-    '985': set(),
-    'c9': set(['北京大学', '清华大学', '复旦大学', '上海交通大学', '浙江大学', '南京大学', '中国科学技术大学', '哈尔滨工业大学', '西安交通大学'])
+# 数据集按需加载，以下模块属性在第一次访问时读取当前一代的数据集(见 __getattr__)
+_DATASET_ATTRS = {
+    'SCHOOL_DATAS': 'rich_fx_flat_v2',  # rich_fx_flat_v2.json，元素为 SchoolRow
+    'MAJOR_DATA': 'fx_flat',  # fx_flat.json
+    'CITY_DATA': 'city_2_province',  # city_2_province.txt
+    'EMPLOYMENT_DATA': 'aggregated_employment_data',  # aggregated_employment_data.jsonl
+    # {'985', '211', 'c9'} 到学校名称集合的映射，985/211 随 rich_fx_flat_v2 按代构建
+    'CITY_LEVEL_MAP': 'school_levels',
+    'city_level_map': 'school_levels',
 }
+# C9 高校名单，不随数据文件变化
+C9_SCHOOLS = frozenset(['北京大学', '清华大学', '复旦大学', '上海交通大学', '浙江大学', '南京大学', '中国科学技术大学', '哈尔滨工业大学', '西安交通大学'])
 
-# 添加标志位标识是否已加载数据
-_DATA_LOADED = False
+# 数据文件路径
+SCHOOL_DATA_PATHS = [os.path.join(RESOURCES_DIR, 'rich_fx_flat_v2_a.json'),
+                     os.path.join(RESOURCES_DIR, 'rich_fx_flat_v2_b.json')]
+MAJOR_DATA_PATH = os.path.join(RESOURCES_DIR, 'fx_flat.json')
+CITY_DATA_PATH = os.path.join(RESOURCES_DIR, 'city_2_province.txt')
+EMPLOYMENT_DATA_PATH = os.path.join(RESOURCES_DIR, 'aggregated_employment_data.jsonl')
 
 def loads_json(path):
     """读取jsonl格式文件"""
@@ -25,57 +35,75 @@ def loads_json(path):
             ds.append(d)
     return ds
 
-def load_all_data():
-    """加载所有数据文件"""
-    global SCHOOL_DATAS, MAJOR_DATA, CITY_DATA, EMPLOYMENT_DATA, CITY_LEVEL_MAP, _DATA_LOADED
-    
-    # 如果数据已加载,直接返回
-    if _DATA_LOADED:
-        return
-    
-    # 获取resources目录路径
-    cur_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    resources_dir = os.path.join(cur_dir, 'resources')
-    
-    # 加载学校数据
-    school_data_path = os.path.join(resources_dir, 'rich_fx_flat_v2_a.json')
-    school_data_path_2 = os.path.join(resources_dir, 'rich_fx_flat_v2_b.json')
-    SCHOOL_DATAS = loads_json(school_data_path) + loads_json(school_data_path_2)
-    logger.info(f"加载了 {len(SCHOOL_DATAS)} 条学校数据")
-    
-    # 加载专业数据
-    major_data_path = os.path.join(resources_dir, 'fx_flat.json')
-    MAJOR_DATA = loads_json(major_data_path)
-    logger.info(f"加载了 {len(MAJOR_DATA)} 条专业数据")
-    
-    # 加载城市数据
-    city_data_path = os.path.join(resources_dir, 'city_2_province.txt')
-    with open(city_data_path, 'r', encoding='utf-8') as f:
+def _load_school_datas(paths):
+    """
+    加载学校专业行数据，预计算只依赖静态数据的派生字段(层级、报录比、分数线、招生人数)，
+    并转换为紧凑的 SchoolRow 存储
+    """
+    school_datas = []
+    for path in paths:
+        school_datas.extend(loads_json(path))
+    for data in school_datas:
+        precompute_school_fields(data, C9_SCHOOLS)
+    return build_school_rows(school_datas, C9_SCHOOLS)
+
+def _load_city_data(path):
+    """加载城市到省份的映射"""
+    city_data = {}
+    with open(path, 'r', encoding='utf-8') as f:
         for line in f:
             city, province = line.strip().split('\t')
-            CITY_DATA[city] = province
-    logger.info(f"加载了 {len(CITY_DATA)} 条城市数据")
-    
-    # 加载就业数据
-    employment_data_path = os.path.join(resources_dir, 'aggregated_employment_data.jsonl')
-    with open(employment_data_path, 'r', encoding='utf-8') as f:
+            city_data[city] = province
+    return city_data
+
+def _load_employment_data(path):
+    """加载各学校的就业数据"""
+    employment_data = {}
+    with open(path, 'r', encoding='utf-8') as f:
         for line in f:
             try:
                 data = json.loads(line)
-                EMPLOYMENT_DATA[data['school_name']] = data['years_data']
+                employment_data[data['school_name']] = data['years_data']
             except json.JSONDecodeError as e:
                 logger.error(f"解析就业数据行时出错: {str(e)}")
                 continue
-    logger.info(f"加载了 {len(EMPLOYMENT_DATA)} 所学校的就业数据")
+    return employment_data
 
-    for data in SCHOOL_DATAS:
+def build_school_datas():
+    school_datas = load_dataset('rich_fx_flat_v2', SCHOOL_DATA_PATHS, lambda: _load_school_datas(SCHOOL_DATA_PATHS))
+    logger.info(f"加载了 {len(school_datas)} 条学校数据")
+    return school_datas
+
+def build_school_levels():
+    """按同一代的 rich_fx_flat_v2 构建各层级的学校名称集合，数据更新后已摘掉的 985/211 不再保留"""
+    levels = {'985': set(), '211': set(), 'c9': set(C9_SCHOOLS)}
+    for data in get_dataset('rich_fx_flat_v2'):
         school_name, is_985, is_211 = data['school_name'], data['is_985'], data['is_211']
         if is_985 == "1":
-            CITY_LEVEL_MAP['985'].add(school_name)
+            levels['985'].add(school_name)
         if is_211 == "1":
-            CITY_LEVEL_MAP['211'].add(school_name)
-            
-    # 标记数据已加载
-    _DATA_LOADED = True
+            levels['211'].add(school_name)
+    logger.info(f"985/211 学校数量: {len(levels['985'])}/{len(levels['211'])}")
+    return levels
+
+def build_major_data():
+    return load_dataset('fx_flat', [MAJOR_DATA_PATH], lambda: loads_json(MAJOR_DATA_PATH))
+
+def build_city_data():
+    return load_dataset('city_2_province', [CITY_DATA_PATH], lambda: _load_city_data(CITY_DATA_PATH))
+
+def build_employment_data():
+    return load_dataset('aggregated_employment_data', [EMPLOYMENT_DATA_PATH],
+                        lambda: _load_employment_data(EMPLOYMENT_DATA_PATH))
+
+def __getattr__(name):
+    if name in _DATASET_ATTRS:
+        return get_dataset(_DATASET_ATTRS[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-load_all_data()
\ No newline at end of file
+# 注册为按需加载、可热更新的数据集，运行期间通过 get_dataset 读取当前请求对应的一代
+register_dataset('rich_fx_flat_v2', build_school_datas)
+register_dataset('school_levels', build_school_levels)
+register_dataset('fx_flat', build_major_data)
+register_dataset('city_2_province', build_city_data)
+register_dataset('aggregated_employment_data', build_employment_data)
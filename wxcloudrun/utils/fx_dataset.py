@@ -0,0 +1,152 @@
+from collections import Counter
+from typing import Dict, List, Set, Tuple
+from loguru import logger
+import wxcloudrun.utils.file_util  # 导入时注册 fx_flat 数据集
+from wxcloudrun.utils.datasets import register_dataset, get_dataset
+from wxcloudrun.utils.result_cache import ResultCache
+from wxcloudrun.utils.text_index import NgramIndex, normalize
+import config
+
+
+class FxDataset:
+    """fx_flat.json 数据集及其派生视图
+
+    进程内只解析一次 fx_flat.json(即 fx_flat 数据集)，学校搜索、学校结构、
+    专业/方向查询等接口共用同一份行数据和派生视图，不再各自持有一份拷贝。
+    """
+
+    def __init__(self, rows: List[Dict]):
+        """
+        :param rows: fx_flat.json 的行数据，每行包含 学校名称/院系名称/专业名称/方向名称
+        """
+        self.rows = rows
+        # 学校名称集合
+        self.schools: Set[str] = set()
+        # 学校-学院-专业的层级结构
+        self.school_structure: Dict[str, Dict[str, List[str]]] = {}
+
+        for item in rows:
+            school = item['学校名称']
+            college = item['院系名称']
+            major = item['专业名称']
+            self.schools.add(school)
+
+            colleges = self.school_structure.setdefault(school, {})
+            majors = colleges.setdefault(college, [])
+            if major not in majors:
+                majors.append(major)
+
+        logger.info(f"fx_flat 数据集构建完成: {len(rows)} 条专业方向数据, {len(self.schools)} 所学校")
+
+    @staticmethod
+    def to_major_direction(item: Dict) -> Dict[str, str]:
+        """专业/方向查询接口返回的单条记录"""
+        return {'collage_name': item['院系名称'], 'major': item['专业名称'], 'fx': item['方向名称']}
+
+
+class MajorDirectionIndex:
+    """专业/方向查询索引
+
+    加载时把 fx_flat 的行转为 (专业, 方向, 院系) 记录表，默认同一专业和方向只保留第一次出现的院系，
+    并在专业名称和方向名称上分别建立 n-gram 索引。查询结果按匹配程度排序，
+    完整的排序结果按查询词缓存，翻页时直接切片。
+    """
+
+    # 专业名称匹配排在方向名称匹配之前
+    _MAJOR, _DIRECTION = 0, 1
+
+    def __init__(self, rows: List[Dict], cache_size: int = 0, unique: bool = True):
+        """
+        :param rows: fx_flat.json 的行数据
+        :param cache_size: 查询结果缓存的条目数，为 0 时不缓存
+        :param unique: 是否按 (专业, 方向) 去重，为 False 时每行一条记录
+        """
+        self.records: List[Dict[str, str]] = []
+        major_records: Dict[str, List[int]] = {}
+        direction_records: Dict[str, List[int]] = {}
+        # 开设该专业、方向的行数作为热度
+        major_popularity: Counter = Counter()
+        direction_popularity: Counter = Counter()
+        saw = set()
+        for item in rows:
+            major, direction = item['专业名称'], item['方向名称']
+            major_popularity[major] += 1
+            direction_popularity[direction] += 1
+            if unique:
+                if (major, direction) in saw:
+                    continue
+                saw.add((major, direction))
+            major_records.setdefault(major, []).append(len(self.records))
+            direction_records.setdefault(direction, []).append(len(self.records))
+            self.records.append(FxDataset.to_major_direction(item))
+
+        self._indexes = []
+        for field, name_records, popularity in ((self._MAJOR, major_records, major_popularity),
+                                                (self._DIRECTION, direction_records, direction_popularity)):
+            index = NgramIndex(name_records, popularity)
+            self._indexes.append((field, index, [name_records[name] for name in index.names]))
+        self._cache = ResultCache(maxsize=cache_size, ttl=config.RESULT_CACHE_TTL)
+
+    def search(self, query: str) -> Tuple[int, ...]:
+        """全部匹配记录的序号，按 匹配类型、匹配位置、专业优先于方向、热度、名称长度 排序"""
+        query = normalize(query)
+        cached = self._cache.get(query)
+        if cached is not None:
+            return cached
+
+        best: Dict[int, Tuple] = {}
+        for field, index, name_records in self._indexes:
+            for name_id, (kind, position, popularity, length, _) in index.match(query).items():
+                rank = (kind, position, field, popularity, length)
+                for record_id in name_records[name_id]:
+                    if record_id not in best or rank < best[record_id]:
+                        best[record_id] = rank
+        result = tuple(sorted(best, key=lambda record_id: (best[record_id], record_id)))
+        self._cache.put(query, result)
+        return result
+
+    def page(self, query: str, limit: int, offset: int = 0) -> List[Dict[str, str]]:
+        """第 offset 条起最多 limit 条匹配记录"""
+        return [self.records[i] for i in self.search(query)[offset:offset + limit]]
+
+
+class SchoolMajorIndex:
+    """按学校分区的专业/方向查询索引
+
+    加载时把 fx_flat 的行按学校名称分区，每个分区有自己的专业名、方向名索引(不去重)，
+    查询某校的专业方向时只检查该校的行。
+    """
+
+    def __init__(self, rows: List[Dict]):
+        """
+        :param rows: fx_flat.json 的行数据
+        """
+        partitions: Dict[str, List[Dict]] = {}
+        for item in rows:
+            partitions.setdefault(item['学校名称'], []).append(item)
+        self.partitions: Dict[str, MajorDirectionIndex] = {
+            school: MajorDirectionIndex(school_rows, unique=False) for school, school_rows in partitions.items()}
+        logger.info(f"学校专业方向索引构建完成: {len(self.partitions)} 所学校, {len(rows)} 条专业方向数据")
+
+    def search(self, school_name: str, query: str) -> List[Dict[str, str]]:
+        """该校全部匹配的专业方向记录，按匹配程度排序；学校不存在时返回空列表"""
+        partition = self.partitions.get(school_name)
+        if partition is None:
+            return []
+        return [partition.records[i] for i in partition.search(query)]
+
+
+def _build_major_direction_index(rows: List[Dict]) -> MajorDirectionIndex:
+    index = MajorDirectionIndex(rows, config.QUERY_CACHE_SIZE)
+    logger.info(f"专业方向索引构建完成: {len(index.records)} 条去重记录")
+    return index
+
+
+def get_fx_dataset() -> FxDataset:
+    """获取当前请求对应的一代 fx_flat 数据集"""
+    return get_dataset('fx_dataset')
+
+
+register_dataset('fx_dataset', lambda: FxDataset(get_dataset('fx_flat')))
+register_dataset('major_direction_index', lambda: _build_major_direction_index(get_dataset('fx_flat')))
+register_dataset('school_major_index', lambda: SchoolMajorIndex(get_dataset('fx_flat')))
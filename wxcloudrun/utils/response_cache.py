@@ -0,0 +1,47 @@
+"""
+查询类接口的响应体缓存
+
+学校结构、学校详情、城市搜索、学校搜索的结果只在数据集更新时变化。按 接口 + 请求参数 + 数据集版本
+缓存序列化好的 JSON 字节串及其 ETag，命中时不再构造 dict 和调用 jsonify；
+GET/HEAD 请求带上 If-None-Match 且内容未变时返回 304，不再重复传输响应体。
+"""
+import hashlib
+from typing import Any, Callable, Tuple
+from flask import Response, request
+from wxcloudrun.response import dump_json
+from wxcloudrun.utils.datasets import current_generation
+from wxcloudrun.utils.result_cache import ResultCache, make_cache_key
+import config
+
+response_cache = ResultCache(maxsize=config.RESPONSE_CACHE_SIZE, ttl=config.RESULT_CACHE_TTL)
+
+
+def _entry(body: bytes) -> Tuple[bytes, str]:
+    # ETag 取响应体的摘要，各 worker 对相同内容给出相同的 ETag
+    return body, hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def cached_json_response(endpoint: str, params: Any, build: Callable[[], Any]) -> Response:
+    """
+    返回缓存的 JSON 响应，未命中时调用 build 生成
+    :param endpoint: 接口名称
+    :param params: 影响结果的请求参数，可 JSON 序列化
+    :param build: 生成响应内容，返回可 JSON 序列化的对象，或已序列化的字节串
+    """
+    key = make_cache_key({'dataset_version': current_generation().version, 'endpoint': endpoint, 'params': params})
+    entry = response_cache.get(key)
+    if entry is None:
+        result = build()
+        entry = _entry(result if isinstance(result, bytes) else dump_json(result))
+        response_cache.put(key, entry)
+
+    body, etag = entry
+    # 条件请求只对 GET/HEAD 生效；POST 的 304 不会被客户端用缓存的响应体替代，只返回 ETag
+    if request.method in ('GET', 'HEAD') and request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    # 客户端可以缓存，但每次使用前需带 If-None-Match 向服务端确认
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
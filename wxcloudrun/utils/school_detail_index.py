@@ -0,0 +1,62 @@
+from typing import Dict, List, Optional, Tuple
+from loguru import logger
+from wxcloudrun.response import dump_json
+
+
+class SchoolDetail:
+    """一个学校专业的详情接口返回内容，JSON 字节串在第一次查询时生成并保留"""
+
+    __slots__ = ('row', 'employment', '_body')
+
+    def __init__(self, row, employment: List):
+        self.row = row
+        self.employment = employment
+        self._body: Optional[bytes] = None
+
+    def payload(self) -> Dict:
+        """接口返回的 data 字段: 学校专业的原始字段加上就业数据 jy，加载时预计算的派生字段不返回"""
+        data = self.row.to_dict()
+        data['jy'] = self.employment
+        return data
+
+    @property
+    def body(self) -> bytes:
+        """完整的响应体 {'code': 0, 'data': ...}"""
+        if self._body is None:
+            self._body = dump_json({'code': 0, 'data': self.payload()})
+        return self._body
+
+
+class SchoolDetailIndex:
+    """学校专业详情的哈希索引
+
+    加载时按 (学校名称, 专业名称) 和 (学校名称, 专业代码) 建立到详情的映射，重复的键保留第一条，
+    与原先顺序遍历找到的第一条一致。各详情的 JSON 响应体不在加载时生成，而是在第一次被查询时序列化并保留，
+    避免每个 worker 为全部学校专业多持有一份序列化后的数据。
+    """
+
+    # 找不到学校专业时的响应体
+    NOT_FOUND_BODY = dump_json({'code': 0, 'data': None})
+
+    def __init__(self, school_datas, employment_data: Dict[str, List]):
+        """
+        :param school_datas: rich_fx_flat_v2 数据集
+        :param employment_data: 学校名称到就业数据的映射
+        """
+        self.by_major: Dict[Tuple[str, str], SchoolDetail] = {}
+        self.by_major_code: Dict[Tuple[str, str], SchoolDetail] = {}
+        for row in school_datas:
+            school_name = row.get('school_name')
+            detail = SchoolDetail(row, employment_data.get(school_name, []))
+            self.by_major.setdefault((school_name, row.get('major')), detail)
+            self.by_major_code.setdefault((school_name, row.get('major_code')), detail)
+        logger.info(f"学校专业详情索引构建完成: {len(self.by_major)} 个学校专业")
+
+    def find(self, school_name: str, major_name: Optional[str] = None,
+             major_code: Optional[str] = None) -> Optional[SchoolDetail]:
+        """按专业名称查找，未提供专业名称时按专业代码查找"""
+        if major_name:
+            return self.by_major.get((school_name, major_name))
+        if major_code:
+            return self.by_major_code.get((school_name, major_code))
+        return None
@@ -0,0 +1,96 @@
+from typing import Dict, List, Any, Set
+from loguru import logger
+
+# 加载时预计算并挂在每行学校数据上的派生字段
+DERIVED_FIELDS = ('blb_score', 'fsx_score', 'nlqrs', 'levels')
+
+
+def build_levels(is_985: str, is_211: str, school_name: str, c9_schools: Set[str]) -> List[str]:
+    """获取学校层级"""
+    levels = []
+    if is_985 == "1":
+        levels.append("985")
+    if is_211 == "1":
+        levels.append("211")
+    if school_name in c9_schools:
+        levels.append("C9")
+    return levels
+
+
+def build_blb_score(blbs: List[Dict]) -> Dict[str, str]:
+    """处理报录比数据，返回 {年份: 报录比}"""
+    blb_score = {}
+    for blb in blbs:
+        try:
+            year = blb.get('year')
+            if year:
+                blb_score[str(year)] = blb.get('blb', '0%')
+        except:
+            continue
+    return blb_score
+
+
+def build_fsx_score(fsxs: List[Dict]) -> List[Dict]:
+    """处理分数线数据，按年份整理总分和各科目分数"""
+    fsx_score = []
+    for fsx in fsxs:
+        try:
+            year_data = {
+                'year': fsx.get('year'),
+                '总分': 0,
+                '科目1': 0,
+                '科目2': 0,
+                '科目3': 0,
+                '科目4': 0
+            }
+            for subject in fsx.get('data', []):
+                if subject.get('subject') == '总分':
+                    year_data['总分'] = subject.get('score', 0)
+                elif '科一' in subject.get('subject', ''):
+                    year_data['科目1'] = subject.get('score', 0)
+                elif '科二' in subject.get('subject', ''):
+                    year_data['科目2'] = subject.get('score', 0)
+                elif '科三' in subject.get('subject', ''):
+                    year_data['科目3'] = subject.get('score', 0)
+                elif '科四' in subject.get('subject', ''):
+                    year_data['科目4'] = subject.get('score', 0)
+
+            # 检查是否包含null或NaN
+            has_invalid_score = False
+            for score in year_data.values():
+                if score is None or (isinstance(score, float) and str(score).lower() == 'nan'):
+                    has_invalid_score = True
+                    break
+
+            # 只有当所有分数都有效时才添加数据
+            if not has_invalid_score:
+                fsx_score.append(year_data)
+        except Exception as e:
+            logger.error(f"处理分数线数据时出错: {str(e)}")
+            continue
+    return fsx_score
+
+
+def count_enrollment(directions: List[Dict]) -> int:
+    """计算各研究方向招生人数之和(nlqrs)，从 zsrs 中提取数字字符"""
+    nlqrs = 0
+    for direction in directions:
+        try:
+            zsrs = direction.get('zsrs', '')
+            # 提取数字字符
+            num_str = ''.join(c for c in zsrs if c.isdigit())
+            if num_str:
+                nlqrs += int(num_str)
+        except Exception as e:
+            logger.error(f"处理招生人数时出错: {str(e)}, zsrs={direction.get('zsrs')}")
+            continue
+    return nlqrs
+
+
+def precompute_school_fields(school_data: Dict[str, Any], c9_schools: Set[str]) -> None:
+    """在学校数据行上预计算只依赖静态数据的派生字段"""
+    school_data['levels'] = build_levels(school_data['is_985'], school_data['is_211'],
+                                         school_data['school_name'], c9_schools)
+    school_data['blb_score'] = build_blb_score(school_data.get('blb', []))
+    school_data['fsx_score'] = build_fsx_score(school_data.get('fsx', []))
+    school_data['nlqrs'] = count_enrollment(school_data.get('directions', []))
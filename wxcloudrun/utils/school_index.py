@@ -0,0 +1,95 @@
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from loguru import logger
+from wxcloudrun.utils.school_rows import SchoolRow, PROVINCES, CITIES, LEVEL_985, LEVEL_211, LEVEL_C9
+
+
+class SchoolIndex:
+    """SCHOOL_DATAS 的倒排索引
+
+    加载时按 (省份, 城市)、专业名称、研究方向名称、学校层次建立倒排表，
+    请求时对倒排表求交集即可得到候选行号，不再逐行扫描全表。
+    """
+
+    def __init__(self, school_datas: List[SchoolRow], ranked_schools: Set[str]):
+        """
+        :param school_datas: 学校专业行数据(SCHOOL_DATAS)
+        :param ranked_schools: 有软科排名的学校名称集合，没有排名的学校不参与推荐
+        """
+        # 地区倒排表以 (省份编码, 城市编码) 为键
+        self.by_area: Dict[Tuple[int, int], Set[int]] = {}
+        self.by_major: Dict[str, Set[int]] = {}
+        self.by_direction: Dict[str, Set[int]] = {}
+        self.by_level: Dict[str, Set[int]] = {'c9': set(), '985': set(), '211': set()}
+        self.ranked: Set[int] = set()
+
+        unranked_schools = set()
+        for row_id, school_data in enumerate(school_datas):
+            school_name = school_data['school_name']
+            if school_name not in ranked_schools:
+                unranked_schools.add(school_name)
+                continue
+            self.ranked.add(row_id)
+
+            area = (school_data.province_code, school_data.city_code)
+            self.by_area.setdefault(area, set()).add(row_id)
+            self.by_major.setdefault(school_data['major'], set()).add(row_id)
+            for direction in school_data.get('directions', []):
+                self.by_direction.setdefault(direction['yjfxmc'], set()).add(row_id)
+
+            if school_data.level_code & LEVEL_C9:
+                self.by_level['c9'].add(row_id)
+            if school_data.level_code & LEVEL_985:
+                self.by_level['985'].add(row_id)
+            if school_data.level_code & LEVEL_211:
+                self.by_level['211'].add(row_id)
+
+        logger.info(f"学校索引构建完成: {len(self.ranked)} 条候选数据, "
+                    f"{len(unranked_schools)} 所学校没有软科排名数据被过滤")
+
+    @staticmethod
+    def _union(postings: Iterable[Optional[Set[int]]]) -> Set[int]:
+        result = set()
+        for posting in postings:
+            if posting:
+                result |= posting
+        return result
+
+    def candidate_ids(self, areas: List[Tuple[str, str]], majors_and_directions: Set[str],
+                      levels: List[str]) -> List[int]:
+        """
+        根据筛选条件求候选行号
+        :param areas: 目标(省份, 城市)列表，为空表示不限
+        :param majors_and_directions: 目标专业和研究方向名称集合，为空表示不限
+        :param levels: 目标学校层次，为空表示不限
+        :return: 按原始数据顺序排列的行号列表
+        """
+        filters = []
+        if areas:
+            filters.append(self._union(
+                self.by_area.get((PROVINCES.lookup(province), CITIES.lookup(city)))
+                for province, city in areas
+            ))
+        if majors_and_directions:
+            filters.append(self._union(
+                [self.by_major.get(name) for name in majors_and_directions] +
+                [self.by_direction.get(name) for name in majors_and_directions]
+            ))
+        if levels:
+            # 与原逻辑一致: c9 不区分大小写，985/211 精确匹配；双一流暂无数据支持
+            level_keys = []
+            if 'c9' in [level.lower() for level in levels]:
+                level_keys.append('c9')
+            if '985' in levels:
+                level_keys.append('985')
+            if '211' in levels:
+                level_keys.append('211')
+            filters.append(self._union(self.by_level[key] for key in level_keys))
+
+        # 从最小的倒排表开始求交集
+        filters.sort(key=len)
+        candidates = set(filters[0]) if filters else set(self.ranked)
+        for posting in filters[1:]:
+            candidates &= posting
+            if not candidates:
+                break
+        return sorted(candidates)
@@ -0,0 +1,170 @@
+import sys
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+from wxcloudrun.utils.school_fields import DERIVED_FIELDS
+
+# 学校层次的位编码
+LEVEL_985 = 1
+LEVEL_211 = 2
+LEVEL_C9 = 4
+
+# 只对较短的字符串值做驻留，长文本(如简介)基本不重复，驻留没有收益
+_INTERN_MAX_LEN = 64
+
+
+class Vocabulary:
+    """字符串与小整数编码的双向映射，同一进程内编码稳定"""
+
+    def __init__(self):
+        self.codes: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def encode(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            value = sys.intern(value)
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+
+    def lookup(self, value: str) -> Optional[int]:
+        """查询已有编码，不存在时返回 None"""
+        return self.codes.get(value)
+
+    def decode(self, code: int) -> str:
+        return self.values[code]
+
+
+PROVINCES = Vocabulary()
+CITIES = Vocabulary()
+
+# 相同层级组合的行共用一个 tuple
+_LEVELS_CACHE: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+
+def compact(value: Any) -> Any:
+    """递归驻留嵌套结构中的字典键和短字符串，重复的省份、城市、科目名等只保留一份"""
+    if isinstance(value, str):
+        return sys.intern(value) if len(value) <= _INTERN_MAX_LEN else value
+    if isinstance(value, dict):
+        return {sys.intern(k) if isinstance(k, str) else k: compact(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [compact(v) for v in value]
+    return value
+
+
+class SchoolRow:
+    """SCHOOL_DATAS 中的一行学校专业数据
+
+    使用 __slots__ 存储，省份/城市以小整数编码保存，学校层次以位编码保存，
+    同时保留 dict 风格的访问方式(row['school_name']、row.get('directions', []))，
+    原有按字典读取行数据的代码无需修改。
+    """
+
+    # 原始数据字段，按数据文件中的顺序
+    FIELDS = ('school_name', 'school_code', 'is_985', 'is_211', 'departments', 'major', 'major_code',
+              'blb', 'fsx', 'directions', 'province', 'city')
+
+    __slots__ = ('school_name', 'school_code', 'is_985', 'is_211', 'departments', 'major', 'major_code',
+                 'blb', 'fsx', 'directions', 'province_code', 'city_code', 'level_code',
+                 'levels', 'blb_score', 'fsx_score', 'nlqrs', 'extra')
+
+    def __init__(self, data: Dict[str, Any], c9_schools: Set[str]):
+        """
+        :param data: 原始行数据(已预计算派生字段)
+        :param c9_schools: C9 学校名称集合
+        """
+        self.extra: Optional[Dict[str, Any]] = None
+        for key, value in data.items():
+            self[key] = compact(value)
+
+        level_code = 0
+        if self.get('is_985') == "1":
+            level_code |= LEVEL_985
+        if self.get('is_211') == "1":
+            level_code |= LEVEL_211
+        if self.get('school_name') in c9_schools:
+            level_code |= LEVEL_C9
+        self.level_code = level_code
+
+    @property
+    def province(self) -> str:
+        return PROVINCES.decode(self.province_code)
+
+    @property
+    def city(self) -> str:
+        return CITIES.decode(self.city_code)
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self.FIELDS or key in DERIVED_FIELDS:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key)
+        if self.extra is not None and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key == 'province':
+            self.province_code = PROVINCES.encode(value)
+        elif key == 'city':
+            self.city_code = CITIES.encode(value)
+        elif key == 'levels' and value is not None:
+            levels = tuple(value)
+            self.levels = _LEVELS_CACHE.setdefault(levels, levels)
+        elif key in self.FIELDS or key in DERIVED_FIELDS:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[sys.intern(key)] = value
+
+    def __contains__(self, key: str) -> bool:
+        try:
+            self[key]
+            return True
+        except KeyError:
+            return False
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self) -> List[str]:
+        """原始数据字段名，不含加载时预计算的派生字段"""
+        keys = [key for key in self.FIELDS if key in self]
+        if self.extra:
+            keys.extend(self.extra)
+        return keys
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        for key in self.keys():
+            yield key, self[key]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为原始 dict 格式，用于接口返回"""
+        return dict(self.items())
+
+    def __getstate__(self) -> Tuple:
+        # 省份/城市编码只在本进程内有效，序列化(数据快照)时保存原字符串
+        state = {slot: getattr(self, slot) for slot in self.__slots__ if hasattr(self, slot)}
+        state.pop('province_code', None)
+        state.pop('city_code', None)
+        return state, self.get('province'), self.get('city')
+
+    def __setstate__(self, state: Tuple) -> None:
+        slots, province, city = state
+        for slot, value in slots.items():
+            setattr(self, slot, value)
+        if province is not None:
+            self['province'] = province
+        if city is not None:
+            self['city'] = city
+
+
+def build_school_rows(school_datas: List[Dict], c9_schools: Set[str]) -> List[SchoolRow]:
+    """将原始行数据转换为紧凑的 SchoolRow 列表"""
+    return [SchoolRow(data, c9_schools) for data in school_datas]
@@ -0,0 +1,244 @@
+"""
+resources 数据集的二进制快照
+
+启动时各数据模块在导入阶段逐行 json.loads 数 MB 的 JSONL 文件，这是冷启动的主要耗时。
+构建阶段把这些数据集解析结果编译成一个带版本号和校验和的 pickle(protocol 5) 快照，
+服务启动时直接读取快照；快照缺失、校验失败或源文件已变化时回退到原 JSONL 加载逻辑。
+
+构建快照(在项目根目录执行):
+    python -m wxcloudrun.utils.snapshot
+
+快照文件结构: pickle 序列化的文件头 {'version', 'checksum', 'datasets', 'sections', 'created_at'}，
+后面紧跟数据体。数据体由各数据集分别 pickle 序列化的 {'sources': 源文件指纹, 'data': 数据} 依次拼接而成，
+sections 记录每个数据集在数据体中的 (偏移, 长度)，读取某个数据集时只反序列化对应的一段；
+checksum 为整个数据体的 sha256。
+"""
+import hashlib
+import importlib
+import os
+import pickle
+import sys
+import threading
+import time
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from loguru import logger
+
+# 快照格式版本，快照结构或数据集解析逻辑变化时需要递增
+SNAPSHOT_VERSION = 3
+PICKLE_PROTOCOL = 5
+
+RESOURCES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'resources')
+SNAPSHOT_FILE = os.path.join(RESOURCES_DIR, 'datasets.snapshot')
+
+# 构建快照时需要导入的数据模块，这些模块在导入时注册数据集，数据集通过 load_dataset 加载
+SNAPSHOT_MODULES = [
+    'wxcloudrun.utils.file_util',
+    'wxcloudrun.score_card.score_data_loader',
+    'wxcloudrun.score_card.city_data_loader',
+    'wxcloudrun.score_card.school_data_loader',
+    'wxcloudrun.score_card.admission_score_calculator',
+    'wxcloudrun.utils.admission_score_card',
+]
+
+_snapshot: Optional[Mapping] = None  # 已读入的快照数据体
+_building = False  # 构建模式下总是走原加载逻辑并收集结果
+_built: Dict[str, Dict] = {}  # 构建模式下收集到的数据集
+
+
+def _source_key(path: str) -> str:
+    """源文件在快照中的键，resources 下的文件都是平铺的，用文件名即可"""
+    return os.path.basename(path)
+
+
+def _file_sha256(path: str) -> str:
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def _fingerprint(path: str, with_hash: bool = False) -> Optional[Dict[str, Any]]:
+    """源文件指纹: 大小和修改时间，构建快照时额外记录 sha256"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    fingerprint = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    if with_hash:
+        fingerprint['sha256'] = _file_sha256(path)
+    return fingerprint
+
+
+def _is_fresh(recorded: Dict[str, Dict], sources: List[str]) -> bool:
+    """
+    判断快照中的数据集是否仍与源文件一致
+    大小不同直接视为过期；修改时间不同时(如 git checkout、docker COPY 后)再比较 sha256
+    """
+    if set(recorded) != {_source_key(path) for path in sources}:
+        return False
+    for path in sources:
+        record = recorded[_source_key(path)]
+        current = _fingerprint(path)
+        if current is None or current['size'] != record['size']:
+            return False
+        if current['mtime_ns'] != record['mtime_ns'] and _file_sha256(path) != record.get('sha256'):
+            return False
+    return True
+
+
+class _SnapshotSections(Mapping):
+    """快照中按数据集分段存放的数据，第一次读取某个数据集时才反序列化对应的一段"""
+
+    def __init__(self, payload: bytes, sections: Dict[str, Tuple[int, int]]):
+        self._payload: Optional[bytes] = payload
+        self._sections = sections
+        self._entries: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name: str) -> Dict:
+        entry = self._entries.get(name)
+        if entry is not None:
+            return entry
+        offset, length = self._sections[name]
+        with self._lock:
+            if name not in self._entries:
+                self._entries[name] = pickle.loads(memoryview(self._payload)[offset:offset + length])
+                # 全部数据集都已反序列化后释放原始字节
+                if len(self._entries) == len(self._sections):
+                    self._payload = None
+            return self._entries[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._sections)
+
+    def __len__(self) -> int:
+        return len(self._sections)
+
+
+def _read_snapshot(path: str = SNAPSHOT_FILE) -> Mapping:
+    """读取并校验快照，失败时返回空字典"""
+    if not os.path.exists(path):
+        logger.info(f"数据快照不存在，使用 JSONL 加载: {path}")
+        return {}
+    try:
+        start = time.time()
+        with open(path, 'rb') as f:
+            header = pickle.load(f)
+            payload = f.read()
+        if header.get('version') != SNAPSHOT_VERSION:
+            logger.warning(f"数据快照版本不匹配: {header.get('version')} != {SNAPSHOT_VERSION}，使用 JSONL 加载")
+            return {}
+        if hashlib.sha256(payload).hexdigest() != header.get('checksum'):
+            logger.warning("数据快照校验和不匹配，使用 JSONL 加载")
+            return {}
+        datasets = _SnapshotSections(payload, header['sections'])
+        logger.info(f"读取数据快照完成: {len(datasets)} 个数据集, 耗时 {time.time() - start:.3f}s")
+        return datasets
+    except Exception as e:
+        logger.error(f"读取数据快照失败，使用 JSONL 加载: {str(e)}")
+        return {}
+
+
+def _get_snapshot() -> Mapping:
+    global _snapshot
+    if _snapshot is None:
+        _snapshot = _read_snapshot()
+    return _snapshot
+
+
+def refresh_snapshot() -> None:
+    """丢弃已读入的快照，下次加载数据集时重新读取快照文件"""
+    global _snapshot
+    _snapshot = None
+
+
+def load_dataset(name: str, sources: List[str], loader: Callable[[], Any]) -> Any:
+    """
+    优先从快照加载数据集，快照中没有或已过期时调用原加载函数
+    :param name: 数据集名称，在快照中唯一
+    :param sources: 数据集依赖的源文件路径
+    :param loader: 原 JSONL 加载函数
+    :return: 数据集
+    """
+    if not _building:
+        entry = _get_snapshot().get(name)
+        if entry is not None:
+            if _is_fresh(entry['sources'], sources):
+                return entry['data']
+            logger.warning(f"数据快照中的 {name} 已过期，使用 JSONL 加载")
+
+    data = loader()
+    if _building:
+        fingerprints = {_source_key(path): _fingerprint(path, with_hash=True) for path in sources}
+        if any(fingerprint is None for fingerprint in fingerprints.values()):
+            logger.warning(f"数据集 {name} 的源文件缺失，不写入快照")
+        else:
+            _built[name] = {'sources': fingerprints, 'data': data}
+    return data
+
+
+def build_snapshot(path: str = SNAPSHOT_FILE, modules: List[str] = SNAPSHOT_MODULES) -> Dict[str, Dict]:
+    """
+    导入各数据模块并把其加载的数据集写入快照
+    需要在新进程中执行，已导入的模块不会重新加载；任一数据模块导入失败或数据集加载失败时抛出 RuntimeError
+    """
+    global _building
+    _building = True
+    failed = []
+    try:
+        for module_name in modules:
+            if module_name in sys.modules:
+                logger.warning(f"模块 {module_name} 已导入，无法收集其数据集")
+                continue
+            try:
+                importlib.import_module(module_name)
+            except Exception as e:
+                logger.error(f"导入数据模块 {module_name} 失败: {str(e)}")
+                failed.append(module_name)
+        if modules:
+            # 数据集在第一次读取时才加载，导入模块后逐个加载以收集到快照中
+            from wxcloudrun.utils import datasets
+            if not datasets.warm_up():
+                failed.extend(name for name, loaded in datasets.readiness()['datasets'].items() if not loaded)
+    finally:
+        _building = False
+    # 缺少数据文件等导致部分数据集加载失败时不写入不完整的快照
+    if failed:
+        raise RuntimeError(f"构建数据快照失败: {failed}")
+
+    sections = {}
+    chunks = []
+    offset = 0
+    for name in sorted(_built):
+        chunk = pickle.dumps(_built[name], protocol=PICKLE_PROTOCOL)
+        sections[name] = (offset, len(chunk))
+        chunks.append(chunk)
+        offset += len(chunk)
+    payload = b''.join(chunks)
+    header = {
+        'version': SNAPSHOT_VERSION,
+        'checksum': hashlib.sha256(payload).hexdigest(),
+        'datasets': sorted(_built),
+        'sections': sections,
+        'created_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    # 先写临时文件再替换，避免服务读到写了一半的快照
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(header, f, protocol=PICKLE_PROTOCOL)
+        f.write(payload)
+    os.replace(tmp_path, path)
+    logger.info(f"数据快照已写入 {path}: {len(_built)} 个数据集 {header['datasets']}, {len(payload)} 字节")
+    return _built
+
+
+if __name__ == '__main__':
+    # 以 -m 执行时本文件是 __main__，数据模块导入的是 wxcloudrun.utils.snapshot，需在后者上构建
+    from wxcloudrun.utils import snapshot
+    try:
+        snapshot.build_snapshot()
+    except RuntimeError as e:
+        logger.error(str(e))
+        sys.exit(1)
@@ -0,0 +1,143 @@
+"""
+名称搜索用的 n-gram 倒排索引
+
+搜索框边输入边查询，每次按键都会发请求，逐条对全部名称做小写转换和子串判断太慢。
+加载数据时为每个名称建立单字和相邻双字(bigram)的倒排表，查询时取查询词各 bigram 倒排表的交集作为候选，
+再用子串判断确认，只检查少量候选名称。未安装 pypinyin 时不支持拼音首字母匹配。
+"""
+import heapq
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from loguru import logger
+import config
+
+try:
+    from pypinyin import lazy_pinyin, Style
+except ImportError:
+    lazy_pinyin = None
+    logger.warning("未安装 pypinyin，名称搜索不支持拼音首字母匹配")
+
+# 匹配类型，排序时依次靠后
+MATCH_EXACT = 0
+MATCH_TEXT = 1
+MATCH_PINYIN = 2
+
+# (匹配类型, 匹配位置, -热度, 名称长度, 名称序号)，越小越靠前
+MatchRank = Tuple[int, int, float, int, int]
+
+
+def normalize(text: str) -> str:
+    return str(text).strip().lower()
+
+
+def parse_limit(value) -> int:
+    """请求中的结果数，缺省为 config.SEARCH_RESULT_LIMIT，最多 config.SEARCH_MAX_LIMIT"""
+    try:
+        limit = int(value) if value not in (None, '') else config.SEARCH_RESULT_LIMIT
+    except (TypeError, ValueError):
+        limit = config.SEARCH_RESULT_LIMIT
+    return min(max(limit, 1), config.SEARCH_MAX_LIMIT)
+
+
+def parse_offset(value) -> int:
+    """请求中的翻页起始位置，缺省或不合法时为 0"""
+    try:
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def pinyin_initials(text: str) -> str:
+    """名称的拼音首字母(小写)，非汉字原样保留；未安装 pypinyin 时返回空串"""
+    if lazy_pinyin is None:
+        return ''
+    return ''.join(lazy_pinyin(text, style=Style.FIRST_LETTER)).lower()
+
+
+def _grams(text: str) -> Set[str]:
+    """单字和相邻双字"""
+    grams = set(text)
+    grams.update(text[i:i + 2] for i in range(len(text) - 1))
+    return grams
+
+
+def _build_postings(texts: List[str]) -> Dict[str, Set[int]]:
+    postings: Dict[str, Set[int]] = {}
+    for i, text in enumerate(texts):
+        for gram in _grams(text):
+            postings.setdefault(gram, set()).add(i)
+    return postings
+
+
+def _candidates(postings: Dict[str, Set[int]], query: str) -> Set[int]:
+    """包含查询词全部 bigram(单字查询时为该字)的名称序号"""
+    grams = [query] if len(query) == 1 else [query[i:i + 2] for i in range(len(query) - 1)]
+    lists = []
+    for gram in set(grams):
+        ids = postings.get(gram)
+        if not ids:
+            return set()
+        lists.append(ids)
+    lists.sort(key=len)
+    return lists[0].intersection(*lists[1:])
+
+
+class NgramIndex:
+    """一组名称上的 n-gram 倒排索引，支持前缀、子串和拼音首字母匹配，按匹配位置和热度排序"""
+
+    def __init__(self, names: Iterable[str], popularity: Optional[Dict[str, float]] = None,
+                 pinyin: bool = True):
+        """
+        :param names: 被搜索的名称，重复的只保留一个
+        :param popularity: 名称的热度，匹配位置相同时热度高的靠前，缺省为 0
+        :param pinyin: 是否建立拼音首字母索引
+        """
+        self.names: List[str] = list(dict.fromkeys(names))
+        popularity = popularity or {}
+        self._popularity = [popularity.get(name, 0) for name in self.names]
+        self._texts = [normalize(name) for name in self.names]
+        self._postings = _build_postings(self._texts)
+
+        self._initials: List[str] = []
+        self._initial_postings: Dict[str, Set[int]] = {}
+        if pinyin and lazy_pinyin is not None:
+            self._initials = [pinyin_initials(name) for name in self.names]
+            self._initial_postings = _build_postings(self._initials)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def match(self, query: str) -> Dict[int, MatchRank]:
+        """
+        查询匹配的名称
+        :return: 名称序号到排序键的映射，名称为 self.names[序号]
+        """
+        query = normalize(query)
+        if not query:
+            return {}
+
+        matches: Dict[int, MatchRank] = {}
+        for i in _candidates(self._postings, query):
+            text = self._texts[i]
+            position = text.find(query)
+            if position >= 0:
+                kind = MATCH_EXACT if text == query else MATCH_TEXT
+                matches[i] = (kind, position, -self._popularity[i], len(text), i)
+
+        # 拼音首字母只对字母查询生效，如 "bjdx" 匹配 "北京大学"
+        if self._initial_postings and query.isascii() and query.isalpha():
+            for i in _candidates(self._initial_postings, query):
+                if i in matches:
+                    continue
+                position = self._initials[i].find(query)
+                if position >= 0:
+                    matches[i] = (MATCH_PINYIN, position, -self._popularity[i], len(self._texts[i]), i)
+        return matches
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[str]:
+        """按 完全匹配 > 文字匹配 > 拼音匹配、匹配位置靠前、热度高、名称短 的顺序返回匹配的名称"""
+        matches = self.match(query)
+        if limit is None or limit >= len(matches):
+            ranked = sorted(matches.values())
+        else:
+            ranked = heapq.nsmallest(max(limit, 0), matches.values())
+        return [self.names[rank[-1]] for rank in ranked]
@@ -0,0 +1,37 @@
+import random
+from contextvars import ContextVar, Token
+from loguru import logger
+import config
+
+# 当前请求是否输出评分明细日志
+_trace_enabled: ContextVar[bool] = ContextVar('score_trace_enabled', default=False)
+
+
+def start_trace(debug: bool = False) -> Token:
+    """为当前请求开启或关闭评分追踪
+
+    debug 请求总是开启，其余请求按 config.SCORE_TRACE_SAMPLE_RATE 采样开启。
+    返回值交给 end_trace 恢复之前的状态。
+    """
+    enabled = bool(debug) or (config.SCORE_TRACE_SAMPLE_RATE > 0
+                              and random.random() < config.SCORE_TRACE_SAMPLE_RATE)
+    return _trace_enabled.set(enabled)
+
+
+def end_trace(token: Token) -> None:
+    _trace_enabled.reset(token)
+
+
+def trace_enabled() -> bool:
+    return _trace_enabled.get()
+
+
+def trace(message: str, *args, **fields) -> None:
+    """输出一条评分追踪日志
+
+    未开启追踪时直接返回，不做任何字符串格式化；message 使用 loguru 的 {} 占位符，
+    参数只在真正输出时才格式化。fields 作为结构化字段绑定到日志记录的 extra 中。
+    """
+    if not _trace_enabled.get():
+        return
+    logger.opt(depth=1).bind(trace=True, **fields).info(message, *args)
@@ -1,5 +1,6 @@
+import hmac
 from datetime import datetime
-from flask import render_template, request, jsonify
+from flask import render_template, request, jsonify, g
 from wxcloudrun import app
 from wxcloudrun.dao import delete_counterbyid, query_counterbyid, insert_counter, update_counterbyid
 from wxcloudrun.model import Counters
@@ -13,8 +14,34 @@ from wxcloudrun.apis.query_city import query_city
 from wxcloudrun.apis.choose_schools import choose_schools
 from wxcloudrun.apis.ai_ana import ai_ana
 from wxcloudrun.apis.kyys import kyys
-from wxcloudrun.apis.choose_school_v2 import choose_schools_v2
+from wxcloudrun.apis.choose_school_v2 import choose_schools_v2, result_cache
+from wxcloudrun.utils.response_cache import response_cache
+from wxcloudrun.apis.choose_school_batch import choose_schools_v2_batch
 from wxcloudrun.apis.get_school_detail import get_school_detail
+from wxcloudrun.utils.concurrency import ConcurrencyLimiter
+from wxcloudrun.utils import datasets
+import config
+
+# 大模型类接口共用的并发名额，与评分、查询类接口隔离
+llm_limiter = ConcurrencyLimiter('大模型', config.LLM_MAX_CONCURRENCY, config.LLM_ACQUIRE_TIMEOUT)
+
+@app.before_request
+def pin_dataset_generation():
+    # 请求期间固定使用开始时的一代数据集，中途重新加载不影响本请求
+    g.dataset_token = datasets.pin_generation()
+
+
+@app.teardown_request
+def release_dataset_generation(exc):
+    token = g.pop('dataset_token', None)
+    if token is not None:
+        datasets.release_generation(token)
+
+
+def _is_admin() -> bool:
+    token = request.headers.get('X-Admin-Token', '')
+    return bool(config.ADMIN_TOKEN) and hmac.compare_digest(token, config.ADMIN_TOKEN)
+
 
 @app.route('/')
 def index():
@@ -108,11 +135,60 @@ def choose_schools_api():
 def choose_schools_v2_api():
     return choose_schools_v2()
 
+@app.route('/api/choose_schools_v2_batch', methods=['POST'])
+def choose_schools_v2_batch_api():
+    """
+    :return: 批量择校结果，请求体和返回内容均为 JSONL，每行一条；需要管理令牌
+    """
+    if not _is_admin():
+        return make_err_response('无权限')
+    return choose_schools_v2_batch()
+
+@app.route('/api/cache_stats', methods=['GET'])
+def cache_stats_api():
+    """
+    :return: 择校结果缓存和查询类接口响应体缓存的命中统计
+    """
+    return make_succ_response({'choose_schools_v2': result_cache.stats(),
+                               'responses': response_cache.stats()})
+
+@app.route('/api/ready', methods=['GET'])
+def ready_api():
+    """
+    :return: 各数据集是否已加载，全部加载完成前 HTTP 状态码为 503
+    """
+    readiness = datasets.readiness()
+    response = make_succ_response(readiness)
+    if not readiness['ready']:
+        response.status_code = 503
+    return response
+
+@app.route('/api/admin/datasets', methods=['GET'])
+def datasets_status_api():
+    """
+    :return: 当前生效的数据集代号、版本和数据集列表
+    """
+    if not _is_admin():
+        return make_err_response('无权限')
+    return make_succ_response(datasets.status())
+
+@app.route('/api/admin/reload_datasets', methods=['POST'])
+def reload_datasets_api():
+    """
+    :return: 是否已开始重新加载，以及当前生效的数据集信息
+    """
+    if not _is_admin():
+        return make_err_response('无权限')
+    started = datasets.request_reload()
+    return make_succ_response({'started': started, **datasets.status()})
+
 @app.route('/api/ai_ana', methods=['POST'])
+@llm_limiter
 def ai_ana_api():
     return ai_ana()
 
 @app.route('/api/kyys', methods=['POST'])
+@llm_limiter
 def kyys_api():
     return kyys()
 